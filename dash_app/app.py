@@ -1,82 +1,156 @@
 import os
+
 import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html, Output, Input
-from flask import Flask
-from flask_login import LoginManager, current_user, logout_user
+from flask import Flask, Response, jsonify, request, send_file
+from flask_login import LoginManager, current_user, logout_user, login_required
 
-from db import get_engine, init_db
+from engines import shared_engine, pool_stats, dispose_all
+import background
 from layout import create_layout, create_login_layout
-from callbacks import register_callbacks
-from user_management import get_user_by_id
-
-# --- Inicialização ---
-server = Flask(__name__)
-app = dash.Dash(
-    __name__,
-    server=server,
-    external_stylesheets=[
-        dbc.themes.BOOTSTRAP  # Bootstrap responsivo
-        # Removido dbc.icons.BOOTSTRAP para evitar AttributeError se não existir na versão instalada
-    ],
-    suppress_callback_exceptions=True,
-    meta_tags=[
-        # Essencial para mobile (e evita zoom automático em alguns teclados)
-        {"name": "viewport", "content": "width=device-width, initial-scale=1, maximum-scale=1"}
-    ]
-)
-app.title = "Dashboard de Gestão de Avicultura"
-server.config.update(SECRET_KEY=os.urandom(24))
-
-# --- Login Manager ---
-login_manager = LoginManager()
-login_manager.init_app(server)
-login_manager.login_view = '/login'
-
-@login_manager.user_loader
-def load_user(user_id):
-    return get_user_by_id(int(user_id))
-
-# --- Layout Dinâmico / Roteamento ---
-app.layout = html.Div([
-    dcc.Location(id='url', refresh=False),
-    html.Div(id='page-content', style={"minHeight": "100vh"})
-])
-
-@app.callback(Output('page-content', 'children'), Input('url', 'pathname'))
-def display_page(pathname):
-    # ✅ Rota pública: /public/lote/<id>  (sem login)
-    if pathname and pathname.startswith('/public/lote/'):
+from user_management import get_cached_user_by_id, user_cache_stats
+from qr_assets import lote_qr_path
+from public_lot import PUBLIC_CACHE_TTL, get_public_view, public_cache_stats
+from public_static import PUBLIC_LOTE_RENDERER, NOT_FOUND_HTML, render_public_page
+
+
+def create_app():
+    """Monta o app Dash (com o servidor Flask em `app.server`).
+
+    Seguro para `gunicorn --preload` (gunicorn.conf.py): nenhuma conexão ao
+    banco nem arquivo fica aberto ao final, então o processo mestre pode
+    importar tudo uma vez e os workers herdam as páginas de memória por
+    copy-on-write. Engines, cache local e o diskcache dos callbacks em
+    background são (re)abertos em cada worker no primeiro uso.
+    """
+    # --- Inicialização ---
+    server = Flask(__name__)
+    app = dash.Dash(
+        __name__,
+        server=server,
+        external_stylesheets=[
+            dbc.themes.BOOTSTRAP  # Bootstrap responsivo
+            # Removido dbc.icons.BOOTSTRAP para evitar AttributeError se não existir na versão instalada
+        ],
+        suppress_callback_exceptions=True,
+        # Callbacks `background=True` (PDF, indicadores): jobs e resultados em diskcache local
+        background_callback_manager=background.get_manager(),
+        meta_tags=[
+            # Essencial para mobile (e evita zoom automático em alguns teclados)
+            {"name": "viewport", "content": "width=device-width, initial-scale=1, maximum-scale=1"}
+        ]
+    )
+    app.title = "Dashboard de Gestão de Avicultura"
+    # SECRET_KEY fixa por variável de ambiente; sem ela, uma chave aleatória gerada aqui
+    # (com --preload, a mesma para todos os workers)
+    server.config.update(SECRET_KEY=os.getenv("SECRET_KEY") or os.urandom(24))
+
+    # --- Login Manager ---
+    login_manager = LoginManager()
+    login_manager.init_app(server)
+    login_manager.login_view = '/login'
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return get_cached_user_by_id(int(user_id))
+
+    # --- Estatísticas internas (somente usuários autenticados) ---
+    @server.route('/_stats')
+    @login_required
+    def internal_stats():
+        return jsonify({"db_pool": pool_stats(), "user_cache": user_cache_stats(),
+                        "public_cache": public_cache_stats()})
+
+    # --- QR code público do lote (imagem imutável: cache HTTP de 1 ano) ---
+    # Só para lotes existentes: a rota não exige login e cada id geraria um PNG
+    # permanente em QR_CACHE_DIR. A consulta usa o cache da página pública,
+    # que também guarda os ids inexistentes.
+    @server.route('/qr/lote/<int:lote_id>.png')
+    def lote_qr_png(lote_id):
+        if get_public_view(lote_id) is None:
+            return Response("Lote não encontrado.", status=404, mimetype="text/plain")
+        response = send_file(lote_qr_path(lote_id), mimetype="image/png", max_age=31536000)
+        response.cache_control.immutable = True
+        return response
+
+    # --- Página pública estática: um único HTML, sem o bundle do Dash ---
+    # (a versão Dash fica em /public/lote/<id>/interativo, tratada em display_page)
+    if PUBLIC_LOTE_RENDERER == "static":
+        @server.route('/public/lote/<int:lote_id>')
+        def public_lote_static(lote_id):
+            page = render_public_page(lote_id)
+            if page is None:
+                return Response(NOT_FOUND_HTML, status=404, mimetype="text/html")
+            response = Response(page, mimetype="text/html")
+            response.add_etag()
+            return response.make_conditional(request)
+
+    # --- Página pública: permite cache no navegador/proxy pelo mesmo TTL do cache de dados ---
+    @server.after_request
+    def public_cache_headers(response):
+        if (request.method == "GET" and request.path.startswith("/public/")
+                and response.status_code == 200 and "Cache-Control" not in response.headers):
+            response.cache_control.public = True
+            response.cache_control.max_age = PUBLIC_CACHE_TTL
+        return response
+
+    # --- Layout Dinâmico / Roteamento ---
+    app.layout = html.Div([
+        dcc.Location(id='url', refresh=False),
+        html.Div(id='page-content', style={"minHeight": "100vh"})
+    ])
+
+    @app.callback(Output('page-content', 'children'), Input('url', 'pathname'))
+    def display_page(pathname):
+        # ✅ Rota pública: /public/lote/<id> e /public/lote/<id>/interativo  (sem login)
+        if pathname and pathname.startswith('/public/lote/'):
+            try:
+                lote_id = int(pathname.split('/')[3])
+            except Exception:
+                return html.Div(
+                    dbc.Alert("URL inválida. Lote não identificado.", color="danger"),
+                    style={"padding": "1rem"}
+                )
+            from layout import layout_public_lote
+            return layout_public_lote(lote_id)
+
+        # 🔐 Rotas privadas (requer login)
+        if current_user.is_authenticated:
+            if pathname == '/login':
+                return dcc.Location(pathname='/', id='redirect-to-home')
+            if pathname == '/logout':
+                logout_user()
+                return dcc.Location(pathname='/login', id='redirect-after-logout')
+            return create_layout()
+        else:
+            if pathname == '/login':
+                return create_login_layout()
+            return dcc.Location(pathname='/login', id='redirect-to-login')
+
+    # --- Inicialização Banco e Callbacks ---
+    # Em produção o esquema é verificado uma vez por prestart.py (SCHEMA_CHECK_ON_START=0);
+    # sem ele (ex.: `python app.py`), cada processo verifica ao subir. Uma falha de
+    # conexão não impede o app de subir: as páginas tratam o erro a cada requisição.
+    if os.getenv("SCHEMA_CHECK_ON_START", "1") == "1":
+        from db import init_db
+        from migrations import run_migrations
         try:
-            lote_id = int(pathname.split('/')[3])
-        except Exception:
-            return html.Div(
-                dbc.Alert("URL inválida. Lote não identificado.", color="danger"),
-                style={"padding": "1rem"}
-            )
-        from layout import layout_public_lote
-        return layout_public_lote(lote_id)
-
-    # 🔐 Rotas privadas (requer login)
-    if current_user.is_authenticated:
-        if pathname == '/login':
-            return dcc.Location(pathname='/', id='redirect-to-home')
-        if pathname == '/logout':
-            logout_user()
-            return dcc.Location(pathname='/login', id='redirect-after-logout')
-        from layout import create_layout
-        return create_layout()
-    else:
-        from layout import create_login_layout
-        if pathname == '/login':
-            return create_login_layout()
-        return dcc.Location(pathname='/login', id='redirect-to-login')
-
-
-# --- Inicialização Banco e Callbacks ---
-engine = get_engine()
-init_db(engine)
-register_callbacks(app)
+            engine = shared_engine()
+            init_db(engine)
+            run_migrations(engine)
+        except Exception as e:
+            print(f"[app] verificação do esquema falhou, seguindo sem ela: {e}")
+    from callbacks import register_callbacks
+    register_callbacks(app)
+    # Nenhuma conexão nem arquivo aberto antes do fork dos workers (--preload)
+    dispose_all()
+    background.close()
+    return app
+
+
+app = create_app()
+server = app.server
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=8050, debug=False)
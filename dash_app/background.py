@@ -0,0 +1,47 @@
+"""
+Callbacks em background do Dash com DiskcacheManager (sem Redis).
+
+A geração do PDF e os gráficos de indicadores rodavam dentro do callback,
+prendendo a thread do Gunicorn. Como callbacks `background=True` eles
+rodam num processo à parte: a página recebe o progresso, pode cancelar, e
+o worker web fica livre. O diskcache guarda o estado dos jobs e os
+resultados num diretório local, compartilhado pelos workers do container.
+
+O gerenciador não guarda resultados por argumentos (`cache_by`): os dois
+callbacks já têm cache próprio, compartilhado pelos workers e invalidado
+com precisão — o PDF em report_cache.py (impressão digital dos dados do
+lote) e os gráficos em indicators.py (versões do lote e das metas em
+local_store.py). Um segundo cache aqui só duplicaria os resultados, com uma
+invalidação mais grosseira.
+
+    BACKGROUND_CACHE_DIR     pasta do diskcache (padrão /tmp/sga_cache/background)
+"""
+import os
+
+BACKGROUND_CACHE_DIR = os.getenv("BACKGROUND_CACHE_DIR", "/tmp/sga_cache/background")
+
+_cache = None
+_manager = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        import diskcache
+        _cache = diskcache.Cache(BACKGROUND_CACHE_DIR)
+    return _cache
+
+
+def get_manager():
+    """Gerenciador dos callbacks em background (sem cache de resultado)."""
+    global _manager
+    if _manager is None:
+        from dash import DiskcacheManager
+        _manager = DiskcacheManager(_get_cache())
+    return _manager
+
+
+def close():
+    """Fecha o arquivo do diskcache neste processo (reaberto no próximo uso, ex.: após o fork)."""
+    if _cache is not None:
+        _cache.close()
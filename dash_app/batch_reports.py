@@ -0,0 +1,149 @@
+"""
+Exportação dos relatórios em PDF de vários lotes de uma vez.
+
+Em vez de oito consultas por lote, `fetch_reports_data` faz uma consulta
+por tabela para todos os lotes (`lote_id IN (...)`). Os PDFs são gerados
+em paralelo num pool de processos e entregues num ZIP (um PDF por lote) ou
+num único PDF com todos os relatórios em sequência.
+
+Pela linha de comando:
+    python batch_reports.py                               # lotes ativos, ZIP
+    python batch_reports.py --todos --formato pdf         # todos os lotes, PDF único
+    python batch_reports.py --lotes 3 5 8 --saida mensal.zip
+
+Pela interface: aba de relatórios, "Exportar Lotes" (ver report_jobs.submit_batch).
+
+    REPORT_BATCH_DIR   pasta das exportações (padrão /tmp/relatorios/lote);
+                       arquivos com mais de um dia são apagados na exportação seguinte
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import text
+
+from engines import shared_engine
+from reports import fetch_reports_data
+
+REPORT_BATCH_DIR = os.getenv("REPORT_BATCH_DIR", "/tmp/relatorios/lote")
+FORMATOS = ("zip", "pdf")
+
+
+def lot_ids(conn, incluir_finalizados=False):
+    """IDs dos lotes ativos (ou de todos), do mais recente para o mais antigo."""
+    filtro = "" if incluir_finalizados else "WHERE status = 'Ativo'"
+    return [row[0] for row in conn.execute(text(f"SELECT id FROM lotes {filtro} ORDER BY data_alojamento DESC"))]
+
+
+def _render_one(dados, pdf_path):
+    # Roda no processo do pool: os dados já vêm consultados, só renderiza.
+    from reports import write_report_pdf
+    return write_report_pdf(dados["lote_id"], pdf_path, dados=dados)
+
+
+def _file_name(dados):
+    ident = re.sub(r"[^\w.-]+", "_", str(dados["lote"]["identificador_lote"] or "")).strip("_")
+    return f"relatorio_lote_{dados['lote_id']}{'_' + ident if ident else ''}.pdf"
+
+
+def merge_pdfs(paths, dest):
+    """Concatena os PDFs de `paths` em `dest` (requer pypdf)."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(dest, "wb") as f:
+        writer.write(f)
+    return dest
+
+
+def _remove_old_exports(max_age_s=86400):
+    limite = time.time() - max_age_s
+    for nome in os.listdir(REPORT_BATCH_DIR):
+        path = os.path.join(REPORT_BATCH_DIR, nome)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < limite:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def export_batch(lote_ids=None, formato="zip", dest=None, workers=None, progress=None):
+    """Gera os relatórios de `lote_ids` (padrão: lotes ativos) e retorna o caminho do ZIP/PDF."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {' ou '.join(FORMATOS)}).")
+
+    with shared_engine().connect() as conn:
+        lote_ids = list(lote_ids) if lote_ids else lot_ids(conn)
+        dados = fetch_reports_data(conn, lote_ids) if lote_ids else {}
+    if not dados:
+        raise ValueError("Nenhum lote encontrado para exportar.")
+    if progress:
+        progress(10, f"Dados de {len(dados)} lote(s) carregados")
+
+    os.makedirs(REPORT_BATCH_DIR, exist_ok=True)
+    _remove_old_exports()
+    if dest is None:
+        dest = os.path.join(REPORT_BATCH_DIR, f"relatorios_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.{formato}")
+
+    tmpdir = tempfile.mkdtemp(prefix="lote_", dir=REPORT_BATCH_DIR)
+    try:
+        paths = {lote_id: os.path.join(tmpdir, _file_name(d)) for lote_id, d in dados.items()}
+        max_workers = workers or int(os.getenv("REPORT_WORKERS", 2))
+        # "spawn": pode ser chamado de dentro do worker web, que tem threads.
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_render_one, d, paths[lote_id]) for lote_id, d in dados.items()]
+            for feitos, fut in enumerate(as_completed(futures), 1):
+                fut.result()
+                if progress:
+                    progress(10 + int(80 * feitos / len(futures)), f"{feitos}/{len(futures)} relatórios gerados")
+
+        ordenados = [paths[lote_id] for lote_id in dados]
+        tmp_dest = dest + ".tmp"
+        if formato == "pdf":
+            merge_pdfs(ordenados, tmp_dest)
+        else:
+            # PDFs já são comprimidos: ZIP_STORED evita recomprimir à toa.
+            with zipfile.ZipFile(tmp_dest, "w", zipfile.ZIP_STORED) as zf:
+                for path in ordenados:
+                    zf.write(path, arcname=os.path.basename(path))
+        os.replace(tmp_dest, dest)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if progress:
+        progress(100, "Concluído")
+    return dest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os relatórios em PDF de vários lotes.")
+    parser.add_argument("--lotes", type=int, nargs="+", help="IDs dos lotes (padrão: lotes ativos).")
+    parser.add_argument("--todos", action="store_true", help="Inclui os lotes finalizados.")
+    parser.add_argument("--formato", choices=FORMATOS, default="zip", help="ZIP com um PDF por lote ou PDF único.")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: em REPORT_BATCH_DIR).")
+    parser.add_argument("--workers", type=int, help="Processos geradores (padrão: REPORT_WORKERS ou 2).")
+    args = parser.parse_args()
+
+    lote_ids = args.lotes
+    if not lote_ids:
+        with shared_engine().connect() as conn:
+            lote_ids = lot_ids(conn, incluir_finalizados=args.todos)
+
+    t0 = time.perf_counter()
+    dest = export_batch(lote_ids, args.formato, args.saida, args.workers,
+                        progress=lambda pct, msg: print(f"[{pct:3d}%] {msg}"))
+    print(f"{len(lote_ids)} lote(s) exportado(s) em {time.perf_counter() - t0:.1f} s: {dest}")
+
+
+if __name__ == '__main__':
+    main()
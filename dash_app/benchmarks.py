@@ -0,0 +1,464 @@
+"""
+Benchmarks de desempenho (executar contra um banco de teste/homologação).
+
+    python benchmarks.py datas --anos 5
+    python benchmarks.py render --linhas 10000
+    python benchmarks.py indicadores --semanas 2000
+    python benchmarks.py granja --lotes 100
+    python benchmarks.py startup
+    python benchmarks.py memoria --workers 4
+    python benchmarks.py carga --url http://localhost:8050 --lote 12
+
+Cada subcomando imprime um relatório curto no terminal. Os que precisam de
+dados criam um lote sintético "BENCH-..." e o removem ao final (o
+ON DELETE CASCADE limpa as tabelas filhas).
+"""
+import argparse
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, text
+
+from engines import shared_engine
+
+
+# ---------------------------
+# Utilitários
+# ---------------------------
+def timeit(fn, repeticoes):
+    """Executa `fn` `repeticoes` vezes e retorna (média, mínimo) em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.mean(tempos), min(tempos)
+
+
+def explain(conn, sql, params):
+    """Resumo do plano (tabela, tipo de acesso, índice, linhas estimadas)."""
+    rows = conn.execute(text("EXPLAIN " + sql), params).mappings().all()
+    return [f"table={r['table']} type={r['type']} key={r['key']} rows={r['rows']} extra={r['Extra']}" for r in rows]
+
+
+@contextmanager
+def synthetic_lot(engine, anos=0, aves=10000, semanas=0):
+    """Cria um lote sintético com `anos` anos de produção diária (e `semanas` semanas
+    em producao_aves) e o remove no final."""
+    ident = f"BENCH-{int(time.time())}"
+    inicio = date.today() - timedelta(days=365 * anos)
+    with engine.begin() as conn:
+        lote_id = conn.execute(text(
+            "INSERT INTO lotes (identificador_lote, linhagem, aviario_alocado, data_alojamento, aves_alojadas, status) "
+            "VALUES (:i, 'BENCH', 'BENCH', :d, :a, 'Ativo')"
+        ), {"i": ident, "d": inicio, "a": aves}).lastrowid
+        if anos:
+            rows = [{"l": lote_id, "d": inicio + timedelta(days=i),
+                     "t": random.randint(8000, 9500), "q": random.randint(0, 150)}
+                    for i in range(365 * anos + 1)]
+            conn.execute(text(
+                "INSERT INTO producao_ovos (lote_id, data_producao, total_ovos, ovos_quebrados) VALUES (:l, :d, :t, :q)"
+            ), rows)
+        if semanas:
+            rows = [{"l": lote_id, "s": s, "a": aves, "p": inicio + timedelta(weeks=s),
+                     **{f"d{i}": random.randint(0, 5) for i in range(1, 8)},
+                     "pm": 40.0 + 25 * s, "c": 20.0 + s * 0.8}
+                    for s in range(1, semanas + 1)]
+            for r in rows:
+                r["mt"] = sum(r[f"d{i}"] for i in range(1, 8))
+            conn.execute(text(
+                "INSERT INTO producao_aves (lote_id, semana_idade, aves_na_semana, mort_d1, mort_d2, mort_d3, "
+                "mort_d4, mort_d5, mort_d6, mort_d7, mort_total, data_pesagem, peso_medio, consumo_real_ave_dia) "
+                "VALUES (:l, :s, :a, :d1, :d2, :d3, :d4, :d5, :d6, :d7, :mt, :p, :pm, :c)"
+            ), rows)
+    try:
+        yield lote_id
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM lotes WHERE id = :id"), {"id": lote_id})
+
+
+@contextmanager
+def synthetic_farm(engine, lotes, semanas, linhagem):
+    """Cria `lotes` lotes ativos sintéticos com `semanas` semanas em producao_aves, a
+    última semana de postura e o lote_resumo reconstruído; remove todos no final."""
+    from lot_summary import rebuild
+
+    prefixo = f"BENCH-{int(time.time())}"
+    inicio = date.today() - timedelta(weeks=semanas)
+    ids = []
+    try:
+        with engine.begin() as conn:
+            for n in range(lotes):
+                lote_id = conn.execute(text(
+                    "INSERT INTO lotes (identificador_lote, linhagem, aviario_alocado, data_alojamento, aves_alojadas, status) "
+                    "VALUES (:i, :lin, 'BENCH', :d, 10000, 'Ativo')"
+                ), {"i": f"{prefixo}-{n}", "lin": linhagem, "d": inicio}).lastrowid
+                ids.append(lote_id)
+                conn.execute(text(
+                    "INSERT INTO producao_aves (lote_id, semana_idade, aves_na_semana, mort_total, "
+                    "data_pesagem, peso_medio, consumo_real_ave_dia) VALUES (:l, :s, 10000, :m, :p, :pm, :c)"
+                ), [{"l": lote_id, "s": s, "m": random.randint(0, 35), "p": inicio + timedelta(weeks=s),
+                     "pm": 40.0 + 25 * s, "c": 20.0 + s * 0.8} for s in range(1, semanas + 1)])
+                conn.execute(text(
+                    "INSERT INTO producao_ovos (lote_id, data_producao, total_ovos, ovos_quebrados) VALUES (:l, :d, :t, :q)"
+                ), [{"l": lote_id, "d": date.today() - timedelta(days=i),
+                     "t": random.randint(8000, 9500), "q": random.randint(0, 150)} for i in range(7)])
+                rebuild(conn, lote_id)
+        yield ids
+    finally:
+        if ids:
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM lotes WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                             {"ids": ids})
+
+
+# ---------------------------
+# Subcomandos
+# ---------------------------
+def bench_datas(args):
+    """Filtros por MONTH()/YEAR() vs. intervalos [inicio, fim) em producao_ovos."""
+    from date_ranges import current_month, previous_months
+
+    antigo_mes = ("SELECT data_producao, total_ovos, ovos_quebrados FROM producao_ovos "
+                  "WHERE lote_id = :lote_id AND MONTH(data_producao) = MONTH(CURDATE()) "
+                  "AND YEAR(data_producao) = YEAR(CURDATE()) ORDER BY data_producao DESC")
+    mes = current_month()
+    novo_mes = ("SELECT data_producao, total_ovos, ovos_quebrados FROM producao_ovos "
+                f"WHERE lote_id = :lote_id AND {mes.clause('data_producao')} ORDER BY data_producao DESC")
+
+    antigo_resumo = ("SELECT MONTHNAME(data_producao) AS mes_nome, YEAR(data_producao) AS ano, SUM(total_ovos) "
+                     "FROM producao_ovos WHERE lote_id = :lote_id "
+                     "AND data_producao < DATE_FORMAT(CURDATE(), '%Y-%m-01') "
+                     "AND data_producao >= DATE_SUB(DATE_FORMAT(CURDATE(), '%Y-%m-01'), INTERVAL 3 MONTH) "
+                     "GROUP BY mes_nome, ano")
+    periodo = previous_months(3)
+    novo_resumo = ("SELECT YEAR(data_producao) AS ano, MONTH(data_producao) AS mes, SUM(total_ovos) "
+                   f"FROM producao_ovos WHERE lote_id = :lote_id AND {periodo.clause('data_producao')} "
+                   "GROUP BY ano, mes")
+
+    casos = [
+        ("mês atual (antigo)", antigo_mes, {}),
+        ("mês atual (novo)", novo_mes, mes.params()),
+        ("resumo 3 meses (antigo)", antigo_resumo, {}),
+        ("resumo 3 meses (novo)", novo_resumo, periodo.params()),
+    ]
+
+    engine = shared_engine()
+    with synthetic_lot(engine, anos=args.anos) as lote_id:
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE TABLE producao_ovos"))
+            print(f"Lote sintético {lote_id}: {args.anos} ano(s) de produção diária\n")
+            for nome, sql, params in casos:
+                params = {"lote_id": lote_id, **params}
+                media, minimo = timeit(lambda: conn.execute(text(sql), params).fetchall(), args.repeticoes)
+                print(f"{nome:<26} média {media:8.2f} ms | mín {minimo:8.2f} ms")
+                for linha in explain(conn, sql, params):
+                    print(f"{'':<26} {linha}")
+
+
+def bench_render(args):
+    """Tabelas do relatório: iterrows com concatenação de strings vs. formatação por coluna."""
+    import pandas as pd
+    from report_render import Column, table_html, fmt_date, fmt_int
+
+    n = args.linhas
+    df = pd.DataFrame({
+        "data_producao": pd.date_range(date.today() - timedelta(days=n - 1), periods=n, freq="D"),
+        "total_ovos": [random.randint(8000, 9500) for _ in range(n)],
+        "ovos_quebrados": [random.randint(0, 150) for _ in range(n)],
+    })
+
+    def antigo():
+        rows = ""
+        for _, r in df.iterrows():
+            rows += f"""
+            <tr>
+                <td>{pd.to_datetime(r['data_producao']).strftime('%d/%m/%Y')}</td>
+                <td style="text-align:right">{int(r['total_ovos'] or 0)}</td>
+                <td style="text-align:right">{int(r['ovos_quebrados'] or 0)}</td>
+            </tr>"""
+        return f"<table><tbody>{rows}</tbody></table>"
+
+    colunas = [Column("Data", "data_producao", fmt_date),
+               Column("Total de Ovos", "total_ovos", fmt_int, "right"),
+               Column("Ovos Quebrados", "ovos_quebrados", fmt_int, "right")]
+
+    print(f"{n} linhas de produção diária\n")
+    for nome, fn in (("iterrows + concatenação", antigo), ("por coluna (report_render)", lambda: table_html(df, colunas))):
+        media, minimo = timeit(fn, args.repeticoes)
+        print(f"{nome:<28} média {media:8.2f} ms | mín {minimo:8.2f} ms")
+
+
+def bench_indicadores(args):
+    """Gráficos de indicadores: SELECT * + KPIs no pandas vs. consulta tipada com KPIs no SQL."""
+    import pandas as pd
+    from lot_kpis import fetch_lot_kpis
+
+    def antigo(conn, lote_id):
+        df = pd.read_sql(text("SELECT * FROM producao_aves WHERE lote_id = :id ORDER BY semana_idade"),
+                         conn, params={"id": lote_id})
+        df['mort_acum_pct'] = df['mort_total'].cumsum() / args.aves * 100
+        df['consumo_acum_real'] = (df['consumo_real_ave_dia'] * 7).cumsum()
+        df['ganho_de_peso'] = df['peso_medio'].diff().fillna(df['peso_medio'])
+        df['conv_alimentar'] = (df['consumo_real_ave_dia'] * 7 / df['ganho_de_peso']).where(df['ganho_de_peso'] > 0)
+        return df
+
+    engine = shared_engine()
+    with synthetic_lot(engine, aves=args.aves, semanas=args.semanas) as lote_id:
+        with engine.connect() as conn:
+            casos = [
+                ("SELECT * + pandas (antigo)", lambda: antigo(conn, lote_id)),
+                ("tipada + janelas (lot_kpis)", lambda: fetch_lot_kpis(conn, lote_id)),
+            ]
+            print(f"Lote sintético {lote_id}: {args.semanas} semana(s) em producao_aves\n")
+            for nome, carregar in casos:
+                df = carregar()
+                kib = df.memory_usage(deep=True).sum() / 1024
+                media, minimo = timeit(carregar, args.repeticoes)
+                print(f"{nome:<28} {len(df.columns):2d} colunas | {kib:9.1f} KiB | "
+                      f"média {media:8.2f} ms | mín {minimo:8.2f} ms")
+
+
+def bench_granja(args):
+    """Visão da Granja: fetch_farm_kpis com N lotes ativos (meta: < 1 s para 100 lotes)."""
+    from farm_overview import fetch_farm_kpis
+    from standards import get_standards
+
+    linhagem = args.linhagem or next(iter(get_standards().linhagens()), "BENCH")
+    engine = shared_engine()
+    with synthetic_farm(engine, args.lotes, args.semanas, linhagem):
+        with engine.connect() as conn:
+            ativos = len(fetch_farm_kpis(conn))
+            media, minimo = timeit(lambda: fetch_farm_kpis(conn), args.repeticoes)
+    print(f"{args.lotes} lote(s) sintético(s) ({linhagem}, {args.semanas} semana(s)); "
+          f"{ativos} lote(s) ativo(s) no total\n")
+    print(f"{'fetch_farm_kpis':<28} média {media:8.2f} ms | mín {minimo:8.2f} ms")
+    if media >= 1000:
+        raise SystemExit("acima da meta de 1 s")
+
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+pesados = [m for m in ("weasyprint", "qrcode", "plotly.express", "plotly.subplots", "kaleido") if m in sys.modules]
+print(json.dumps({"segundos": time.perf_counter() - t0, "pesados": pesados}))
+"""
+
+
+def bench_startup(args):
+    """Tempo de importação de app.py (boot de um worker) com e sem a verificação do esquema."""
+    import json
+    import os
+    import subprocess
+    import sys
+
+    aqui = os.path.dirname(os.path.abspath(__file__))
+    for nome, checar in (("com verificação do esquema", "1"), ("sem verificação (prestart.py)", "0")):
+        env = dict(os.environ, SCHEMA_CHECK_ON_START=checar)
+        tempos, pesados = [], []
+        for _ in range(args.repeticoes):
+            saida = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], cwd=aqui, env=env,
+                                   capture_output=True, text=True, check=True).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            tempos.append(r["segundos"] * 1000)
+            pesados = r["pesados"]
+        print(f"{nome:<30} média {statistics.mean(tempos):8.1f} ms | mín {min(tempos):8.1f} ms | "
+              f"módulos pesados carregados: {', '.join(pesados) or 'nenhum'}")
+
+
+def _memoria_kib(pid):
+    """(RSS, PSS) do processo em KiB, de /proc/<pid>/smaps_rollup (Linux)."""
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linha in f:
+            campo, _, resto = linha.partition(":")
+            if campo in ("Rss", "Pss"):
+                valores[campo] = int(resto.split()[0])
+    return valores["Rss"], valores["Pss"]
+
+
+def _filhos(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def bench_memoria(args):
+    """Memória por worker do Gunicorn (RSS e PSS) com e sem --preload."""
+    import os
+    import signal
+    import subprocess
+    import sys
+
+    aqui = os.path.dirname(os.path.abspath(__file__))
+    print(f"{args.workers} worker(s); PSS divide as páginas compartilhadas entre os processos\n")
+    for nome, preload in (("sem preload", "0"), ("com preload", "1")):
+        env = dict(os.environ, GUNICORN_PRELOAD=preload, GUNICORN_WORKERS=str(args.workers),
+                   GUNICORN_BIND=f"127.0.0.1:{args.porta}", SCHEMA_CHECK_ON_START="0")
+        mestre = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+                                  cwd=aqui, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            # espera os workers subirem e terminarem de importar o app
+            limite = time.monotonic() + 120
+            while len(_filhos(mestre.pid)) < args.workers and time.monotonic() < limite:
+                time.sleep(0.5)
+            time.sleep(args.espera)
+            mestre_rss, mestre_pss = _memoria_kib(mestre.pid)
+            medidas = [_memoria_kib(pid) for pid in _filhos(mestre.pid)]
+        finally:
+            mestre.send_signal(signal.SIGTERM)
+            mestre.wait(timeout=60)
+        rss = statistics.mean(m[0] for m in medidas) / 1024
+        pss = statistics.mean(m[1] for m in medidas) / 1024
+        total = (mestre_pss + sum(m[1] for m in medidas)) / 1024
+        print(f"{nome:<12} worker: RSS {rss:7.1f} MiB | PSS {pss:7.1f} MiB | "
+              f"total (mestre + workers, PSS) {total:7.1f} MiB")
+
+
+def _dash_payload(saidas, entradas):
+    """Corpo de POST /_dash-update-component para um callback (saídas e entradas como tuplas)."""
+    outputs = [{"id": i, "property": p} for i, p in saidas]
+    output = (f"{saidas[0][0]}.{saidas[0][1]}" if len(saidas) == 1
+              else ".." + "...".join(f"{i}.{p}" for i, p in saidas) + "..")
+    return {
+        "output": output,
+        "outputs": outputs[0] if len(outputs) == 1 else outputs,
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in entradas],
+        "changedPropIds": [f"{entradas[0][0]}.{entradas[0][1]}"],
+        "state": [],
+    }
+
+
+def _callbacks_de_leitura(lote_id):
+    """Os callbacks de leitura que mais esperam pelo banco, como requisições Dash."""
+    return {
+        "update_lotes_table": _dash_payload(
+            [("lotes-table-div", "children")],
+            [("lote-submit-status", "children", None), ("tabs", "value", "tab-lotes")]),
+        "update_agua_view": _dash_payload(
+            [("agua-graph", "figure"), ("agua-table-div", "children")],
+            [("dropdown-lote-agua", "value", lote_id), ("agua-submit-status", "children", None)]),
+        "update_treat_table": _dash_payload(
+            [("treatments-history-table-div", "children")],
+            [("dropdown-lote-treat", "value", lote_id), ("treat-submit-status", "children", None)]),
+        "update_financeiro_resumo": _dash_payload(
+            [("financeiro-resumo-div", "children")],
+            [("dropdown-lote-financeiro", "value", lote_id), ("custo-submit-status", "children", None),
+             ("receita-submit-status", "children", None)]),
+    }
+
+
+def bench_carga(args):
+    """Teste de carga dos callbacks de leitura contra um app já rodando (gthread x gevent)."""
+    import json
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    url = args.url.rstrip("/") + "/_dash-update-component"
+    # Entradas na mesma ordem declarada no callback: o Dash casa por posição
+    payloads = {nome: json.dumps(c).encode() for nome, c in _callbacks_de_leitura(args.lote).items()}
+    corpos = list(payloads.values())
+
+    def enviar(corpo):
+        """(status HTTP, tamanho do corpo); 204 = callback sem atualização (PreventUpdate)."""
+        req = urllib.request.Request(url, data=corpo, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return resp.status, len(resp.read())
+
+    # Verificação: cada callback precisa responder 200 com conteúdo; senão o teste
+    # mediria um callback que não faz nada.
+    for nome, corpo in payloads.items():
+        try:
+            status, tamanho = enviar(corpo)
+        except Exception as e:
+            raise SystemExit(f"{nome}: falhou antes do teste de carga ({e})")
+        if status != 200 or not tamanho:
+            raise SystemExit(f"{nome}: resposta {status} com {tamanho} byte(s); verifique o payload e o --lote")
+
+    def requisicao(i):
+        t0 = time.perf_counter()
+        try:
+            status, tamanho = enviar(corpos[i % len(corpos)])
+            ok = status == 200 and tamanho > 0
+        except Exception:
+            ok = False
+        return (time.perf_counter() - t0) * 1000, ok
+
+    print(f"{url} | {args.requisicoes} requisição(ões) por nível, alternando 4 callbacks (lote {args.lote})\n")
+    falhas = 0
+    for concorrencia in args.concorrencia:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+            resultados = list(pool.map(requisicao, range(args.requisicoes)))
+        total = time.perf_counter() - t0
+        tempos = sorted(ms for ms, ok in resultados if ok)
+        erros = sum(1 for _, ok in resultados if not ok)
+        falhas += erros
+        if not tempos:
+            print(f"concorrência {concorrencia:4d} | todas as requisições falharam")
+            continue
+        p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+        print(f"concorrência {concorrencia:4d} | {len(tempos) / total:7.1f} req/s | "
+              f"p50 {statistics.median(tempos):8.1f} ms | p95 {p95:8.1f} ms | erros {erros}")
+    if falhas:
+        raise SystemExit(f"\n{falhas} requisição(ões) sem resposta 200 com conteúdo: os números acima não são confiáveis")
+
+
+COMMANDS = {
+    "datas": bench_datas,
+    "render": bench_render,
+    "indicadores": bench_indicadores,
+    "granja": bench_granja,
+    "startup": bench_startup,
+    "memoria": bench_memoria,
+    "carga": bench_carga,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do dashboard de avicultura.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("datas", help=bench_datas.__doc__)
+    p.add_argument("--anos", type=int, default=5, help="Anos de produção diária no lote sintético.")
+    p.add_argument("--repeticoes", type=int, default=20)
+
+    p = sub.add_parser("render", help=bench_render.__doc__)
+    p.add_argument("--linhas", type=int, default=10000, help="Linhas da tabela sintética.")
+    p.add_argument("--repeticoes", type=int, default=5)
+
+    p = sub.add_parser("indicadores", help=bench_indicadores.__doc__)
+    p.add_argument("--semanas", type=int, default=2000, help="Semanas em producao_aves no lote sintético.")
+    p.add_argument("--aves", type=int, default=10000, help="Aves alojadas no lote sintético.")
+    p.add_argument("--repeticoes", type=int, default=20)
+
+    p = sub.add_parser("granja", help=bench_granja.__doc__)
+    p.add_argument("--lotes", type=int, default=100, help="Lotes ativos sintéticos.")
+    p.add_argument("--semanas", type=int, default=30, help="Semanas em producao_aves por lote.")
+    p.add_argument("--linhagem", help="Linhagem dos lotes sintéticos (padrão: a primeira com metas).")
+    p.add_argument("--repeticoes", type=int, default=10)
+
+    p = sub.add_parser("startup", help=bench_startup.__doc__)
+    p.add_argument("--repeticoes", type=int, default=5, help="Processos novos por modo.")
+
+    p = sub.add_parser("memoria", help=bench_memoria.__doc__)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--porta", type=int, default=18050, help="Porta local usada pelo Gunicorn de teste.")
+    p.add_argument("--espera", type=float, default=5.0, help="Segundos após o boot antes de medir.")
+
+    p = sub.add_parser("carga", help=bench_carga.__doc__)
+    p.add_argument("--url", default="http://localhost:8050", help="Endereço do app (Gunicorn, sem o Nginx).")
+    p.add_argument("--lote", type=int, required=True, help="ID de um lote com dados.")
+    p.add_argument("--concorrencia", type=int, nargs="+", default=[1, 8, 32, 64])
+    p.add_argument("--requisicoes", type=int, default=400, help="Requisições por nível de concorrência.")
+
+    args = parser.parse_args()
+    COMMANDS[args.comando](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,34 @@
+import base64
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 import pandas as pd
 from sqlalchemy import text
-from db import get_engine
+from engines import shared_engine
 import dash_bootstrap_components as dbc
 import dash
 from dash import html, dcc, dash_table
 from flask_login import login_user
-import base64
-from weasyprint import HTML
-from datetime import datetime, timedelta
+
+from date_ranges import current_month, previous_months, last_days, month_label
+from egg_rollup import add_daily_production, fetch_monthly
+from lot_snapshot import get_lot_snapshot
+import lot_summary
+from farm_overview import fetch_farm_kpis
+from public_lot import get_public_view
+from indicators import get_indicator_figures, lot_version_key
+from standards import get_standards, METAS_VERSION_KEY
+import standards
+from lot_options import LOTES_VERSION_KEY
+import lot_options
+from metas_import import import_curves, upsert_curves, CurveFileError
+import local_store
+from report_jobs import submit_batch, get_job
+from reports import build_report_html, cached_report_pdf
 
 from user_management import get_user_by_username
-from layout import (view_layout, lotes_layout, insert_weekly_layout,
+from layout import (view_layout, granja_layout, lotes_layout, insert_weekly_layout,
                     financeiro_layout, treat_layout, metas_layout, reports_layout,
                     producao_layout, get_distinct_linhagens, agua_layout)
 
@@ -25,7 +37,7 @@ def register_callbacks(app):
     @app.callback(Output('tab-content', 'children'), Input('tabs', 'value'))
     def render_content(tab):
         layouts = {
-            'tab-view': view_layout, 'tab-lotes': lotes_layout,
+            'tab-view': view_layout, 'tab-granja': granja_layout, 'tab-lotes': lotes_layout,
             'tab-insert-weekly': insert_weekly_layout,
             'tab-producao': producao_layout,  
             'tab-financeiro': financeiro_layout,
@@ -69,10 +81,12 @@ def register_callbacks(app):
         if not all([identificador, data, aves]):
             return dbc.Alert("Identificador, Data e Nº de Aves são obrigatórios.", color="warning"), current_lotes
         try:
-            engine = get_engine()
+            engine = shared_engine()
             with engine.begin() as conn:
                 q = text("INSERT INTO lotes (identificador_lote, linhagem, aviario_alocado, data_alojamento, aves_alojadas, status) VALUES (:id, :lin, :avi, :dt, :aves, 'Ativo')")
                 conn.execute(q, {"id": identificador, "lin": linhagem, "avi": aviario, "dt": data, "aves": aves})
+            local_store.bump(LOTES_VERSION_KEY)
+            lot_options.invalidate()
             from layout import get_active_lots
             return dbc.Alert(f"Lote '{identificador}' cadastrado!", color="success"), get_active_lots()
         except Exception as e:
@@ -84,7 +98,7 @@ def register_callbacks(app):
     )
     def update_lotes_table(status, tab):
         if tab != 'tab-lotes': raise PreventUpdate
-        engine = get_engine()
+        engine = shared_engine()
         df = pd.read_sql("SELECT id, identificador_lote as 'Lote', linhagem as 'Linhagem', aviario_alocado as 'Aviário', data_alojamento as 'Data', aves_alojadas as 'Aves', status as 'Status' FROM lotes ORDER BY data_alojamento DESC", engine)
         return dash_table.DataTable(id='lotes-table', columns=[{"name": i, "id": i, "deletable": False} for i in df.columns], data=df.to_dict('records'), row_selectable="single", selected_rows=[])
 
@@ -102,10 +116,12 @@ def register_callbacks(app):
     def finalize_lote(n, selected_rows, data):
         if not n or not selected_rows: raise PreventUpdate
         lote_id = data[selected_rows[0]]['id']
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 conn.execute(text("UPDATE lotes SET status = 'Finalizado' WHERE id = :id"), {"id": lote_id})
+            local_store.bump(LOTES_VERSION_KEY, lot_version_key(lote_id))
+            lot_options.invalidate()
             return dbc.Alert(f"Lote ID {lote_id} finalizado.", color="info")
         except Exception as e:
             return dbc.Alert(f"Erro ao finalizar lote: {e}", color="danger")
@@ -118,14 +134,11 @@ def register_callbacks(app):
     )
     def show_and_fill_weekly_form(lote_id):
         if not lote_id: return {'display': 'none'}, None, None
-        engine = get_engine()
+        engine = shared_engine()
         with engine.connect() as conn:
-            aves_alojadas = conn.execute(text("SELECT aves_alojadas FROM lotes WHERE id = :id"), {"id": lote_id}).scalar() or 0
-            mort_acumulada = conn.execute(text("SELECT COALESCE(SUM(mort_total), 0) FROM producao_aves WHERE lote_id = :id"), {"id": lote_id}).scalar() or 0
-            ultima_semana = conn.execute(text("SELECT COALESCE(MAX(semana_idade), 0) FROM producao_aves WHERE lote_id = :id"), {"id": lote_id}).scalar() or 0
-        aves_atuais = aves_alojadas - mort_acumulada
-        proxima_semana = ultima_semana + 1
-        return {'display': 'block'}, aves_atuais, proxima_semana
+            snapshot = get_lot_snapshot(conn, lote_id)
+        if not snapshot: return {'display': 'none'}, None, None
+        return {'display': 'block'}, snapshot['aves_atuais'], snapshot['ultima_semana'] + 1
 
     @app.callback(Output("input-mort-total", "value"), [Input(f"input-mort-dia-{i}", "value") for i in range(1, 8)])
     def calc_mort_total(*dias):
@@ -145,61 +158,94 @@ def register_callbacks(app):
         mort_dias = args[:7]
         mort_total, dt_pesagem, peso_medio, consumo_real = args[7:]
         
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 q = text("INSERT INTO producao_aves (lote_id, semana_idade, aves_na_semana, mort_d1, mort_d2, mort_d3, mort_d4, mort_d5, mort_d6, mort_d7, mort_total, data_pesagem, peso_medio, consumo_real_ave_dia) VALUES (:lote_id, :sem, :aves, :d1, :d2, :d3, :d4, :d5, :d6, :d7, :mt, :dt_p, :pm, :cr)")
                 params = {"lote_id": lote_id, "sem": semana, "aves": aves_semana, **{f"d{i+1}": d for i, d in enumerate(mort_dias)}, "mt": mort_total, "dt_p": dt_pesagem, "pm": peso_medio, "cr": consumo_real}
                 conn.execute(q, params)
+                lot_summary.add_weekly(conn, lote_id, semana, mort_total, consumo_real, dt_pesagem, peso_medio)
+            local_store.bump(lot_version_key(lote_id))
             return dbc.Alert("Dados da semana inseridos com sucesso!", color="success")
         except Exception as e:
             return dbc.Alert(f"Erro: {e}", color="danger")
 
     # --- CALLBACKS DE VISUALIZAÇÃO ---
+    # Em background (background.py): a barra acompanha consulta e montagem dos gráficos
+    # e o botão "Cancelar" interrompe. O resultado é reaproveitado entre workers e
+    # navegadores pelo cache local de indicators.py, invalidado pelas versões do lote
+    # e das metas.
     @app.callback(
         [Output("graph-peso-medio", "figure"), Output("graph-mortalidade-acumulada", "figure"),
          Output("graph-consumo-comparativo", "figure"), Output("graph-conversao-alimentar", "figure")],
-        Input("dropdown-lote-indicadores", "value")
+        Input("dropdown-lote-indicadores", "value"),
+        background=True,
+        running=[(Output("btn-cancel-indicadores", "disabled"), False, True)],
+        cancel=[Input("btn-cancel-indicadores", "n_clicks")],
+        progress=[Output("indicadores-progress", "value"), Output("indicadores-progress", "label")],
     )
-    def update_indicadores_graphs(lote_id):
+    def update_indicadores_graphs(set_progress, lote_id):
         if not lote_id: return go.Figure(), go.Figure(), go.Figure(), go.Figure()
-        
-        engine = get_engine()
+
+        progress = lambda pct, msg: set_progress((pct, f"{pct}% — {msg}"))
+        figs = get_indicator_figures(lote_id, progress=progress)
+        set_progress((100, "100%"))
+        return tuple(figs)
+
+    # --- CALLBACK DA VISÃO DA GRANJA (todos os lotes ativos) ---
+    @app.callback(
+        [Output("granja-cards-div", "children"), Output("granja-graph", "figure"), Output("granja-table-div", "children")],
+        Input("tabs", "value")
+    )
+    def update_granja_overview(tab):
+        if tab != 'tab-granja': raise PreventUpdate
+        engine = shared_engine()
         with engine.connect() as conn:
-            df_prod = pd.read_sql(text("SELECT * FROM producao_aves WHERE lote_id = :id ORDER BY semana_idade"), conn, params={"id": lote_id})
-            lote_info = conn.execute(text("SELECT linhagem, aves_alojadas FROM lotes WHERE id = :id"), {"id": lote_id}).mappings().first()
-            
-            df_metas = pd.DataFrame()
-            if lote_info and lote_info['linhagem']:
-                df_metas = pd.read_sql(text("SELECT * FROM metas_linhagem WHERE linhagem = :lin ORDER BY semana_idade"), conn, params={"lin": lote_info['linhagem']})
-
-        if df_prod.empty: return go.Figure(), go.Figure(), go.Figure(), go.Figure()
-
-        fig_peso = go.Figure()
-        fig_peso.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['peso_medio'], name='Peso Real', mode='lines+markers'))
-        if not df_metas.empty: fig_peso.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['peso_medio_g'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
-        fig_peso.update_layout(title_text="Peso Médio (g) vs. Padrão", template='plotly_white', legend_title_text='Legenda')
-
-        df_prod['mort_acum'] = df_prod['mort_total'].cumsum()
-        df_prod['mort_acum_pct'] = (df_prod['mort_acum'] / lote_info['aves_alojadas']) * 100
-        fig_mort = go.Figure()
-        fig_mort.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['mort_acum_pct'], name='Mortalidade Real', mode='lines+markers'))
-        if not df_metas.empty: fig_mort.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['mortalidade_acum_pct'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
-        fig_mort.update_layout(title_text="Mortalidade Acumulada (%) vs. Padrão", yaxis_title="%", template='plotly_white', legend_title_text='Legenda')
-
-        df_prod['consumo_acum_real'] = (df_prod['consumo_real_ave_dia'] * 7).cumsum()
-        fig_cons = go.Figure()
-        fig_cons.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['consumo_acum_real'], name='Consumo Acum. Real', mode='lines+markers'))
-        if not df_metas.empty: fig_cons.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['consumo_acum_g'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
-        fig_cons.update_layout(title_text="Consumo Acumulado por Ave (g) vs. Padrão", template='plotly_white', legend_title_text='Legenda')
-        
-        df_prod['ganho_de_peso'] = df_prod['peso_medio'].diff().fillna(df_prod['peso_medio'])
-        df_prod['consumo_semanal'] = df_prod['consumo_real_ave_dia'] * 7
-        df_prod.loc[df_prod['ganho_de_peso'] <= 0, 'conv_alimentar'] = pd.NA
-        df_prod.loc[df_prod['ganho_de_peso'] > 0, 'conv_alimentar'] = df_prod['consumo_semanal'] / df_prod['ganho_de_peso']
-        fig_ca = px.line(df_prod.dropna(subset=['conv_alimentar']), x='semana_idade', y='conv_alimentar', title="Conversão Alimentar Semanal", template='plotly_white', markers=True)
-        
-        return fig_peso, fig_mort, fig_cons, fig_ca
+            df = fetch_farm_kpis(conn)
+
+        if df.empty:
+            return dbc.Alert("Nenhum lote ativo.", color="info"), go.Figure(), ""
+
+        def card(titulo, valor, cor="primary"):
+            return dbc.Col(dbc.Card(dbc.CardBody([
+                html.Small(titulo, className="text-muted"),
+                html.H4(valor, className=f"text-{cor} mb-0")
+            ])), xs=6, md=3, className="mb-2")
+
+        margem_total = df['margem'].sum()
+        cards = dbc.Row([
+            card("Lotes ativos", f"{len(df)}"),
+            card("Aves atuais", f"{int(df['aves_atuais'].sum()):,}".replace(",", ".")),
+            card("Mortalidade média (%)", f"{df['mort_pct'].mean():.2f}"),
+            card("Margem total", f"R$ {margem_total:,.2f}", "success" if margem_total >= 0 else "danger"),
+        ])
+
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=df['identificador_lote'], y=df['mort_pct'], name='Mortalidade Real (%)'))
+        fig.add_trace(go.Scatter(x=df['identificador_lote'], y=df['mort_padrao_pct'], name='Padrão (%)',
+                                 mode='markers', marker=dict(color='red', symbol='line-ew-open', size=18)))
+        fig.update_layout(title_text="Mortalidade Acumulada por Lote vs. Padrão", template='plotly_white', legend_title_text='Legenda')
+
+        tabela = df[['identificador_lote', 'linhagem', 'aviario_alocado', 'ultima_semana', 'aves_atuais',
+                     'mort_pct', 'mort_padrao_pct', 'ultimo_peso_medio', 'peso_vs_padrao_pct',
+                     'conv_alimentar', 'taxa_postura_pct', 'margem']].round(2)
+        tabela.columns = ['Lote', 'Linhagem', 'Aviário', 'Semana', 'Aves', 'Mort. (%)', 'Mort. Padrão (%)',
+                          'Peso (g)', 'Peso vs Padrão (%)', 'CA', 'Postura 7d (%)', 'Margem (R$)']
+        table = dash_table.DataTable(
+            columns=[{"name": c, "id": c} for c in tabela.columns],
+            data=tabela.to_dict('records'),
+            sort_action="native",
+            filter_action="native",
+            page_size=25,
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'center', 'padding': '5px'},
+            style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'},
+            style_data_conditional=[
+                {'if': {'filter_query': '{Margem (R$)} < 0', 'column_id': 'Margem (R$)'}, 'color': 'darkred', 'fontWeight': 'bold'},
+                {'if': {'filter_query': '{Peso vs Padrão (%)} < -5', 'column_id': 'Peso vs Padrão (%)'}, 'color': 'darkred', 'fontWeight': 'bold'},
+            ]
+        )
+        return cards, fig, table
 
     # --- CALLBACKS FINANCEIROS ---
     @app.callback(
@@ -218,11 +264,12 @@ def register_callbacks(app):
     )
     def insert_custo(n, lote_id, data, tipo, desc, valor):
         if not all([lote_id, data, tipo, valor]): return dbc.Alert("Todos os campos de custo são obrigatórios.", color="warning")
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 q = text("INSERT INTO custos_lote (lote_id, data, tipo_custo, descricao, valor) VALUES (:l, :d, :t, :desc, :v)")
                 conn.execute(q, {"l": lote_id, "d": data, "t": tipo, "desc": desc, "v": valor})
+                lot_summary.add_cost(conn, lote_id, valor)
             return dbc.Alert("Custo registrado!", color="success")
         except Exception as e: return dbc.Alert(f"Erro: {e}", color="danger")
 
@@ -235,11 +282,12 @@ def register_callbacks(app):
     )
     def insert_receita(n, lote_id, data, tipo, desc, valor):
         if not all([lote_id, data, tipo, valor]): return dbc.Alert("Todos os campos de receita são obrigatórios.", color="warning")
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 q = text("INSERT INTO receitas_lote (lote_id, data, tipo_receita, descricao, valor) VALUES (:l, :d, :t, :desc, :v)")
                 conn.execute(q, {"l": lote_id, "d": data, "t": tipo, "desc": desc, "v": valor})
+                lot_summary.add_revenue(conn, lote_id, valor)
             return dbc.Alert("Receita registrada!", color="success")
         except Exception as e: return dbc.Alert(f"Erro: {e}", color="danger")
 
@@ -249,10 +297,11 @@ def register_callbacks(app):
     )
     def update_financeiro_resumo(lote_id, n1, n2):
         if not lote_id: return "Selecione um lote para ver o resumo financeiro."
-        engine = get_engine()
+        engine = shared_engine()
         with engine.connect() as conn:
-            total_custos = conn.execute(text("SELECT COALESCE(SUM(valor), 0) FROM custos_lote WHERE lote_id = :id"), {"id": lote_id}).scalar()
-            total_receitas = conn.execute(text("SELECT COALESCE(SUM(valor), 0) FROM receitas_lote WHERE lote_id = :id"), {"id": lote_id}).scalar()
+            snapshot = get_lot_snapshot(conn, lote_id) or {}
+        total_custos = snapshot.get('total_custos', 0)
+        total_receitas = snapshot.get('total_receitas', 0)
 
         saldo = total_receitas - total_custos
         cor_saldo = "success" if saldo >= 0 else "danger"
@@ -281,22 +330,42 @@ def register_callbacks(app):
     )
     def save_new_meta(n_clicks, linhagem, semana, peso, c_dia, c_acum, m_acum):
         if not all([linhagem, semana]): return dbc.Alert("Linhagem e Semana são campos obrigatórios.", color="warning")
-        
-        engine = get_engine()
+
+        # Mesmo upsert da importação em lote (chave única linhagem + semana)
+        linha = pd.DataFrame([{"linhagem": linhagem, "semana_idade": int(semana), "peso_medio_g": peso,
+                               "consumo_ave_dia_g": c_dia, "consumo_acum_g": c_acum, "mortalidade_acum_pct": m_acum}])
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
-                q_check = text("SELECT id FROM metas_linhagem WHERE linhagem = :lin AND semana_idade = :sem")
-                existing = conn.execute(q_check, {"lin": linhagem, "sem": semana}).scalar()
-                
-                if existing:
-                    q_update = text("UPDATE metas_linhagem SET peso_medio_g = :peso, consumo_ave_dia_g = :c_dia, consumo_acum_g = :c_acum, mortalidade_acum_pct = :m_acum WHERE id = :id")
-                    conn.execute(q_update, {"peso": peso, "c_dia": c_dia, "c_acum": c_acum, "m_acum": m_acum, "id": existing})
-                    return dbc.Alert(f"Padrão para '{linhagem}' - Semana {semana} atualizado!", color="info")
-                else:
-                    q_insert = text("INSERT INTO metas_linhagem (linhagem, semana_idade, peso_medio_g, consumo_ave_dia_g, consumo_acum_g, mortalidade_acum_pct) VALUES (:lin, :sem, :peso, :c_dia, :c_acum, :m_acum)")
-                    conn.execute(q_insert, {"lin": linhagem, "sem": semana, "peso": peso, "c_dia": c_dia, "c_acum": c_acum, "m_acum": m_acum})
-                    return dbc.Alert("Novo padrão salvo com sucesso!", color="success")
+                contagem = upsert_curves(conn, linha)
         except Exception as e: return dbc.Alert(f"Erro ao salvar o padrão: {e}", color="danger")
+        # Depois do commit: os gráficos em cache passam a usar a nova versão das metas
+        local_store.bump(METAS_VERSION_KEY)
+        standards.invalidate()
+        if contagem["inseridos"]:
+            return dbc.Alert("Novo padrão salvo com sucesso!", color="success")
+        return dbc.Alert(f"Padrão para '{linhagem}' - Semana {semana} atualizado!", color="info")
+
+    # Importação da curva inteira (CSV/XLSX) num único upsert multi-linha
+    @app.callback(
+        Output("meta-submit-status", "children", allow_duplicate=True),
+        Input("metas-upload", "contents"),
+        [State("metas-upload", "filename"), State("meta-linhagem", "value")],
+        prevent_initial_call=True
+    )
+    def import_metas_file(contents, filename, linhagem):
+        if not contents: raise PreventUpdate
+        try:
+            data = base64.b64decode(contents.split(",", 1)[1])
+            r = import_curves(shared_engine(), data, filename or "", linhagem)
+        except CurveFileError as e:
+            return dbc.Alert([html.B(f"Arquivo {filename} inválido:"), html.Ul([html.Li(m) for m in e.erros[:15]])],
+                             color="danger")
+        except Exception as e: return dbc.Alert(f"Erro ao importar a curva: {e}", color="danger")
+        return dbc.Alert(
+            f"{r['linhas']} semana(s) de {', '.join(r['linhagens'])}: {r['inseridos']} inserida(s), "
+            f"{r['atualizados']} atualizada(s), {r['inalterados']} inalterada(s) em {r['segundos']} s.",
+            color="success")
 
     @app.callback(
         Output("metas-table-div", "children"),
@@ -304,15 +373,13 @@ def register_callbacks(app):
          Input("meta-submit-status", "children")]
     )
     def update_metas_table(selected_linhagem, status):
-        query = "SELECT id, linhagem, semana_idade as 'Semana', peso_medio_g as 'Peso (g)', consumo_ave_dia_g as 'Consumo Dia (g)', consumo_acum_g as 'Consumo Acum (g)', mortalidade_acum_pct as 'Mort. Acum (%)' FROM metas_linhagem"
-        params = {}
+        # Tabela completa já em memória (standards.py), recarregada quando as metas mudam
+        df = get_standards().rows
         if selected_linhagem:
-            query += " WHERE linhagem = :lin"
-            params = {"lin": selected_linhagem}
-        query += " ORDER BY linhagem, semana_idade"
-        
-        engine = get_engine()
-        df = pd.read_sql(text(query), engine, params=params)
+            df = df[df['linhagem'] == selected_linhagem]
+        df = df.astype({'linhagem': str}).round(3).rename(columns={
+            'semana_idade': 'Semana', 'peso_medio_g': 'Peso (g)', 'consumo_ave_dia_g': 'Consumo Dia (g)',
+            'consumo_acum_g': 'Consumo Acum (g)', 'mortalidade_acum_pct': 'Mort. Acum (%)'})
         
         return dash_table.DataTable(
             id='metas-table',
@@ -338,10 +405,12 @@ def register_callbacks(app):
 
         if not deleted_id: return dbc.Alert("ID da linha não encontrado.", color="danger")
             
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 conn.execute(text("DELETE FROM metas_linhagem WHERE id = :id"), {"id": deleted_id})
+            local_store.bump(METAS_VERSION_KEY)
+            standards.invalidate()
             return dbc.Alert(f"Padrão ID {deleted_id} removido.", color="warning")
         except Exception as e: return dbc.Alert(f"Erro ao remover padrão: {e}", color="danger")
 
@@ -366,7 +435,7 @@ def register_callbacks(app):
         if not all([lote_id, data, total_ovos is not None]):
             return dbc.Alert("Lote, data e total de ovos são obrigatórios.", color="warning")
 
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 q = text("""
@@ -380,6 +449,8 @@ def register_callbacks(app):
                     "quebrados": ovos_quebrados
                 }
                 conn.execute(q, params)
+                add_daily_production(conn, lote_id, data, total_ovos, ovos_quebrados)
+                lot_summary.add_eggs(conn, lote_id, total_ovos, ovos_quebrados)
             return dbc.Alert("Dados de produção inseridos com sucesso!", color="success")
         except Exception as e:
             return dbc.Alert(f"Erro ao inserir dados: {e}", color="danger")
@@ -394,19 +465,19 @@ def register_callbacks(app):
         if not lote_id:
             return ""
 
-        engine = get_engine()
-        query = text("""
+        engine = shared_engine()
+        mes = current_month()
+        query = text(f"""
             SELECT
                 DATE_FORMAT(data_producao, '%d/%m/%Y') as 'Data',
                 total_ovos as 'Total de Ovos',
                 ovos_quebrados as 'Ovos Quebrados'
             FROM producao_ovos
             WHERE lote_id = :lote_id
-            AND MONTH(data_producao) = MONTH(CURDATE())
-            AND YEAR(data_producao) = YEAR(CURDATE())
+            AND {mes.clause('data_producao')}
             ORDER BY data_producao DESC
         """)
-        df = pd.read_sql(query, engine, params={"lote_id": lote_id})
+        df = pd.read_sql(query, engine, params={"lote_id": lote_id, **mes.params()})
 
         if df.empty:
             return dbc.Alert("Nenhum dado de produção encontrado para este mês.", color="info")
@@ -426,31 +497,17 @@ def register_callbacks(app):
         if not lote_id:
             return ""
 
-        engine = get_engine()
-
-        query = text("""
-            SELECT 
-                DATE_FORMAT(data_producao, '%m') as mes_num,
-                DATE_FORMAT(data_producao, '%Y') as ano,
-                MONTHNAME(data_producao) as mes_nome,
-                SUM(total_ovos) as total_ovos,
-                SUM(ovos_quebrados) as total_quebrados
-            FROM producao_ovos
-            WHERE lote_id = :lote_id
-            AND data_producao < DATE_FORMAT(CURDATE(), '%Y-%m-01')  -- Exclui mês atual
-            AND data_producao >= DATE_SUB(DATE_FORMAT(CURDATE(), '%Y-%m-01'), INTERVAL 3 MONTH)
-            GROUP BY mes_nome, ano
-            ORDER BY ano DESC, mes_num DESC
-            LIMIT 3
-        """)
-        df = pd.read_sql(query, engine, params={"lote_id": lote_id})
+        engine = shared_engine()
+        with engine.connect() as conn:
+            # Lê o resumo pré-agregado (producao_ovos_mensal), excluindo o mês atual
+            df = fetch_monthly(conn, lote_id, previous_months(3))
 
         if df.empty:
             return dbc.Alert("Sem dados dos meses anteriores.", color="info")
 
         # Formatar mês: "Janeiro/2025"
-        df['Mês'] = df.apply(lambda row: f"{row['mes_nome'].capitalize()}/{row['ano']}", axis=1)
-        df = df[['Mês', 'total_ovos', 'total_quebrados']]
+        df['Mês'] = [month_label(a, m) for a, m in zip(df['ano'], df['mes'])]
+        df = df[['Mês', 'total_ovos', 'ovos_quebrados']]
         df.columns = ['Mês', 'Total de Ovos', 'Ovos Quebrados']
 
         return dash_table.DataTable(
@@ -494,7 +551,7 @@ def register_callbacks(app):
         if not (lote_id and medicacao):
             return dbc.Alert("Lote (Onde) e Medicação (O Quê) são obrigatórios.", color="warning")
 
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 q = text("""
@@ -529,7 +586,7 @@ def register_callbacks(app):
         if not lote_id:
             return ""
 
-        engine = get_engine()
+        engine = shared_engine()
         query = text("""
             SELECT 
                 DATE_FORMAT(data_inicio, '%d/%m/%Y') as 'Início',
@@ -590,7 +647,7 @@ def register_callbacks(app):
             return dbc.Alert("Lote, data e pH são obrigatórios.", color="warning")
 
         alc_ppm = alc_ppm or 0
-        engine = get_engine()
+        engine = shared_engine()
         try:
             with engine.begin() as conn:
                 # MySQL UPSERT via UNIQUE (lote_id, data_medicao)
@@ -614,18 +671,20 @@ def register_callbacks(app):
         if not lote_id:
             return go.Figure(), ""
 
-        engine = get_engine()
+        engine = shared_engine()
         # últimos 30 dias
-        query = text("""
+        periodo = last_days(30)
+        query = text(f"""
             SELECT data_medicao, ph, alcalinidade_ppm
             FROM qualidade_agua
             WHERE lote_id = :l
-              AND data_medicao >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+              AND {periodo.clause('data_medicao')}
             ORDER BY data_medicao
         """)
-        df = pd.read_sql(query, engine, params={"l": lote_id})
+        df = pd.read_sql(query, engine, params={"l": lote_id, **periodo.params()})
 
         # Gráfico com 2 eixos (pH e Alcalinidade)
+        from plotly.subplots import make_subplots
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         if not df.empty:
             df["data_medicao"] = pd.to_datetime(df["data_medicao"])
@@ -673,407 +732,144 @@ def register_callbacks(app):
 
     # Habilita o botão quando um lote for escolhido
     @app.callback(
-        Output("btn-generate-report", "disabled"),
+        [Output("btn-generate-report", "disabled"),
+         Output("btn-preview-report", "disabled")],
         Input("dropdown-lote-report", "value")
     )
     def toggle_report_button(lote_id):
-        return not bool(lote_id)
+        return not bool(lote_id), not bool(lote_id)
 
-    # Gera PDF completo (produção, mortalidade, financeiro, QR, rodapé)
+    # Pré-visualização: o mesmo HTML do PDF, exibido num iframe
+    @app.callback(
+        Output("report-preview", "children"),
+        Input("btn-preview-report", "n_clicks"),
+        State("dropdown-lote-report", "value"),
+        prevent_initial_call=True
+    )
+    def preview_report(n_clicks, lote_id):
+        if not lote_id:
+            raise PreventUpdate
+        try:
+            html_content = build_report_html(lote_id)
+        except Exception as e:
+            print(f"[Relatórios] ERRO na pré-visualização: {e}")
+            return dbc.Alert(f"Erro ao montar a pré-visualização: {e}", color="danger")
+        return html.Iframe(srcDoc=html_content, style={"width": "100%", "height": "80vh", "border": "1px solid #ccc"})
+
+    # Gera PDF completo (produção, mortalidade, financeiro, QR, rodapé) num callback em
+    # background: a barra acompanha as etapas e o botão "Cancelar" encerra o processo.
+    # O PDF vem do cache de relatórios quando os dados do lote não mudaram, e pedidos
+    # simultâneos do mesmo lote (em qualquer worker) geram o arquivo uma vez só.
     @app.callback(
-        Output("download-pdf-report", "data"),
+        [Output("report-generation-status", "children", allow_duplicate=True),
+         Output("download-pdf-report", "data", allow_duplicate=True)],
         Input("btn-generate-report", "n_clicks"),
         State("dropdown-lote-report", "value"),
+        background=True,
+        running=[(Output("btn-cancel-report", "disabled"), False, True)],
+        cancel=[Input("btn-cancel-report", "n_clicks")],
+        progress=[Output("report-pdf-progress", "value"), Output("report-pdf-progress", "label")],
         prevent_initial_call=True
     )
-    def gerar_pdf_completo(n_clicks, lote_id):
+    def gerar_pdf_completo(set_progress, n_clicks, lote_id):
         if not lote_id:
             raise PreventUpdate
+        set_progress((0, ""))
+        progress = lambda pct, msg: set_progress((pct, f"{pct}% — {msg}"))
+        try:
+            pdf_path = cached_report_pdf(lote_id, progress=progress)
+        except Exception as e:
+            print(f"[Relatórios] ERRO ao gerar PDF: {e}")
+            return dbc.Alert(f"Erro ao gerar o relatório: {e}", color="danger"), dash.no_update
+        set_progress((100, "100%"))
+        return dbc.Alert("Relatório gerado!", color="success"), \
+            dcc.send_file(pdf_path, filename=f"relatorio_lote_{lote_id}.pdf")
 
+    # Exportação de vários lotes (ZIP ou PDF único): job na fila + polling do progresso
+    @app.callback(
+        [Output("report-job-id", "data"),
+         Output("report-job-interval", "disabled"),
+         Output("report-generation-status", "children")],
+        Input("btn-export-batch", "n_clicks"),
+        [State("dropdown-lotes-batch", "value"),
+         State("batch-formato", "value")],
+        prevent_initial_call=True
+    )
+    def exportar_lotes(n_clicks, lote_ids, formato):
+        if not n_clicks:
+            raise PreventUpdate
         try:
-            # ---------------------------------------
-            # (0) Período do relatório: últimos 180d
-            # ---------------------------------------
-            hoje = datetime.now().date()
-            inicio_periodo = hoje - timedelta(days=180)
-
-            # ---------------------------
-            # (1) BUSCAS NO BANCO (180d)
-            # ---------------------------
-            engine = get_engine()
-            with engine.connect() as conn:
-                # Info do lote
-                lote_info = conn.execute(text("""
-                    SELECT identificador_lote, linhagem, data_alojamento, aves_alojadas 
-                    FROM lotes WHERE id = :id
-                """), {"id": lote_id}).mappings().first()
-
-                # Produção de ovos (últimos 180 dias)
-                df_prod_ovos = pd.read_sql(
-                    text("""
-                        SELECT data_producao, total_ovos, ovos_quebrados
-                        FROM producao_ovos
-                        WHERE lote_id = :id
-                          AND data_producao >= :inicio
-                        ORDER BY data_producao DESC
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-
-                # Mortalidade / desempenho semanal (filtra pela data de pesagem)
-                df_sem = pd.read_sql(
-                    text("""
-                        SELECT semana_idade, aves_na_semana, 
-                               mort_d1, mort_d2, mort_d3, mort_d4, mort_d5, mort_d6, mort_d7, mort_total,
-                               data_pesagem, peso_medio, consumo_real_ave_dia
-                        FROM producao_aves
-                        WHERE lote_id = :id
-                          AND data_pesagem >= :inicio
-                        ORDER BY semana_idade
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-
-                # Tratamentos (qualquer início ou término no período)
-                df_trat = pd.read_sql(
-                    text("""
-                        SELECT data_inicio, data_termino, medicacao, forma_admin, 
-                               periodo_carencia_dias, motivacao, responsavel, custo_estimado
-                        FROM tratamentos
-                        WHERE lote_id = :id
-                          AND (data_inicio >= :inicio OR data_termino >= :inicio)
-                        ORDER BY data_inicio DESC
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-
-                # 💧 Qualidade da Água (últimos 180 dias)
-                df_agua = pd.read_sql(
-                    text("""
-                        SELECT data_medicao, ph, alcalinidade_ppm
-                        FROM qualidade_agua
-                        WHERE lote_id = :id
-                          AND data_medicao >= :inicio
-                        ORDER BY data_medicao DESC
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-
-                # Financeiro (custos e receitas no período, + agregados)
-                df_custos = pd.read_sql(
-                    text("""
-                        SELECT data, tipo_custo AS tipo, descricao, valor
-                        FROM custos_lote
-                        WHERE lote_id = :id
-                          AND data >= :inicio
-                        ORDER BY data DESC
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-                df_receitas = pd.read_sql(
-                    text("""
-                        SELECT data, tipo_receita AS tipo, descricao, valor
-                        FROM receitas_lote
-                        WHERE lote_id = :id
-                          AND data >= :inicio
-                        ORDER BY data DESC
-                    """),
-                    conn, params={"id": lote_id, "inicio": inicio_periodo}
-                )
-                total_custos = conn.execute(text(
-                    "SELECT COALESCE(SUM(valor),0) FROM custos_lote WHERE lote_id = :id AND data >= :inicio"
-                ), {"id": lote_id, "inicio": inicio_periodo}).scalar() or 0.0
-                total_receitas = conn.execute(text(
-                    "SELECT COALESCE(SUM(valor),0) FROM receitas_lote WHERE lote_id = :id AND data >= :inicio"
-                ), {"id": lote_id, "inicio": inicio_periodo}).scalar() or 0.0
-
-            saldo = float(total_receitas) - float(total_custos)
-
-            # ---------------------------
-            # (2) QR CODE (com rota pública)
-            # ---------------------------
-            base_url = "http://nancy.ifrn.edu.br/"
-            lote_url = f"{base_url.rstrip('/')}/public/lote/{lote_id}"  # ✅ ROTA PÚBLICA
-            qr_img_b64 = ""
-            try:
-                import qrcode
-                from io import BytesIO
-                qr = qrcode.QRCode(version=1, box_size=6, border=2)
-                qr.add_data(lote_url)
-                qr.make(fit=True)
-                img = qr.make_image(fill_color="black", back_color="white")
-                buf = BytesIO()
-                img.save(buf, format="PNG")
-                qr_img_b64 = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("utf-8")
-            except Exception:
-                qr_img_b64 = ""  # fallback: mostraremos a URL em texto
-
-            # ---------------------------
-            # (3) FUNÇÕES AUXILIARES
-            # ---------------------------
-            def fmt_date(dt):
-                if pd.isna(dt): return ""
-                if isinstance(dt, str): return dt
-                return pd.to_datetime(dt).strftime("%d/%m/%Y")
-
-            def truncate_text(texto, maxlen=120):
-                if texto is None: return ""
-                s = str(texto).strip()
-                return s if len(s) <= maxlen else s[:maxlen - 3] + "..."
-
-            # ---------------------------
-            # (4) TABELAS HTML
-            # ---------------------------
-            # Produção de ovos
-            prod_html_rows = ""
-            if not df_prod_ovos.empty:
-                for _, r in df_prod_ovos.sort_values("data_producao").iterrows():
-                    prod_html_rows += f"""
-                    <tr>
-                        <td>{fmt_date(r['data_producao'])}</td>
-                        <td style="text-align:right">{int(r['total_ovos'] or 0)}</td>
-                        <td style="text-align:right">{int(r['ovos_quebrados'] or 0)}</td>
-                    </tr>"""
-            else:
-                prod_html_rows = '<tr><td colspan="3" style="text-align:center">Sem registros</td></tr>'
-
-            prod_table_html = f"""
-            <table>
-                <thead><tr><th>Data</th><th>Total de Ovos</th><th>Ovos Quebrados</th></tr></thead>
-                <tbody>{prod_html_rows}</tbody>
-            </table>
-            """
-
-            # Mortalidade / desempenho
-            sem_html_rows = ""
-            if not df_sem.empty:
-                for _, r in df_sem.iterrows():
-                    sem_html_rows += f"""
-                    <tr>
-                        <td style="text-align:right">{int(r['semana_idade'] or 0)}</td>
-                        <td style="text-align:right">{int(r['aves_na_semana'] or 0)}</td>
-                        <td style="text-align:right">{int(r['mort_total'] or 0)}</td>
-                        <td>{fmt_date(r['data_pesagem'])}</td>
-                        <td style="text-align:right">{(r['peso_medio'] or 0):.2f}</td>
-                        <td style="text-align:right">{(r['consumo_real_ave_dia'] or 0):.2f}</td>
-                    </tr>"""
-            else:
-                sem_html_rows = '<tr><td colspan="6" style="text-align:center">Sem registros</td></tr>'
-
-            sem_table_html = f"""
-            <table>
-                <thead>
-                    <tr>
-                        <th>Semana</th><th>Aves</th><th>Mort. (sem)</th>
-                        <th>Data Pesagem</th><th>Peso Médio (g)</th><th>Consumo (g/ave/dia)</th>
-                    </tr>
-                </thead>
-                <tbody>{sem_html_rows}</tbody>
-            </table>
-            """
-
-            # Tratamentos (5W2H) - (MODIFICADO)
-            trat_html_rows = ""
-            if not df_trat.empty:
-                for _, r in df_trat.iterrows():
-                    trat_html_rows += f"""
-                    <tr>
-                        <td>{fmt_date(r['data_inicio'])}</td>
-                        <td>{fmt_date(r['data_termino'])}</td>
-                        <td>{r['medicacao'] or ''}</td>
-                        <td>{r['motivacao'] or ''}</td>
-                        <td>{r['responsavel'] or ''}</td>
-                        <td>{r['forma_admin'] or ''}</td>
-                        <td style="text-align:right">R$ {float(r['custo_estimado'] or 0):,.2f}</td>
-                    </tr>"""
-            else:
-                trat_html_rows = '<tr><td colspan="7" style="text-align:center">Sem registros de tratamento</td></tr>'
-
-            trat_table_html = f"""
-            <table>
-                <thead>
-                    <tr>
-                        <th>Início (Quando)</th>
-                        <th>Término (Quando)</th>
-                        <th>O Quê (Medicação)</th>
-                        <th>Por Quê (Motivação)</th>
-                        <th>Quem (Responsável)</th>
-                        <th>Como (Admin.)</th>
-                        <th>Quanto (Custo R$)</th>
-                    </tr>
-                </thead>
-                <tbody>{trat_html_rows}</tbody>
-            </table>
-            """
-
-            # 💧 Qualidade da Água — tabela
-            agua_html_rows = ""
-            if not df_agua.empty:
-                for _, r in df_agua.iterrows():
-                    ph_val = 0.0 if pd.isna(r['ph']) else float(r['ph'])
-                    alc_val = 0 if pd.isna(r['alcalinidade_ppm']) else int(r['alcalinidade_ppm'])
-                    agua_html_rows += f"""
-                    <tr>
-                        <td>{fmt_date(r['data_medicao'])}</td>
-                        <td style="text-align:right">{ph_val:.2f}</td>
-                        <td style="text-align:right">{alc_val}</td>
-                    </tr>
-                    """
-            else:
-                agua_html_rows = '<tr><td colspan="3" style="text-align:center">Sem registros de qualidade da água nos últimos 180 dias.</td></tr>'
-
-            agua_table_html = f"""
-            <table>
-                <thead>
-                    <tr>
-                        <th>Data</th>
-                        <th>pH</th>
-                        <th>Alcalinidade (ppm)</th>
-                    </tr>
-                </thead>
-                <tbody>{agua_html_rows}</tbody>
-            </table>
-            """
-
-            # Financeiro – custos e receitas
-            def table_from(df, headers):
-                if df.empty:
-                    return f'<table><thead><tr>{"".join(f"<th>{h}</th>" for h in headers)}</tr></thead><tbody><tr><td colspan="{len(headers)}" style="text-align:center">Sem registros</td></tr></tbody></table>'
-                rows = ""
-                for _, r in df.iterrows():
-                    rows += f"""
-                    <tr>
-                        <td>{fmt_date(r['data'])}</td>
-                        <td>{r['tipo'] or ''}</td>
-                        <td>{truncate_text(r['descricao'])}</td>
-                        <td style="text-align:right">R$ {float(r['valor'] or 0):,.2f}</td>
-                    </tr>"""
-                return f"""
-                <table>
-                    <thead><tr>{"".join(f"<th>{h}</th>" for h in headers)}</tr></thead>
-                    <tbody>{rows}</tbody>
-                </table>
-                """
-
-            custos_table_html = table_from(df_custos, ["Data", "Tipo", "Descrição", "Valor"])
-            receitas_table_html = table_from(df_receitas, ["Data", "Tipo", "Descrição", "Valor"])
-
-            resumo_fin_html = f"""
-            <table>
-                <thead><tr><th>Total de Custos</th><th>Total de Receitas</th><th>Saldo</th></tr></thead>
-                <tbody>
-                    <tr>
-                        <td style="text-align:right;color:#b00020">R$ {float(total_custos):,.2f}</td>
-                        <td style="text-align:right;color:#006400">R$ {float(total_receitas):,.2f}</td>
-                        <td style="text-align:right;font-weight:bold">{'R$ ' + format(float(saldo), ',.2f')}</td>
-                    </tr>
-                </tbody>
-            </table>
-            """
-
-            # ---------------------------
-            # (5) HTML FINAL DO PDF
-            # ---------------------------
-            proprietaria = "Rosilene Duarte de Lima"
-            cpf = "566.408.974-15"
-            responsavel_tecnico = "Ernesto Guevara"
-            agora_str = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-            # QR (ou URL em destaque)
-            qr_block = f'<img src="{qr_img_b64}" style="width:160px;height:160px" />' if qr_img_b64 else f"""
-                <div style="border:1px dashed #888; padding:10px; font-size:12px">
-                    Acesse o painel do lote:<br><b>{lote_url}</b>
-                </div>
-            """
-
-            html_content = f"""
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <style>
-                    @page {{
-                        size: A4;                 /* RETRATO */
-                        margin: 12mm;
-                        @bottom-right {{
-                            content: "Página " counter(page) " de " counter(pages) " — Gerado automaticamente pelo Sistema de Gestão Avícola - IFRN | {agora_str} | Últimos 180 dias";
-                            font-size: 10px;
-                            color: #666;
-                        }}
-                    }}
-                    body {{ font-family: Arial, sans-serif; font-size: 12px; color: #111; }}
-                    h1 {{ text-align: center; margin: 0 0 6px 0; }}
-                    h2 {{ margin: 16px 0 6px 0; }}
-                    table {{ width: 100%; border-collapse: collapse; margin: 6px 0 12px 0; }}
-                    th, td {{ border: 1px solid #333; padding: 6px; text-align: left; }}
-                    thead th {{ background: #efefef; }}
-                    .header {{
-                        border-bottom: 2px solid #333; padding-bottom: 6px; margin-bottom: 10px;
-                        display: flex; justify-content: space-between; align-items: flex-start;
-                    }}
-                    .owner-box {{ border: 1px solid #555; padding: 8px; margin: 8px 0; background: #f8f8f8; }}
-                    .id-box {{
-                        border: 1px solid #333; padding: 8px; margin: 6px 0;
-                        display: grid; grid-template-columns: 1fr 1fr; gap: 4px;
-                    }}
-                    .qr {{ border: 1px solid #aaa; padding: 8px; display: inline-block; margin-top: 4px; }}
-                    .period-note {{ font-size: 11px; color: #666; margin-top: 4px; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <div>
-                        <h1>Relatório do Lote {lote_info['identificador_lote']}</h1>
-                        <div style="font-size:12px;color:#333;">Painel: {lote_url}</div>
-                        <div class="period-note">
-                            Período incluído neste relatório: últimos 180 dias (a partir de {inicio_periodo.strftime("%d/%m/%Y")})
-                        </div>
-                    </div>
-                    <div class="qr">{qr_block}</div>
-                </div>
-
-                <div class="owner-box">
-                    <b>Proprietária:</b> {proprietaria} &nbsp; | &nbsp; <b>CPF:</b> {cpf}<br>
-                    <b>Responsável Técnico:</b> {responsavel_tecnico}
-                </div>
-
-                <div class="id-box">
-                    <div><b>Linhagem:</b> {lote_info['linhagem'] or ''}</div>
-                    <div><b>Data de Alojamento:</b> {lote_info['data_alojamento']}</div>
-                    <div><b>Aves Alojadas:</b> {lote_info['aves_alojadas']}</div>
-                    <div><b>ID Interno:</b> {lote_id}</div>
-                </div>
-
-                <h2>Produção de Ovos (últimos 180 dias)</h2>
-                {prod_table_html}
-
-                <h2>Mortalidade & Desempenho Semanal</h2>
-                {sem_table_html}
-
-                <h2>🩺 Plano de Ação 5W2H (Tratamentos)</h2>
-                {trat_table_html}
-
-                <h2>💧 Qualidade da Água (últimos 180 dias)</h2>
-                {agua_table_html}
-
-                <h2>Financeiro — Custos</h2>
-                {custos_table_html}
-
-                <h2>Financeiro — Receitas</h2>
-                {receitas_table_html}
-
-                <h2>Resumo Financeiro</h2>
-                {resumo_fin_html}
-            </body>
-            </html>
-            """
-
-            # ---------------------------
-            # (6) GERA E ENVIA O PDF
-            # ---------------------------
-            pdf_path = f"/tmp/relatorio_lote_{lote_id}.pdf"
-            HTML(string=html_content).write_pdf(pdf_path)
-            return dcc.send_file(pdf_path)
+            job = submit_batch(lote_ids or None, formato)
+        except Exception as e:
+            print(f"[Relatórios] ERRO ao enfileirar exportação: {e}")
+            return None, True, dbc.Alert(f"Erro ao iniciar a exportação: {e}", color="danger")
+        return {"job_id": job["id"], "filename": f"relatorios_lotes.{formato}"}, False, "Exportação na fila..."
 
+    @app.callback(
+        [Output("report-progress", "value"),
+         Output("report-progress", "label"),
+         Output("report-generation-status", "children", allow_duplicate=True),
+         Output("report-job-interval", "disabled", allow_duplicate=True),
+         Output("download-pdf-report", "data")],
+        Input("report-job-interval", "n_intervals"),
+        State("report-job-id", "data"),
+        prevent_initial_call=True
+    )
+    def poll_report_job(n_intervals, job):
+        if not job:
+            raise PreventUpdate
+        info = get_job(job["job_id"])
+        if info is None:
+            return 0, "", dbc.Alert("Job de relatório não encontrado.", color="danger"), True, dash.no_update
+
+        pct = int(info["progresso"] or 0)
+        if info["status"] == "concluido":
+            return 100, "100%", dbc.Alert("Relatório gerado!", color="success"), True, \
+                dcc.send_file(info["arquivo"], filename=job["filename"])
+        if info["status"] == "erro":
+            print(f"[Relatórios] ERRO ao gerar PDF: {info['mensagem']}")
+            return pct, f"{pct}%", dbc.Alert(f"Erro ao gerar o relatório: {info['mensagem']}", color="danger"), True, dash.no_update
+        return pct, f"{pct}%", info["mensagem"] or "Gerando relatório...", False, dash.no_update
+
+    # ==========================================================
+    # === SEÇÃO: PÁGINA PÚBLICA DO LOTE (QR CODE, SEM LOGIN) ===
+    # ==========================================================
+
+    # Tudo sai de um único dict em cache por lote (public_lot.get_public_view):
+    # rajadas de acessos ao mesmo lote não viram rajadas de consultas.
+    @app.callback(
+        [Output("public-graph-producao", "figure"),
+         Output("public-table-producao", "children"),
+         Output("public-graph-mortalidade", "figure"),
+         Output("public-table-trat", "children")],
+        Input("public-store-lote-id", "data")
+    )
+    def update_public_lote(lote_id):
+        if not lote_id:
+            raise PreventUpdate
+        try:
+            view = get_public_view(lote_id)
         except Exception as e:
-            print(f"[Relatórios] ERRO ao gerar PDF: {e}")
-            return dash.no_update
+            print(f"[Público] ERRO ao carregar lote {lote_id}: {e}")
+            erro = dbc.Alert("Não foi possível carregar os dados do lote.", color="danger")
+            return go.Figure(), erro, go.Figure(), erro
+        if view is None:
+            aviso = dbc.Alert("Lote não encontrado.", color="warning")
+            return go.Figure(), aviso, go.Figure(), aviso
+
+        def tabela(df, vazio):
+            if df.empty:
+                return dbc.Alert(vazio, color="info")
+            return dash_table.DataTable(
+                columns=[{"name": i, "id": i} for i in df.columns],
+                data=df.to_dict('records'),
+                page_size=10,
+                style_table={'overflowX': 'auto'},
+                style_cell={'textAlign': 'center', 'padding': '5px'},
+                style_header={'backgroundColor': 'lightgrey', 'fontWeight': 'bold'}
+            )
+
+        return (view["fig_producao"],
+                tabela(view["tabela_producao"], "Sem produção registrada nos últimos 180 dias."),
+                view["fig_mortalidade"],
+                tabela(view["tabela_tratamentos"], "Sem tratamentos nos últimos 180 dias."))
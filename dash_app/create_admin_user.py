@@ -1,11 +1,12 @@
 import getpass
-from user_management import create_initial_user, get_engine
+from user_management import create_initial_user
+from engines import shared_engine
 from db import init_db
 
 def main():
     print("--- Assistente de Criação de Usuário Administrador ---")
     
-    engine = get_engine()
+    engine = shared_engine()
     init_db(engine)
     
     try:
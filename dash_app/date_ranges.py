@@ -0,0 +1,82 @@
+"""
+Intervalos de datas para filtros "sargáveis".
+
+Filtros como `MONTH(data_producao) = MONTH(CURDATE())` aplicam uma função à
+coluna e impedem o uso de índices: o banco precisa ler todas as linhas do
+lote. Aqui os períodos são calculados em Python como intervalos semiabertos
+`[inicio, fim)` e a consulta compara a coluna diretamente:
+
+    rng = current_month()
+    sql = f"... WHERE lote_id = :id AND {rng.clause('data_producao')}"
+    conn.execute(text(sql), {"id": lote_id, **rng.params()})
+
+Com o índice (lote_id, data_producao) isso vira uma leitura por faixa.
+`fim=None` deixa o intervalo aberto à direita (`column >= :inicio`), como em
+`last_days`: registros com data futura (ex.: tratamentos agendados)
+continuam aparecendo, como no filtro original `>= CURDATE() - n`.
+"""
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+MESES_PT = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+            "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+
+class DateRange(NamedTuple):
+    """Intervalo semiaberto [inicio, fim); sem `fim`, [inicio, ∞)."""
+    inicio: date
+    fim: Optional[date] = None
+
+    def clause(self, column, prefix=""):
+        """Trecho SQL `column >= :inicio AND column < :fim` (parâmetros com `prefix`)."""
+        if self.fim is None:
+            return f"{column} >= :{prefix}inicio"
+        return f"{column} >= :{prefix}inicio AND {column} < :{prefix}fim"
+
+    def params(self, prefix=""):
+        if self.fim is None:
+            return {f"{prefix}inicio": self.inicio}
+        return {f"{prefix}inicio": self.inicio, f"{prefix}fim": self.fim}
+
+    def __contains__(self, day):
+        return self.inicio <= day and (self.fim is None or day < self.fim)
+
+
+def _today(today=None):
+    return today or date.today()
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    """Primeiro dia do mês deslocado `months` meses a partir do mês de `day`."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(day):
+    """Mês civil que contém `day`."""
+    inicio = month_start(day)
+    return DateRange(inicio, add_months(inicio, 1))
+
+
+def current_month(today=None):
+    return month_range(_today(today))
+
+
+def previous_months(n, today=None):
+    """Os `n` meses civis anteriores ao mês atual (o mês atual fica de fora)."""
+    fim = month_start(_today(today))
+    return DateRange(add_months(fim, -n), fim)
+
+
+def last_days(n, today=None):
+    """De `n` dias atrás em diante, sem limite superior (equivale a `>= CURDATE() - n`)."""
+    return DateRange(_today(today) - timedelta(days=n))
+
+
+def month_label(ano, mes):
+    """Ex.: (2025, 1) -> 'Janeiro/2025'."""
+    return f"{MESES_PT[int(mes) - 1]}/{int(ano)}"
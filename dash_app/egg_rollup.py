@@ -0,0 +1,107 @@
+"""
+Resumo mensal pré-agregado da produção de ovos (`producao_ovos_mensal`).
+
+O "Resumo Mensal" e o relatório em PDF somavam as linhas diárias de
+`producao_ovos` a cada abertura. Agora cada inserção diária atualiza, na
+mesma transação, a linha (lote, ano, mês) do resumo; as leituras mensais
+buscam poucas linhas em vez de milhares.
+
+Para montar o resumo a partir do histórico (ou corrigir divergências):
+    python egg_rollup.py backfill            # todos os lotes
+    python egg_rollup.py backfill --lote 12  # apenas um lote
+"""
+import argparse
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+
+def add_daily_production(conn, lote_id, data, total_ovos, ovos_quebrados):
+    """Soma um registro diário ao resumo do mês.
+
+    Deve ser chamada na mesma transação e DEPOIS do INSERT em
+    `producao_ovos`. `dias_registrados` não é incrementado: é recontado com
+    COUNT(DISTINCT data_producao) do mês, como em `rebuild`. O INSERT ...
+    SELECT faz leitura com lock no InnoDB, então duas transações gravando o
+    mesmo lote e dia ao mesmo tempo não contam o dia duas vezes (a segunda
+    espera a primeira e enxerga a linha dela).
+    """
+    conn.execute(text("""
+        INSERT INTO producao_ovos_mensal (lote_id, ano, mes, total_ovos, ovos_quebrados, dias_registrados)
+        SELECT :lote_id, YEAR(:data), MONTH(:data), COALESCE(:total, 0), COALESCE(:quebrados, 0),
+               COUNT(DISTINCT p.data_producao)
+        FROM producao_ovos p
+        WHERE p.lote_id = :lote_id
+          AND p.data_producao >= DATE_FORMAT(:data, '%Y-%m-01')
+          AND p.data_producao < DATE_FORMAT(:data, '%Y-%m-01') + INTERVAL 1 MONTH
+        ON DUPLICATE KEY UPDATE
+            total_ovos = total_ovos + VALUES(total_ovos),
+            ovos_quebrados = ovos_quebrados + VALUES(ovos_quebrados),
+            dias_registrados = VALUES(dias_registrados)
+    """), {"lote_id": lote_id, "data": data, "total": total_ovos, "quebrados": ovos_quebrados})
+
+
+def rebuild(conn, lote_id=None):
+    """Recalcula o resumo a partir de `producao_ovos` (todos os lotes ou um só)."""
+    filtro = "WHERE lote_id = :lote_id" if lote_id else ""
+    params = {"lote_id": lote_id} if lote_id else {}
+    conn.execute(text(f"DELETE FROM producao_ovos_mensal {filtro}"), params)
+    result = conn.execute(text(f"""
+        INSERT INTO producao_ovos_mensal (lote_id, ano, mes, total_ovos, ovos_quebrados, dias_registrados)
+        SELECT lote_id, YEAR(data_producao), MONTH(data_producao),
+               COALESCE(SUM(total_ovos), 0), COALESCE(SUM(ovos_quebrados), 0),
+               COUNT(DISTINCT data_producao)
+        FROM producao_ovos
+        {filtro}
+        GROUP BY lote_id, YEAR(data_producao), MONTH(data_producao)
+    """), params)
+    return result.rowcount
+
+
+def _month_filter(periodo):
+    if periodo is None:
+        return "", {}
+    return ("AND ano * 100 + mes >= :ini AND ano * 100 + mes < :fim",
+            {"ini": periodo.inicio.year * 100 + periodo.inicio.month,
+             "fim": periodo.fim.year * 100 + periodo.fim.month})
+
+
+def fetch_monthly(conn, lote_id, periodo=None):
+    """Resumo mensal de um lote (mais recente primeiro), opcionalmente limitado a um DateRange de meses."""
+    filtro, params = _month_filter(periodo)
+    return pd.read_sql(text(f"""
+        SELECT ano, mes, total_ovos, ovos_quebrados, dias_registrados
+        FROM producao_ovos_mensal
+        WHERE lote_id = :lote_id {filtro}
+        ORDER BY ano DESC, mes DESC
+    """), conn, params={"lote_id": lote_id, **params})
+
+
+def fetch_monthly_many(conn, lote_ids, periodo=None):
+    """Como `fetch_monthly`, para vários lotes de uma vez (com a coluna lote_id)."""
+    filtro, params = _month_filter(periodo)
+    sql = text(f"""
+        SELECT lote_id, ano, mes, total_ovos, ovos_quebrados, dias_registrados
+        FROM producao_ovos_mensal
+        WHERE lote_id IN :ids {filtro}
+        ORDER BY lote_id, ano DESC, mes DESC
+    """).bindparams(bindparam("ids", expanding=True))
+    return pd.read_sql(sql, conn, params={"ids": tuple(lote_ids), **params})
+
+
+def main():
+    from engines import shared_engine
+
+    parser = argparse.ArgumentParser(description="Manutenção do resumo mensal de produção de ovos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("backfill", help="Recalcula o resumo a partir do histórico diário.")
+    p.add_argument("--lote", type=int, help="ID do lote (padrão: todos).")
+    args = parser.parse_args()
+
+    with shared_engine().begin() as conn:
+        linhas = rebuild(conn, args.lote)
+    print(f"Resumo mensal recalculado: {linhas} linha(s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Registro de engines SQLAlchemy compartilhados por processo.
+
+Antes cada callback chamava `get_engine()` e criava um engine (e um pool)
+novo, pagando conexão TCP + autenticação no MariaDB a cada clique. Aqui
+mantemos UM engine por nome e por processo, com o pool configurável por
+variáveis de ambiente:
+
+    DB_POOL_SIZE      conexões mantidas abertas no pool   (padrão 5)
+    DB_MAX_OVERFLOW   conexões extras em picos            (padrão 5)
+    DB_POOL_RECYCLE   segundos até reciclar uma conexão   (padrão 1800)
+    DB_POOL_TIMEOUT   segundos esperando uma conexão livre (padrão 30)
+
+O registro é seguro para fork: quando o Gunicorn cria os workers, o
+processo filho descarta os engines herdados (sem fechar os sockets do
+processo pai) e cria os seus na primeira utilização.
+"""
+import os
+import threading
+
+from db import get_engine, get_database_url
+
+_lock = threading.Lock()
+_engines = {}          # nome -> Engine
+_owner_pid = os.getpid()
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def pool_settings():
+    """Parâmetros do pool lidos das variáveis de ambiente."""
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 5),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+    }
+
+
+def _forget_inherited_engines():
+    """Descarta engines herdados do processo pai sem fechar as conexões dele."""
+    global _owner_pid
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines.clear()
+    _owner_pid = os.getpid()
+
+
+def shared_engine(name="default", url=None):
+    """Retorna o engine compartilhado `name`, criando-o na primeira chamada.
+
+    `url` só é usada na criação; por padrão vem de DATABASE_URL.
+    """
+    if os.getpid() != _owner_pid:
+        with _lock:
+            if os.getpid() != _owner_pid:
+                _forget_inherited_engines()
+
+    engine = _engines.get(name)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = get_engine(url or get_database_url(), **pool_settings())
+                _engines[name] = engine
+    return engine
+
+
+def dispose_all():
+    """Fecha todos os pools deste processo (ex.: desligamento ou testes)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def pool_stats():
+    """Estatísticas dos pools deste processo, por nome de engine."""
+    stats = {}
+    for name, engine in list(_engines.items()):
+        pool = engine.pool
+        info = {"pid": os.getpid(), "status": pool.status()}
+        for key, method in (("size", "size"), ("checked_in", "checkedin"),
+                            ("checked_out", "checkedout"), ("overflow", "overflow")):
+            if hasattr(pool, method):
+                info[key] = getattr(pool, method)()
+        stats[name] = info
+    return stats
+
+
+def reset_after_fork():
+    """Recomeça o registro no processo filho: novos engines na primeira utilização.
+
+    Chamado automaticamente após o fork (os.register_at_fork) e pelo hook
+    `post_fork` do gunicorn.conf.py; chamar de novo não tem efeito extra.
+    """
+    global _lock
+    _lock = threading.Lock()   # o lock pode ter sido copiado "travado" no fork
+    _forget_inherited_engines()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
@@ -0,0 +1,69 @@
+"""
+KPIs de todos os lotes ativos de uma vez (aba "Visão da Granja").
+
+Em vez de N idas ao banco por lote, são duas consultas agrupadas:
+  1. lotes + lote_resumo;
+  2. postura dos últimos 7 dias, agrupada por lote.
+O padrão da linhagem vem do cache em memória (standards.py): o de peso na
+semana da última pesagem, o de mortalidade na última semana registrada. O
+restante (percentuais, conversão, margem) é calculado em colunas no pandas.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from date_ranges import last_days
+from standards import get_standards
+
+_LOTES_SQL = text("""
+    SELECT
+        l.id AS lote_id, l.identificador_lote, l.linhagem, l.aviario_alocado,
+        l.data_alojamento, COALESCE(l.aves_alojadas, 0) AS aves_alojadas,
+        COALESCE(r.mort_acumulada, 0)  AS mort_acumulada,
+        COALESCE(r.ultima_semana, 0)   AS ultima_semana,
+        COALESCE(r.consumo_acum_g, 0)  AS consumo_acum_g,
+        r.ultimo_peso_medio,
+        (SELECT p.semana_idade FROM producao_aves p
+         WHERE p.lote_id = l.id AND p.data_pesagem = r.ultima_pesagem
+         ORDER BY p.semana_idade DESC LIMIT 1) AS semana_pesagem,
+        COALESCE(r.total_custos, 0)    AS total_custos,
+        COALESCE(r.total_receitas, 0)  AS total_receitas
+    FROM lotes l
+    LEFT JOIN lote_resumo r ON r.lote_id = l.id
+    WHERE l.status = 'Ativo'
+    ORDER BY l.data_alojamento DESC
+""")
+
+
+def fetch_farm_kpis(conn, dias_postura=7, today=None):
+    """DataFrame com uma linha por lote ativo e os KPIs da granja."""
+    df = pd.read_sql(_LOTES_SQL, conn)
+    if df.empty:
+        return df
+
+    periodo = last_days(dias_postura - 1, today)   # hoje e os 6 dias anteriores
+    postura = pd.read_sql(text(f"""
+        SELECT lote_id, SUM(total_ovos) AS ovos_periodo, COUNT(DISTINCT data_producao) AS dias_postura
+        FROM producao_ovos
+        WHERE {periodo.clause('data_producao')}
+        GROUP BY lote_id
+    """), conn, params=periodo.params())
+    df = df.merge(postura, on="lote_id", how="left")
+
+    padroes = get_standards()
+    df["peso_padrao_g"] = np.nan
+    df["mort_padrao_pct"] = np.nan
+    for linhagem, idx in df.groupby("linhagem").groups.items():
+        # o peso é comparado com o padrão da semana em que foi medido, não da semana atual
+        df.loc[idx, "peso_padrao_g"] = padroes.lookup(linhagem, "peso_medio_g", df.loc[idx, "semana_pesagem"])
+        df.loc[idx, "mort_padrao_pct"] = padroes.lookup(linhagem, "mortalidade_acum_pct", df.loc[idx, "ultima_semana"])
+
+    alojadas = df["aves_alojadas"].replace(0, np.nan)
+    df["aves_atuais"] = df["aves_alojadas"] - df["mort_acumulada"]
+    df["mort_pct"] = df["mort_acumulada"] / alojadas * 100
+    df["peso_vs_padrao_pct"] = (df["ultimo_peso_medio"] / df["peso_padrao_g"] - 1) * 100
+    df["conv_alimentar"] = df["consumo_acum_g"] / df["ultimo_peso_medio"].replace(0, np.nan)
+    ave_dias = (df["aves_atuais"] * df["dias_postura"]).replace(0, np.nan)
+    df["taxa_postura_pct"] = df["ovos_periodo"] / ave_dias * 100
+    df["margem"] = df["total_receitas"] - df["total_custos"]
+    return df
@@ -0,0 +1,69 @@
+"""
+Configuração do Gunicorn (lida automaticamente de ./gunicorn.conf.py).
+
+Com `preload_app` o processo mestre importa app.py uma vez (pandas, plotly,
+dash, callbacks e layouts) e os workers nascem por fork, compartilhando
+essas páginas de memória por copy-on-write em vez de cada um carregar a
+sua cópia. `create_app()` não deixa conexões nem arquivos abertos antes do
+fork; o hook `post_fork` garante engines novos em cada worker.
+
+    GUNICORN_WORKERS   workers (padrão 4)
+    GUNICORN_THREADS   threads por worker (padrão 2)
+    GUNICORN_PRELOAD   1 = importa o app no mestre antes do fork (padrão 1)
+    GUNICORN_WORKER_CLASS         gthread (padrão) ou gevent
+    GUNICORN_WORKER_CONNECTIONS   greenlets simultâneos por worker no modo gevent (padrão 100)
+
+Modo gevent: os callbacks passam a maior parte do tempo esperando o
+MariaDB. Com `gthread` cada espera ocupa uma das 2 threads do worker (8
+requisições simultâneas no total); com `gevent` a espera libera o worker
+para outras requisições. O driver PyMySQL é Python puro, então com o
+monkey patching abaixo o socket do banco também passa a ser cooperativo.
+O patch é feito aqui, antes do `preload_app` importar o app, para que
+locks e threads já nasçam na versão do gevent. Como o limite passa a ser
+o pool de conexões, o pool padrão sobe para 20 + 20 (DB_POOL_SIZE /
+DB_MAX_OVERFLOW continuam valendo).
+
+Comparação de memória por worker: python benchmarks.py memoria
+Teste de carga: python benchmarks.py carga --url http://localhost:8050
+"""
+import gc
+import os
+import time
+
+_t0 = time.perf_counter()
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 100))
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+    if "pymysql" not in os.getenv("DATABASE_URL", "mysql+pymysql://"):
+        print("[gunicorn] aviso: DATABASE_URL não usa PyMySQL; um driver em C bloqueia o worker gevent")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8050")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+wsgi_app = "app:server"
+
+
+def when_ready(server):
+    # Objetos criados no import vão para a geração permanente do GC: as coletas
+    # nos workers não tocam neles e as páginas continuam compartilhadas.
+    if preload_app:
+        server.log.info("app carregado no mestre em %.2f s", time.perf_counter() - _t0)
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    import engines
+    engines.reset_after_fork()
+
+
+def worker_exit(server, worker):
+    # Exportações em lote rodam em threads do worker: não deixar jobs presos em "executando"
+    import report_jobs
+    report_jobs.abandon_running_jobs()
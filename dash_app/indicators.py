@@ -0,0 +1,120 @@
+"""
+Gráficos de indicadores do lote (aba "Visão Geral").
+
+Trocar de lote no dropdown refazia as consultas e as quatro figuras a cada
+vez. As figuras prontas (JSON) agora ficam no armazenamento local
+compartilhado pelos workers (local_store.py), com a chave
+(lote, versão dos dados do lote, versão dos padrões). `insert_weekly_data`
+incrementa "lote:<id>" e as alterações de metas incrementam "metas", então
+a próxima abertura refaz só o que mudou; pedidos simultâneos do mesmo lote
+esperam um lock de arquivo e montam as figuras uma vez. Escritas feitas
+fora do app não incrementam versões; por isso as entradas também expiram
+após INDICATORS_CACHE_TTL segundos.
+
+    INDICATORS_CACHE_TTL   idade máxima das figuras em cache (padrão 3600)
+"""
+import fcntl
+import json
+import os
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from engines import shared_engine
+from local_store import LOCAL_STORE_PATH, get_store
+from lot_snapshot import get_lot_snapshot
+from lot_kpis import fetch_lot_kpis
+from standards import get_standards, METAS_VERSION_KEY
+
+INDICATORS_CACHE_TTL = int(os.getenv("INDICATORS_CACHE_TTL", 3600))
+
+
+def lot_version_key(lote_id):
+    return f"lote:{lote_id}"
+
+
+def _report(progress, pct, mensagem):
+    if progress:
+        progress(pct, mensagem)
+
+
+def build_indicator_figures(conn, lote_id, progress=None):
+    """As quatro figuras (peso, mortalidade, consumo, conversão) do lote."""
+    # KPIs acumulados já calculados no banco (lot_kpis.py)
+    _report(progress, 20, "Consultando KPIs do lote")
+    df_prod = fetch_lot_kpis(conn, lote_id)
+    lote_info = get_lot_snapshot(conn, lote_id)
+    _report(progress, 50, "Montando gráficos")
+
+    # Curva-padrão da linhagem, do cache em memória (standards.py)
+    df_metas = get_standards().curve(lote_info['linhagem']) if lote_info and lote_info['linhagem'] else pd.DataFrame()
+
+    if df_prod.empty: return [go.Figure(), go.Figure(), go.Figure(), go.Figure()]
+
+    fig_peso = go.Figure()
+    fig_peso.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['peso_medio'], name='Peso Real', mode='lines+markers'))
+    if not df_metas.empty: fig_peso.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['peso_medio_g'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
+    fig_peso.update_layout(title_text="Peso Médio (g) vs. Padrão", template='plotly_white', legend_title_text='Legenda')
+
+    fig_mort = go.Figure()
+    fig_mort.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['mort_acum_pct'], name='Mortalidade Real', mode='lines+markers'))
+    if not df_metas.empty: fig_mort.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['mortalidade_acum_pct'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
+    fig_mort.update_layout(title_text="Mortalidade Acumulada (%) vs. Padrão", yaxis_title="%", template='plotly_white', legend_title_text='Legenda')
+
+    fig_cons = go.Figure()
+    fig_cons.add_trace(go.Scatter(x=df_prod['semana_idade'], y=df_prod['consumo_acum_g'], name='Consumo Acum. Real', mode='lines+markers'))
+    if not df_metas.empty: fig_cons.add_trace(go.Scatter(x=df_metas['semana_idade'], y=df_metas['consumo_acum_g'], name='Padrão', mode='lines', line=dict(dash='dash', color='red')))
+    fig_cons.update_layout(title_text="Consumo Acumulado por Ave (g) vs. Padrão", template='plotly_white', legend_title_text='Legenda')
+
+    import plotly.express as px  # importação pesada: só ao montar as figuras
+    fig_ca = px.line(df_prod.dropna(subset=['conv_alimentar']), x='semana_idade', y='conv_alimentar', title="Conversão Alimentar Semanal", template='plotly_white', markers=True)
+
+    return [fig_peso, fig_mort, fig_cons, fig_ca]
+
+
+def get_indicator_figures(lote_id, progress=None):
+    """Figuras do lote (dicts prontos para o dcc.Graph), do cache compartilhado quando possível.
+
+    `progress(pct, mensagem)`, quando informado, é chamado a cada etapa.
+    """
+    _report(progress, 5, "Verificando cache")
+    store = get_store()
+    try:
+        v_lote, v_metas = store.versions(lot_version_key(lote_id), METAS_VERSION_KEY)
+        key = f"indicadores:{lote_id}:{v_lote}:{v_metas}"
+        cached = store.get(key, max_age=INDICATORS_CACHE_TTL)
+    except Exception as e:
+        print(f"[Indicadores] cache local indisponível: {e}")
+        store, cached = None, None
+    if cached is not None:
+        return json.loads(cached)
+
+    if store is None:
+        return json.loads(_build_payload(lote_id, progress))
+    # Um lock de arquivo por lote: o mesmo lote aberto em dois navegadores (em
+    # qualquer worker) monta as figuras uma vez; quem esperou lê do cache.
+    lock_dir = os.path.dirname(LOCAL_STORE_PATH) or "."
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"indicadores_{lote_id}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            cached = store.get(key, max_age=INDICATORS_CACHE_TTL)
+            if cached is not None:
+                return json.loads(cached)
+            payload = _build_payload(lote_id, progress)
+            _report(progress, 85, "Gravando no cache")
+            try:
+                store.set(key, payload)
+                store.purge(INDICATORS_CACHE_TTL, prefix="indicadores:")
+            except Exception as e:
+                print(f"[Indicadores] não foi possível gravar no cache local: {e}")
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return json.loads(payload)
+
+
+def _build_payload(lote_id, progress):
+    with shared_engine().connect() as conn:
+        figs = build_indicator_figures(conn, lote_id, progress)
+    return "[" + ",".join(pio.to_json(f, validate=False) for f in figs) + "]"
@@ -1,30 +1,23 @@
 import pandas as pd
 import dash_bootstrap_components as dbc
 from dash import dcc, html, dash_table
-from sqlalchemy import text
-from db import get_engine
-
-engine = get_engine()
+from public_lot import get_public_view
+from standards import get_standards
+from lot_options import active_lot_options, all_lot_options
 
 def get_active_lots():
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql("SELECT id, identificador_lote FROM lotes WHERE status = 'Ativo' ORDER BY data_alojamento DESC", conn)
-            return [{"label": row['identificador_lote'], "value": row['id']} for index, row in df.iterrows()]
+        return active_lot_options()
     except Exception: return []
 
 def get_all_lots():
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql("SELECT id, identificador_lote FROM lotes ORDER BY data_alojamento DESC", conn)
-            return [{"label": row['identificador_lote'], "value": row['id']} for index, row in df.iterrows()]
+        return all_lot_options()
     except Exception: return []
 
 def get_distinct_linhagens():
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql("SELECT DISTINCT linhagem FROM metas_linhagem ORDER BY linhagem", conn)
-            return [{"label": lin, "value": lin} for lin in df['linhagem']]
+        return [{"label": lin, "value": lin} for lin in get_standards().linhagens()]
     except Exception: return []
 
 def create_login_layout():
@@ -100,6 +93,13 @@ def view_layout():
             )
         ], justify="center"),
 
+        # Gráficos montados em background: andamento + cancelamento
+        dbc.Row([
+            dbc.Col(dbc.Progress(id="indicadores-progress", value=0, striped=True, animated=True), xs=9, md=6),
+            dbc.Col(dbc.Button("Cancelar", id="btn-cancel-indicadores", color="secondary", outline=True,
+                               size="sm", disabled=True), width="auto"),
+        ], justify="center", align="center", className="g-2"),
+
         html.Hr(),
 
         # Gráficos com responsividade total
@@ -127,6 +127,19 @@ def view_layout():
     ], fluid=True)
 
 
+def granja_layout():
+    return dbc.Container([
+        html.H3("🏠 Visão da Granja — Lotes Ativos", className="text-center mb-3"),
+        html.P("Indicadores de todos os lotes ativos (postura considera os últimos 7 dias).", className="text-center text-muted"),
+
+        dbc.Spinner(html.Div(id="granja-cards-div", className="mb-3")),
+        dbc.Spinner(dcc.Graph(id="granja-graph", config={"responsive": True}, style={"width": "100%"})),
+
+        html.Hr(),
+        dbc.Spinner(html.Div(id="granja-table-div"))
+    ], fluid=True)
+
+
 def insert_weekly_layout():
     return dbc.Container([
         html.H3("📝 Inserir Dados Semanais do Lote", className="text-center mb-4"),
@@ -255,10 +268,41 @@ def reports_layout():
 
         dcc.Dropdown(id="dropdown-lote-report", options=get_all_lots(), placeholder="Selecione um lote para o relatório", className="mb-3"),
 
-        dbc.Button("Gerar Relatório PDF", id="btn-generate-report", color="success", disabled=True, className="w-100"),
+        dbc.Row([
+            dbc.Col(dbc.Button("Gerar Relatório PDF", id="btn-generate-report", color="success", disabled=True, className="w-100"), md=8),
+            dbc.Col(dbc.Button("Pré-visualizar", id="btn-preview-report", color="secondary", outline=True, disabled=True, className="w-100"), md=4),
+        ], className="g-2"),
+
+        # PDF gerado em callback em background: progresso + cancelamento
+        dbc.Row([
+            dbc.Col(dbc.Progress(id="report-pdf-progress", value=0, striped=True, animated=True)),
+            dbc.Col(dbc.Button("Cancelar", id="btn-cancel-report", color="danger", outline=True,
+                               size="sm", disabled=True), width="auto"),
+        ], align="center", className="g-2 mt-3"),
+
+        # Exportação de vários lotes: id do job + polling do progresso
+        dcc.Store(id="report-job-id"),
+        dcc.Interval(id="report-job-interval", interval=1000, disabled=True),
 
         html.Div(id="report-generation-status", className="mt-3 text-center"),
-        dcc.Download(id="download-pdf-report")
+        dcc.Download(id="download-pdf-report"),
+
+        # Exportação de vários lotes (usa o status e o download acima)
+        dbc.Card([
+            dbc.CardHeader("Exportar Vários Lotes"),
+            dbc.CardBody([
+                dcc.Dropdown(id="dropdown-lotes-batch", options=get_all_lots(), multi=True,
+                             placeholder="Todos os lotes ativos", className="mb-2"),
+                dbc.RadioItems(id="batch-formato", inline=True, value="zip", className="mb-2",
+                               options=[{"label": "ZIP (um PDF por lote)", "value": "zip"},
+                                        {"label": "PDF único", "value": "pdf"}]),
+                dbc.Button("Exportar Lotes", id="btn-export-batch", color="primary", outline=True, className="w-100"),
+                dbc.Progress(id="report-progress", value=0, striped=True, animated=True, className="mt-2"),
+            ])
+        ], className="mt-3"),
+
+        # Pré-visualização em HTML (mesmo template do PDF, sem o WeasyPrint)
+        dbc.Spinner(html.Div(id="report-preview", className="mt-3"))
     ], fluid=True)
 
 
@@ -269,7 +313,7 @@ def metas_layout():
 
         dbc.Row([
             # Formulário
-            dbc.Col(dbc.Card([
+            dbc.Col([dbc.Card([
                 dbc.CardHeader("Cadastrar ou Atualizar Padrão Semanal"),
                 dbc.CardBody([
                     dbc.Input(id="meta-linhagem", placeholder="Nome da Linhagem", className="mb-2"),
@@ -281,7 +325,23 @@ def metas_layout():
                     dbc.Button("Salvar Padrão", id="btn-meta-submit", color="primary", className="w-100"),
                     html.Div(id="meta-submit-status", className="mt-2")
                 ])
-            ]), xs=12, md=4, className="mb-4"),
+            ], className="mb-3"),
+
+            # Importação da curva completa (CSV/XLSX); a linhagem acima vale para arquivos sem a coluna
+            dbc.Card([
+                dbc.CardHeader("Importar Curva (CSV/XLSX)"),
+                dbc.CardBody([
+                    dcc.Upload(
+                        id="metas-upload",
+                        children=html.Div(["Arraste ou ", html.A("selecione um arquivo")]),
+                        accept=".csv,.txt,.xlsx,.xls",
+                        style={"borderWidth": "1px", "borderStyle": "dashed", "borderRadius": "5px",
+                               "textAlign": "center", "padding": "12px"}
+                    ),
+                    html.Small("Colunas: linhagem, semana, peso, consumo_dia, consumo_acum, mortalidade.",
+                               className="text-muted"),
+                ])
+            ])], xs=12, md=4, className="mb-4"),
 
             # Tabela
             dbc.Col([
@@ -375,6 +435,7 @@ def create_layout():
         value="tab-view",
         children=[
             dcc.Tab(label="Visão Geral", value="tab-view"),
+            dcc.Tab(label="Visão da Granja", value="tab-granja"),
             dcc.Tab(label="Gestão de Lotes", value="tab-lotes"),
             dcc.Tab(label="Produção", value="tab-producao"),
             dcc.Tab(label="Peso & Mortalidade", value="tab-insert-weekly"),
@@ -402,12 +463,33 @@ def layout_public_lote(lote_id: int):
     Conteúdo: Produção, Mortalidade e Tratamentos.
     SEM navbar/tabs; acesso direto via /public/lote/<id>.
     """
+    try:
+        view = get_public_view(lote_id)
+    except Exception:
+        view = None
+    snapshot = view["snapshot"] if view else None
+
+    titulo = snapshot['identificador_lote'] if snapshot else lote_id
+    resumo = []
+    if snapshot:
+        resumo = [html.P(
+            f"Linhagem: {snapshot['linhagem'] or '—'} | Alojamento: {snapshot['data_alojamento']:%d/%m/%Y} | "
+            f"Aves atuais: {snapshot['aves_atuais']} | Última semana registrada: {snapshot['ultima_semana']}",
+            className="mb-1"
+        )]
+
     return dbc.Container([
         dcc.Store(id="public-store-lote-id", data=lote_id),
 
-        html.Div([
-            html.H3(f"📌 Lote {lote_id} — Visualização Pública (Somente Leitura)", className="mb-2"),
-            html.P("Esta é uma página de acesso público. Edição desabilitada.", className="text-muted"),
+        dbc.Row([
+            dbc.Col([
+                html.H3(f"📌 Lote {titulo} — Visualização Pública (Somente Leitura)", className="mb-2"),
+                *resumo,
+                html.P("Esta é uma página de acesso público. Edição desabilitada.", className="text-muted"),
+            ]),
+            # Mesmo QR code do relatório em PDF, servido com cache longo
+            dbc.Col(html.Img(src=f"/qr/lote/{lote_id}.png", alt="QR code do lote",
+                             style={"width": "120px", "height": "120px"}), width="auto"),
         ], className="mt-3 mb-3"),
 
         html.Hr(),
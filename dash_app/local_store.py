@@ -0,0 +1,98 @@
+"""
+Armazenamento local em SQLite, compartilhado pelos workers do container.
+
+Os caches em memória (ttl_cache.py) são por processo: com 4 workers do
+Gunicorn, cada um monta e guarda a sua cópia, e uma escrita feita num
+worker não invalida o cache dos outros. Aqui ficam, num arquivo SQLite
+local (modo WAL, leituras concorrentes):
+
+  - contadores de versão por nome (ex.: "lote:12", "metas"), incrementados
+    pelas escritas depois do commit (`bump`);
+  - valores (bytes/texto) por chave, com data de gravação.
+
+Quem usa o cache coloca as versões relevantes na chave: uma escrita que
+incrementa a versão faz as leituras seguintes procurarem outra chave, em
+qualquer worker. Entradas antigas são descartadas por idade (`purge`).
+
+    LOCAL_STORE_PATH   arquivo SQLite (padrão /tmp/sga_cache/local_store.sqlite3)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", "/tmp/sga_cache/local_store.sqlite3")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+    CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL);
+"""
+
+
+class LocalStore:
+    """Contadores de versão e valores por chave num arquivo SQLite."""
+
+    def __init__(self, path=LOCAL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        # Uma conexão por thread e por processo (conexões SQLite não sobrevivem a fork).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # --- versões ---
+    def version(self, name):
+        row = self._conn().execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def versions(self, *names):
+        return tuple(self.version(n) for n in names)
+
+    def bump(self, *names):
+        """Incrementa as versões `names` (chamar depois do commit da escrita no banco)."""
+        conn = self._conn()
+        for name in names:
+            conn.execute("INSERT INTO versions (name, version) VALUES (?, 1) "
+                         "ON CONFLICT(name) DO UPDATE SET version = version + 1", (name,))
+
+    # --- valores ---
+    def get(self, key, max_age=None):
+        row = self._conn().execute("SELECT value, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return row[0]
+
+    def set(self, key, value):
+        self._conn().execute("INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)",
+                             (key, value, time.time()))
+
+    def purge(self, max_age, prefix=""):
+        """Remove entradas (com chave iniciada por `prefix`) gravadas há mais de `max_age` segundos."""
+        return self._conn().execute("DELETE FROM entries WHERE key LIKE ? AND stored_at < ?",
+                                    (prefix + "%", time.time() - max_age)).rowcount
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = LocalStore()
+    return _store
+
+
+def bump(*names):
+    """Incrementa versões sem deixar uma falha no cache local derrubar a escrita já confirmada."""
+    try:
+        get_store().bump(*names)
+    except sqlite3.Error as e:
+        print(f"[local_store] não foi possível incrementar {names}: {e}")
@@ -0,0 +1,83 @@
+"""
+KPIs semanais do lote calculados no MariaDB com funções de janela.
+
+Mortalidade acumulada (%), consumo acumulado, ganho de peso semanal e
+conversão alimentar eram calculados no pandas a cada requisição. Aqui uma
+única consulta com `SUM() OVER` / `LAG()` devolve o quadro pronto para
+plotar, usado pelos gráficos de indicadores, pelo relatório em PDF e pela
+exportação em CSV:
+
+    python lot_kpis.py export --lote 12 [--saida kpis_lote_12.csv]
+
+Colunas: lote_id, semana_idade, aves_na_semana, data_pesagem, mort_total,
+peso_medio, consumo_real_ave_dia, mort_acum, mort_acum_pct, consumo_semanal_g,
+consumo_acum_g, ganho_peso_g, conv_alimentar (nula quando não houve ganho).
+"""
+import argparse
+
+from typed_queries import TypedQuery, read_typed
+
+# A subconsulta calcula as janelas (por lote, em ordem de semana); a externa
+# deriva a conversão alimentar a partir delas.
+LOT_KPIS = TypedQuery(
+    sql="""
+        SELECT k.*,
+               CASE WHEN k.ganho_peso_g > 0 THEN k.consumo_semanal_g / k.ganho_peso_g END AS conv_alimentar
+        FROM (
+            SELECT p.lote_id, p.semana_idade,
+                   COALESCE(p.aves_na_semana, 0) AS aves_na_semana,
+                   p.data_pesagem,
+                   COALESCE(p.mort_total, 0) AS mort_total,
+                   p.peso_medio, p.consumo_real_ave_dia,
+                   SUM(COALESCE(p.mort_total, 0)) OVER (
+                       PARTITION BY p.lote_id ORDER BY p.semana_idade ROWS UNBOUNDED PRECEDING
+                   ) AS mort_acum,
+                   SUM(COALESCE(p.mort_total, 0)) OVER (
+                       PARTITION BY p.lote_id ORDER BY p.semana_idade ROWS UNBOUNDED PRECEDING
+                   ) / NULLIF(l.aves_alojadas, 0) * 100 AS mort_acum_pct,
+                   p.consumo_real_ave_dia * 7 AS consumo_semanal_g,
+                   SUM(COALESCE(p.consumo_real_ave_dia, 0) * 7) OVER (
+                       PARTITION BY p.lote_id ORDER BY p.semana_idade ROWS UNBOUNDED PRECEDING
+                   ) AS consumo_acum_g,
+                   p.peso_medio - COALESCE(LAG(p.peso_medio) OVER (
+                       PARTITION BY p.lote_id ORDER BY p.semana_idade
+                   ), 0) AS ganho_peso_g
+            FROM producao_aves p
+            JOIN lotes l ON l.id = p.lote_id
+            WHERE p.lote_id IN :ids AND p.semana_idade IS NOT NULL
+        ) k
+        ORDER BY k.lote_id, k.semana_idade
+    """,
+    dtypes={"lote_id": "int32", "semana_idade": "int16", "aves_na_semana": "int32", "mort_total": "int32",
+            "peso_medio": "float32", "consumo_real_ave_dia": "float32", "mort_acum": "int32",
+            "mort_acum_pct": "float32", "consumo_semanal_g": "float32", "consumo_acum_g": "float32",
+            "ganho_peso_g": "float32", "conv_alimentar": "float32"},
+)
+
+
+def fetch_lot_kpis(conn, lote_ids):
+    """KPIs semanais de um ou mais lotes (um DataFrame, ordenado por lote e semana)."""
+    if isinstance(lote_ids, int):
+        lote_ids = [lote_ids]
+    return read_typed(conn, LOT_KPIS, {"ids": tuple(lote_ids)})
+
+
+def main():
+    from engines import shared_engine
+
+    parser = argparse.ArgumentParser(description="KPIs semanais dos lotes.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("export", help="Exporta os KPIs semanais em CSV.")
+    p.add_argument("--lote", type=int, nargs="+", required=True, help="ID(s) do(s) lote(s).")
+    p.add_argument("--saida", help="Arquivo CSV (padrão: kpis_lote_<id>.csv).")
+    args = parser.parse_args()
+
+    with shared_engine().connect() as conn:
+        df = fetch_lot_kpis(conn, args.lote)
+    saida = args.saida or f"kpis_lote_{'_'.join(map(str, args.lote))}.csv"
+    df.to_csv(saida, index=False)
+    print(f"{len(df)} semana(s) exportada(s) em {saida}")
+
+
+if __name__ == '__main__':
+    main()
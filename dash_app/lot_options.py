@@ -0,0 +1,79 @@
+"""
+Opções de lote dos dropdowns, em memória.
+
+Cada troca de aba montava o layout e consultava `lotes` de novo (um
+`pd.read_sql` + `iterrows()` por dropdown), e `create_layout` repetia a
+consulta para o `store-active-lotes`. Aqui uma única consulta traz todos os
+lotes e as duas listas (ativos e todos) são montadas coluna a coluna; as
+listas ficam no processo até a versão "lotes" do armazenamento local
+(local_store.py) mudar. `insert_lote` e `finalize_lote` incrementam essa
+versão depois do commit, então trocar de aba não consulta o banco enquanto
+os lotes não mudam. LOT_OPTIONS_TTL cobre alterações feitas fora do app.
+
+    LOT_OPTIONS_TTL   segundos até recarregar mesmo sem mudança de versão (padrão 300)
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from engines import shared_engine
+from local_store import get_store
+
+LOT_OPTIONS_TTL = int(os.getenv("LOT_OPTIONS_TTL", 300))
+LOTES_VERSION_KEY = "lotes"
+
+_lock = threading.Lock()
+_current = None
+_loaded_version = None
+_loaded_at = 0.0
+
+
+def _store_version():
+    try:
+        return get_store().version(LOTES_VERSION_KEY)
+    except Exception:
+        return None
+
+
+def _load():
+    with shared_engine().connect() as conn:
+        rows = conn.execute(text(
+            "SELECT id, identificador_lote, status FROM lotes ORDER BY data_alojamento DESC"
+        )).all()
+    if not rows:
+        return {"ativos": [], "todos": []}
+    ids, nomes, status = zip(*rows)
+    todos = [{"label": nome, "value": lote_id} for lote_id, nome in zip(ids, nomes)]
+    ativos = [opcao for opcao, st in zip(todos, status) if st == "Ativo"]
+    return {"ativos": ativos, "todos": todos}
+
+
+def _options():
+    global _current, _loaded_version, _loaded_at
+    versao = _store_version()
+    if (_current is not None and versao == _loaded_version
+            and time.monotonic() - _loaded_at < LOT_OPTIONS_TTL):
+        return _current
+    with _lock:
+        if (_current is None or versao != _loaded_version
+                or time.monotonic() - _loaded_at >= LOT_OPTIONS_TTL):
+            _current, _loaded_version, _loaded_at = _load(), versao, time.monotonic()
+        return _current
+
+
+def active_lot_options():
+    """[{"label", "value"}] dos lotes ativos, mais recentes primeiro."""
+    return list(_options()["ativos"])
+
+
+def all_lot_options():
+    """[{"label", "value"}] de todos os lotes, mais recentes primeiro."""
+    return list(_options()["todos"])
+
+
+def invalidate():
+    """Descarta a cópia deste processo (os demais percebem pela versão em local_store)."""
+    global _current
+    _current = None
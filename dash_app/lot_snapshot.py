@@ -0,0 +1,41 @@
+"""
+"Fotografia" atual de um lote em uma única consulta.
+
+O formulário semanal fazia três consultas (aves alojadas, mortalidade
+acumulada, última semana) a cada troca de lote; os indicadores e a página
+pública buscavam os dados do lote separadamente. `get_lot_snapshot` junta
+tudo em uma ida ao banco, lendo os totais já mantidos em `lote_resumo`
+(ver lot_summary.py) em vez de somar as tabelas brutas.
+"""
+from sqlalchemy import text
+
+_SNAPSHOT_SQL = text("""
+    SELECT
+        l.id, l.identificador_lote, l.linhagem, l.aviario_alocado,
+        l.data_alojamento, l.status,
+        COALESCE(l.aves_alojadas, 0)                              AS aves_alojadas,
+        COALESCE(r.mort_acumulada, 0)                             AS mort_acumulada,
+        COALESCE(r.ultima_semana, 0)                              AS ultima_semana,
+        COALESCE(l.aves_alojadas, 0) - COALESCE(r.mort_acumulada, 0) AS aves_atuais,
+        r.ultima_pesagem, r.ultimo_peso_medio,
+        COALESCE(r.consumo_acum_g, 0)                             AS consumo_acum_g,
+        COALESCE(r.total_ovos, 0)                                 AS total_ovos,
+        COALESCE(r.ovos_quebrados, 0)                             AS ovos_quebrados,
+        COALESCE(r.total_custos, 0)                               AS total_custos,
+        COALESCE(r.total_receitas, 0)                             AS total_receitas
+    FROM lotes l
+    LEFT JOIN lote_resumo r ON r.lote_id = l.id
+    WHERE l.id = :id
+""")
+
+
+def get_lot_snapshot(conn, lote_id):
+    """Retorna um dict com dados cadastrais e totais correntes do lote (ou None).
+
+    Chaves: id, identificador_lote, linhagem, aviario_alocado, data_alojamento,
+    status, aves_alojadas, mort_acumulada, ultima_semana, aves_atuais,
+    ultima_pesagem, ultimo_peso_medio, consumo_acum_g, total_ovos,
+    ovos_quebrados, total_custos, total_receitas.
+    """
+    row = conn.execute(_SNAPSHOT_SQL, {"id": lote_id}).mappings().first()
+    return dict(row) if row else None
@@ -0,0 +1,181 @@
+"""
+Totais correntes por lote (`lote_resumo`).
+
+Mortalidade acumulada, consumo acumulado, produção, custos e receitas eram
+recalculados a partir das tabelas brutas a cada visualização. Agora cada
+inserção (`insert_weekly_data`, `insert_producao_data`, `insert_custo`,
+`insert_receita`) aplica o seu incremento em `lote_resumo` na MESMA
+transação, e os painéis leem uma linha por lote.
+
+Verificação e reconstrução a partir das tabelas brutas:
+    python lot_summary.py check           # relata divergências
+    python lot_summary.py check --fix     # relata e reconstrói
+    python lot_summary.py rebuild [--lote 12]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+TOTAL_COLUMNS = ["mort_acumulada", "ultima_semana", "consumo_acum_g", "total_ovos",
+                 "ovos_quebrados", "total_custos", "total_receitas"]
+
+# Totais recalculados das tabelas brutas (usado pelo rebuild e pelo check)
+_FRESH_SELECT = """
+    SELECT
+        l.id                              AS lote_id,
+        COALESCE(pa.mort_acumulada, 0)    AS mort_acumulada,
+        COALESCE(pa.ultima_semana, 0)     AS ultima_semana,
+        COALESCE(pa.consumo_acum_g, 0)    AS consumo_acum_g,
+        up.data_pesagem                   AS ultima_pesagem,
+        up.peso_medio                     AS ultimo_peso_medio,
+        COALESCE(po.total_ovos, 0)        AS total_ovos,
+        COALESCE(po.ovos_quebrados, 0)    AS ovos_quebrados,
+        COALESCE(c.total, 0)              AS total_custos,
+        COALESCE(r.total, 0)              AS total_receitas
+    FROM lotes l
+    LEFT JOIN (
+        SELECT lote_id, SUM(mort_total) AS mort_acumulada, MAX(semana_idade) AS ultima_semana,
+               SUM(COALESCE(consumo_real_ave_dia, 0) * 7) AS consumo_acum_g
+        FROM producao_aves GROUP BY lote_id
+    ) pa ON pa.lote_id = l.id
+    LEFT JOIN producao_aves up ON up.id = (
+        SELECT p.id FROM producao_aves p
+        WHERE p.lote_id = l.id AND p.data_pesagem IS NOT NULL
+        ORDER BY p.data_pesagem DESC, p.semana_idade DESC
+        LIMIT 1
+    )
+    LEFT JOIN (
+        SELECT lote_id, SUM(total_ovos) AS total_ovos, SUM(ovos_quebrados) AS ovos_quebrados
+        FROM producao_ovos GROUP BY lote_id
+    ) po ON po.lote_id = l.id
+    LEFT JOIN (SELECT lote_id, SUM(valor) AS total FROM custos_lote GROUP BY lote_id) c ON c.lote_id = l.id
+    LEFT JOIN (SELECT lote_id, SUM(valor) AS total FROM receitas_lote GROUP BY lote_id) r ON r.lote_id = l.id
+"""
+
+
+# ---------------------------
+# Incrementos (chamar dentro da transação da inserção)
+# ---------------------------
+def _add(conn, lote_id, **deltas):
+    cols = list(deltas)
+    conn.execute(text(f"""
+        INSERT INTO lote_resumo (lote_id, {', '.join(cols)}, atualizado_em)
+        VALUES (:lote_id, {', '.join(f'COALESCE(:{c}, 0)' for c in cols)}, NOW())
+        ON DUPLICATE KEY UPDATE
+            {', '.join(f'{c} = {c} + VALUES({c})' for c in cols)},
+            atualizado_em = NOW()
+    """), {"lote_id": lote_id, **deltas})
+
+
+def add_weekly(conn, lote_id, semana, mort_total, consumo_real_ave_dia, data_pesagem, peso_medio):
+    """Aplica uma semana de `producao_aves` ao resumo."""
+    # No MySQL as atribuições do UPDATE são avaliadas em ordem: o peso precisa
+    # ser comparado com a data de pesagem ANTERIOR, por isso vem antes dela.
+    nova_pesagem = ("VALUES(ultima_pesagem) IS NOT NULL AND "
+                    "(ultima_pesagem IS NULL OR VALUES(ultima_pesagem) >= ultima_pesagem)")
+    conn.execute(text(f"""
+        INSERT INTO lote_resumo (lote_id, mort_acumulada, ultima_semana, consumo_acum_g,
+                                 ultima_pesagem, ultimo_peso_medio, atualizado_em)
+        VALUES (:lote_id, COALESCE(:mort, 0), COALESCE(:sem, 0), COALESCE(:cons, 0) * 7,
+                :dt_p, IF(:dt_p IS NULL, NULL, :pm), NOW())
+        ON DUPLICATE KEY UPDATE
+            mort_acumulada = mort_acumulada + VALUES(mort_acumulada),
+            ultima_semana = GREATEST(ultima_semana, VALUES(ultima_semana)),
+            consumo_acum_g = consumo_acum_g + VALUES(consumo_acum_g),
+            ultimo_peso_medio = IF({nova_pesagem}, VALUES(ultimo_peso_medio), ultimo_peso_medio),
+            ultima_pesagem = IF({nova_pesagem}, VALUES(ultima_pesagem), ultima_pesagem),
+            atualizado_em = NOW()
+    """), {"lote_id": lote_id, "mort": mort_total, "sem": semana, "cons": consumo_real_ave_dia,
+           "dt_p": data_pesagem, "pm": peso_medio})
+
+
+def add_eggs(conn, lote_id, total_ovos, ovos_quebrados):
+    _add(conn, lote_id, total_ovos=total_ovos, ovos_quebrados=ovos_quebrados)
+
+
+def add_cost(conn, lote_id, valor):
+    _add(conn, lote_id, total_custos=valor)
+
+
+def add_revenue(conn, lote_id, valor):
+    _add(conn, lote_id, total_receitas=valor)
+
+
+# ---------------------------
+# Reconstrução e verificação
+# ---------------------------
+def rebuild(conn, lote_id=None):
+    """Recalcula `lote_resumo` a partir das tabelas brutas (todos os lotes ou um só)."""
+    filtro = "WHERE l.id = :lote_id" if lote_id else ""
+    params = {"lote_id": lote_id} if lote_id else {}
+    conn.execute(text("DELETE FROM lote_resumo" + (" WHERE lote_id = :lote_id" if lote_id else "")), params)
+    result = conn.execute(text(f"""
+        INSERT INTO lote_resumo (lote_id, {', '.join(TOTAL_COLUMNS[:3])}, ultima_pesagem, ultimo_peso_medio,
+                                 {', '.join(TOTAL_COLUMNS[3:])}, atualizado_em)
+        SELECT f.lote_id, {', '.join('f.' + c for c in TOTAL_COLUMNS[:3])}, f.ultima_pesagem, f.ultimo_peso_medio,
+               {', '.join('f.' + c for c in TOTAL_COLUMNS[3:])}, NOW()
+        FROM ({_FRESH_SELECT} {filtro}) f
+    """), params)
+    return result.rowcount
+
+
+def check(conn):
+    """Compara `lote_resumo` com os totais recalculados e retorna um DataFrame das divergências."""
+    fresh = pd.read_sql(text(_FRESH_SELECT), conn)
+    stored = pd.read_sql(text("SELECT * FROM lote_resumo"), conn)
+    merged = fresh.merge(stored, on="lote_id", how="left", suffixes=("_real", "_resumo"))
+
+    divergencias = []
+    for col in TOTAL_COLUMNS:
+        real = merged[f"{col}_real"].astype(float)
+        resumo = merged[f"{col}_resumo"].astype(float).fillna(0)
+        diff = ~np.isclose(real, resumo, rtol=1e-6, atol=1e-6)
+        for _, r in merged[diff].iterrows():
+            divergencias.append({"lote_id": r["lote_id"], "coluna": col,
+                                 "resumo": r[f"{col}_resumo"], "real": r[f"{col}_real"]})
+    for col in ("ultima_pesagem", "ultimo_peso_medio"):
+        real = merged[f"{col}_real"]
+        resumo = merged[f"{col}_resumo"]
+        diff = ~((real == resumo) | (real.isna() & resumo.isna()))
+        for _, r in merged[diff].iterrows():
+            divergencias.append({"lote_id": r["lote_id"], "coluna": col,
+                                 "resumo": r[f"{col}_resumo"], "real": r[f"{col}_real"]})
+    return pd.DataFrame(divergencias, columns=["lote_id", "coluna", "resumo", "real"])
+
+
+def main():
+    from engines import shared_engine
+
+    parser = argparse.ArgumentParser(description="Manutenção da tabela lote_resumo.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("check", help="Relata divergências entre lote_resumo e as tabelas brutas.")
+    p.add_argument("--fix", action="store_true", help="Reconstrói lote_resumo se houver divergências.")
+    p = sub.add_parser("rebuild", help="Reconstrói lote_resumo a partir das tabelas brutas.")
+    p.add_argument("--lote", type=int, help="ID do lote (padrão: todos).")
+    args = parser.parse_args()
+
+    engine = shared_engine()
+    if args.comando == "rebuild":
+        with engine.begin() as conn:
+            linhas = rebuild(conn, args.lote)
+        print(f"lote_resumo reconstruído: {linhas} lote(s).")
+        return
+
+    with engine.connect() as conn:
+        drift = check(conn)
+    if drift.empty:
+        print("lote_resumo consistente com as tabelas brutas.")
+        return
+    print(f"{drift['lote_id'].nunique()} lote(s) com divergência:")
+    print(drift.to_string(index=False))
+    if not args.fix:
+        raise SystemExit(1)
+    with engine.begin() as conn:
+        rebuild(conn)
+    print("lote_resumo reconstruído.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Importação em lote das curvas-padrão de linhagem (`metas_linhagem`).
+
+Os manuais das linhagens trazem 80+ semanas por curva; cadastrar semana a
+semana pelo formulário não escala. Aqui um arquivo CSV ou XLSX inteiro é
+lido, validado e gravado com UM `INSERT ... ON DUPLICATE KEY UPDATE`
+multi-linha por bloco, apoiado na chave única (linhagem, semana_idade)
+criada pela migração 005.
+
+Colunas aceitas (cabeçalho sem diferenciar maiúsculas/acentos; os cabeçalhos
+da tabela de metas do app também servem):
+    linhagem                      (opcional se informada por --linhagem / no formulário)
+    semana | semana_idade         (obrigatória, inteiro >= 1)
+    peso | peso_medio_g
+    consumo_dia | consumo_ave_dia_g
+    consumo_acum | consumo_acum_g
+    mortalidade | mortalidade_acum_pct   (0 a 100)
+Números podem usar vírgula decimal.
+
+Pela linha de comando:
+    python metas_import.py curva_hyline.xlsx --linhagem "Hy-Line W-36"
+    python metas_import.py curvas.csv --dry-run
+"""
+import argparse
+import io
+import time
+import unicodedata
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+VALUE_COLUMNS = ["peso_medio_g", "consumo_ave_dia_g", "consumo_acum_g", "mortalidade_acum_pct"]
+
+_ALIASES = {
+    "linhagem": "linhagem",
+    "semana": "semana_idade", "semana_idade": "semana_idade", "semanas": "semana_idade",
+    "peso": "peso_medio_g", "peso_g": "peso_medio_g", "peso_medio": "peso_medio_g", "peso_medio_g": "peso_medio_g",
+    "consumo_dia": "consumo_ave_dia_g", "consumo_dia_g": "consumo_ave_dia_g", "consumo_ave_dia": "consumo_ave_dia_g",
+    "consumo_ave_dia_g": "consumo_ave_dia_g",
+    "consumo_acum": "consumo_acum_g", "consumo_acumulado": "consumo_acum_g", "consumo_acum_g": "consumo_acum_g",
+    "mortalidade": "mortalidade_acum_pct", "mortalidade_acum": "mortalidade_acum_pct", "mort_acum": "mortalidade_acum_pct",
+    "mortalidade_acum_pct": "mortalidade_acum_pct",
+}
+
+CHUNK_SIZE = 1000
+
+
+class CurveFileError(ValueError):
+    """Arquivo de curva ilegível ou com dados inválidos (mensagens em `erros`)."""
+
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__("; ".join(erros[:5]) + (f" (+{len(erros) - 5} erro(s))" if len(erros) > 5 else ""))
+
+
+def _normalize_header(nome):
+    nome = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode("ascii")
+    for ch in "().%":
+        nome = nome.replace(ch, " ")
+    return "_".join(nome.strip().lower().split())
+
+
+def read_curve_file(data, filename):
+    """Lê o conteúdo (bytes) de um CSV ou XLSX num DataFrame com as colunas normalizadas."""
+    nome = filename.lower()
+    if nome.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(io.BytesIO(data))
+    elif nome.endswith((".csv", ".txt")):
+        # sep=None detecta "," ou ";" (planilhas em português costumam exportar com ";")
+        df = pd.read_csv(io.BytesIO(data), sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+    else:
+        raise CurveFileError([f"Formato não suportado: {filename} (use CSV ou XLSX)."])
+    df.columns = [_ALIASES.get(_normalize_header(c), _normalize_header(c)) for c in df.columns]
+    return df
+
+
+def validate_curve(df, linhagem=None):
+    """Valida e converte a curva; retorna o DataFrame pronto para gravar ou levanta CurveFileError."""
+    erros = []
+    df = df.dropna(how="all").copy()
+    if linhagem:
+        df["linhagem"] = df["linhagem"].fillna(linhagem) if "linhagem" in df.columns else linhagem
+    elif "linhagem" not in df.columns:
+        raise CurveFileError(["Informe a linhagem (coluna 'linhagem' no arquivo ou no formulário)."])
+    if "semana_idade" not in df.columns:
+        raise CurveFileError(["Coluna de semana ('semana' ou 'semana_idade') não encontrada."])
+    if not any(c in df.columns for c in VALUE_COLUMNS):
+        raise CurveFileError(["Nenhuma coluna de valores (peso, consumo_dia, consumo_acum, mortalidade)."])
+
+    df["linhagem"] = df["linhagem"].astype(str).str.strip()
+    for col in ["semana_idade", *VALUE_COLUMNS]:
+        if col not in df.columns:
+            df[col] = float("nan")
+            continue
+        bruto = df[col].map(lambda v: v.strip().replace(",", ".") or None if isinstance(v, str) else v)
+        df[col] = pd.to_numeric(bruto, errors="coerce")
+        invalidos = bruto.notna() & df[col].isna()
+        for linha in df.index[invalidos][:10]:
+            erros.append(f"Linha {linha + 2}: valor inválido em '{col}': {bruto[linha]!r}")
+
+    linha_excel = df.index + 2   # cabeçalho na linha 1
+    checks = [
+        (df["linhagem"].isin(["", "nan", "None"]), "linhagem vazia"),
+        (df["semana_idade"].isna() | (df["semana_idade"] < 1) | (df["semana_idade"] % 1 != 0),
+         "semana deve ser um inteiro >= 1"),
+        ((df[VALUE_COLUMNS] < 0).any(axis=1), "valores negativos"),
+        (df["mortalidade_acum_pct"] > 100, "mortalidade acumulada acima de 100%"),
+        (df.duplicated(["linhagem", "semana_idade"], keep=False), "semana repetida para a mesma linhagem"),
+    ]
+    for mask, msg in checks:
+        for linha in linha_excel[mask.fillna(False).to_numpy()][:10]:
+            erros.append(f"Linha {linha}: {msg}")
+    if df.empty:
+        erros.append("Arquivo sem linhas de dados.")
+    if erros:
+        raise CurveFileError(erros)
+
+    df["semana_idade"] = df["semana_idade"].astype(int)
+    return df[["linhagem", "semana_idade", *VALUE_COLUMNS]].reset_index(drop=True)
+
+
+def upsert_curves(conn, df):
+    """Grava as linhas de `df` em metas_linhagem (um INSERT multi-linha por bloco).
+
+    Retorna {"inseridos", "atualizados", "inalterados"}. Deve rodar numa transação.
+    """
+    existentes = 0
+    for linhagem, grupo in df.groupby("linhagem"):
+        existentes += conn.execute(text(
+            "SELECT COUNT(*) FROM metas_linhagem WHERE linhagem = :lin AND semana_idade IN :semanas"
+        ).bindparams(bindparam("semanas", expanding=True)),
+            {"lin": linhagem, "semanas": [int(s) for s in grupo["semana_idade"]]}).scalar()
+
+    registros = df.astype(object).where(df.notna(), None).to_dict("records")
+    afetadas = 0
+    for inicio in range(0, len(registros), CHUNK_SIZE):
+        bloco = registros[inicio:inicio + CHUNK_SIZE]
+        valores, params = [], {}
+        for i, r in enumerate(bloco):
+            valores.append(f"(:lin{i}, :sem{i}, :peso{i}, :cdia{i}, :cacum{i}, :mort{i})")
+            params.update({f"lin{i}": r["linhagem"], f"sem{i}": int(r["semana_idade"]),
+                           f"peso{i}": r["peso_medio_g"], f"cdia{i}": r["consumo_ave_dia_g"],
+                           f"cacum{i}": r["consumo_acum_g"], f"mort{i}": r["mortalidade_acum_pct"]})
+        # rowcount (o SQLAlchemy liga CLIENT_FOUND_ROWS no MySQL): 1 por linha
+        # inserida, 2 por atualizada, 1 por linha existente idêntica
+        afetadas += conn.execute(text(f"""
+            INSERT INTO metas_linhagem (linhagem, semana_idade, peso_medio_g, consumo_ave_dia_g,
+                                        consumo_acum_g, mortalidade_acum_pct)
+            VALUES {', '.join(valores)}
+            ON DUPLICATE KEY UPDATE
+                peso_medio_g = VALUES(peso_medio_g),
+                consumo_ave_dia_g = VALUES(consumo_ave_dia_g),
+                consumo_acum_g = VALUES(consumo_acum_g),
+                mortalidade_acum_pct = VALUES(mortalidade_acum_pct)
+        """), params).rowcount
+
+    inseridos = len(df) - existentes
+    atualizados = afetadas - inseridos - existentes
+    return {"inseridos": inseridos, "atualizados": atualizados, "inalterados": existentes - atualizados}
+
+
+def import_curves(engine, data, filename, linhagem=None, dry_run=False):
+    """Lê, valida e grava um arquivo de curvas. Retorna as contagens + linhagens e tempo (s)."""
+    t0 = time.perf_counter()
+    df = validate_curve(read_curve_file(data, filename), linhagem)
+    resultado = {"linhas": len(df), "linhagens": sorted(df["linhagem"].unique())}
+    if dry_run:
+        resultado.update(inseridos=0, atualizados=0, inalterados=0)
+    else:
+        with engine.begin() as conn:
+            resultado.update(upsert_curves(conn, df))
+        # Depois do commit: gráficos e cache de padrões de todos os workers recarregam
+        import local_store
+        import standards
+        local_store.bump(standards.METAS_VERSION_KEY)
+        standards.invalidate()
+    resultado["segundos"] = round(time.perf_counter() - t0, 3)
+    return resultado
+
+
+def main():
+    from engines import shared_engine
+
+    parser = argparse.ArgumentParser(description="Importa curvas-padrão de linhagem (CSV/XLSX) para metas_linhagem.")
+    parser.add_argument("arquivo", help="Arquivo .csv ou .xlsx")
+    parser.add_argument("--linhagem", help="Linhagem de todas as linhas (se o arquivo não tiver a coluna).")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas valida, sem gravar.")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "rb") as f:
+        data = f.read()
+    try:
+        r = import_curves(shared_engine(), data, args.arquivo, args.linhagem, args.dry_run)
+    except CurveFileError as e:
+        print("Arquivo inválido:")
+        for erro in e.erros:
+            print(f"  - {erro}")
+        raise SystemExit(1)
+    print(f"{r['linhas']} linha(s) de {', '.join(r['linhagens'])}: {r['inseridos']} inserida(s), "
+          f"{r['atualizados']} atualizada(s), {r['inalterados']} inalterada(s) em {r['segundos']} s"
+          + (" (dry-run)" if args.dry_run else ""))
+
+
+if __name__ == '__main__':
+    main()
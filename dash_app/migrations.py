@@ -0,0 +1,169 @@
+"""
+Migrações versionadas do esquema.
+
+`init_db` usa `create_all(checkfirst=True)`, que cria tabelas ausentes mas
+nunca altera tabelas que já existem. As mudanças em tabelas existentes
+(índices, colunas, chaves) ficam aqui, numeradas, e são registradas na
+tabela `schema_migrations` para rodarem uma única vez por banco.
+
+Cada migração deve ser idempotente: num banco novo o `init_db` já cria o
+esquema final, e a migração só precisa perceber que não há nada a fazer.
+
+Uso pela linha de comando:
+    python migrations.py            # aplica as pendentes
+    python migrations.py --status   # lista aplicadas/pendentes
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import (MetaData, Table, Column, Integer, String, DateTime,
+                        inspect, text)
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("nome", String(200), nullable=False),
+    Column("aplicada_em", DateTime, nullable=False),
+)
+
+_LOCK_NAME = "criacao_aves_schema_migrations"
+
+
+# ---------------------------
+# Utilitários para migrações
+# ---------------------------
+def create_index_if_missing(conn, table, name, columns, unique=False):
+    """Cria o índice `name` em `table` se não houver índice com esse nome ou essas colunas."""
+    for idx in inspect(conn).get_indexes(table):
+        if idx["name"] == name or (list(idx["column_names"]) == list(columns)
+                                   and bool(idx.get("unique")) == unique):
+            return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+    return True
+
+
+def drop_index_if_exists(conn, table, name):
+    """Remove o índice `name` de `table`, se existir."""
+    if any(idx["name"] == name for idx in inspect(conn).get_indexes(table)):
+        conn.execute(text(f"DROP INDEX {name} ON {table}"))
+        return True
+    return False
+
+
+# ---------------------------
+# Migrações
+# ---------------------------
+def _m001_indices_consultas_frequentes(conn):
+    create_index_if_missing(conn, "producao_ovos", "ix_producao_ovos_lote_data", ["lote_id", "data_producao"])
+    create_index_if_missing(conn, "producao_aves", "ix_producao_aves_lote_semana", ["lote_id", "semana_idade"])
+    create_index_if_missing(conn, "metas_linhagem", "ix_metas_linhagem_linhagem_semana", ["linhagem", "semana_idade"])
+    create_index_if_missing(conn, "lotes", "ix_lotes_status_data_alojamento", ["status", "data_alojamento"])
+
+
+def _m002_backfill_producao_ovos_mensal(conn):
+    # A tabela é criada pelo init_db; aqui só carregamos o histórico.
+    from egg_rollup import rebuild
+    rebuild(conn)
+
+
+def _m003_backfill_lote_resumo(conn):
+    from lot_summary import rebuild
+    rebuild(conn)
+
+
+def _m004_report_jobs_lote_opcional(conn):
+    # Exportações de vários lotes gravam o job sem lote_id.
+    coluna = next(c for c in inspect(conn).get_columns("report_jobs") if c["name"] == "lote_id")
+    if not coluna["nullable"]:
+        conn.execute(text("ALTER TABLE report_jobs MODIFY lote_id INTEGER NULL"))
+
+
+def _m005_metas_linhagem_chave_unica(conn):
+    # Importação em lote (metas_import.py) faz upsert por (linhagem, semana_idade).
+    # Antes da chave única, mantém só a linha mais recente (maior id) de cada par repetido.
+    conn.execute(text("""
+        DELETE m1 FROM metas_linhagem m1
+        JOIN metas_linhagem m2
+          ON m1.linhagem = m2.linhagem AND m1.semana_idade = m2.semana_idade AND m1.id < m2.id
+    """))
+    create_index_if_missing(conn, "metas_linhagem", "uq_metas_linhagem_linhagem_semana",
+                            ["linhagem", "semana_idade"], unique=True)
+    # O índice simples da migração 001 fica redundante.
+    drop_index_if_exists(conn, "metas_linhagem", "ix_metas_linhagem_linhagem_semana")
+
+
+MIGRATIONS = [
+    (1, "indices_consultas_frequentes", _m001_indices_consultas_frequentes),
+    (2, "backfill_producao_ovos_mensal", _m002_backfill_producao_ovos_mensal),
+    (3, "backfill_lote_resumo", _m003_backfill_lote_resumo),
+    (4, "report_jobs_lote_opcional", _m004_report_jobs_lote_opcional),
+    (5, "metas_linhagem_chave_unica", _m005_metas_linhagem_chave_unica),
+]
+
+
+# ---------------------------
+# Execução
+# ---------------------------
+def applied_versions(conn):
+    _meta.create_all(conn, checkfirst=True)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine, verbose=False):
+    """Aplica as migrações pendentes em ordem e retorna as versões aplicadas.
+
+    No MariaDB/MySQL usa GET_LOCK para que vários workers subindo ao mesmo
+    tempo não rodem a mesma migração em paralelo.
+    """
+    applied = []
+    with engine.connect() as conn:
+        use_lock = conn.dialect.name in ("mysql", "mariadb")
+        if use_lock and not conn.execute(text("SELECT GET_LOCK(:n, 60)"), {"n": _LOCK_NAME}).scalar():
+            raise RuntimeError("Não foi possível obter o lock de migrações.")
+        try:
+            done = applied_versions(conn)
+            conn.commit()
+            for version, nome, migrate in MIGRATIONS:
+                if version in done:
+                    continue
+                if verbose:
+                    print(f"[migrations] aplicando {version:03d} {nome}...")
+                with conn.begin():
+                    migrate(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=version, nome=nome, aplicada_em=datetime.now()
+                    ))
+                applied.append(version)
+        finally:
+            if use_lock:
+                conn.execute(text("SELECT RELEASE_LOCK(:n)"), {"n": _LOCK_NAME})
+                conn.commit()
+    return applied
+
+
+def main():
+    from db import init_db
+    from engines import shared_engine
+
+    parser = argparse.ArgumentParser(description="Aplica as migrações do banco criacao_aves.")
+    parser.add_argument("--status", action="store_true", help="Apenas lista as migrações aplicadas e pendentes.")
+    args = parser.parse_args()
+
+    engine = shared_engine()
+    init_db(engine)
+    if args.status:
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+            conn.commit()
+        for version, nome, _ in MIGRATIONS:
+            print(f"{version:03d} {nome}: {'aplicada' if version in done else 'PENDENTE'}")
+        return
+
+    applied = run_migrations(engine, verbose=True)
+    print(f"{len(applied)} migração(ões) aplicada(s)." if applied else "Banco já está atualizado.")
+
+
+if __name__ == '__main__':
+    main()
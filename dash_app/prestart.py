@@ -0,0 +1,69 @@
+"""
+Etapa de pré-inicialização: verifica o esquema e aplica as migrações uma vez,
+antes do Gunicorn subir os workers.
+
+Antes cada worker rodava `init_db` (reflexão/criação das tabelas) e
+`run_migrations` ao importar app.py: boot e reciclagem de worker lentos, e
+o app não subia se o MariaDB estivesse fora do ar naquele instante. Com
+SCHEMA_CHECK_ON_START=0 os workers pulam essa etapa e o container roda:
+
+    python prestart.py && gunicorn ... app:server
+
+Aqui esperamos o banco responder (até --tentativas x --intervalo segundos),
+criamos as tabelas ausentes, aplicamos as migrações pendentes e marcamos
+como erro os jobs de exportação que ficaram "executando" no container
+anterior (nenhum worker está vivo neste momento). O código de
+saída é diferente de zero se o banco não responder ou a migração falhar.
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from db import init_db
+from engines import shared_engine
+from migrations import run_migrations
+from report_jobs import fail_orphaned_jobs
+
+
+def wait_for_db(engine, tentativas, intervalo):
+    """Tenta `SELECT 1` até o banco responder; retorna False se esgotar as tentativas."""
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except OperationalError as e:
+            print(f"[prestart] banco indisponível ({tentativa}/{tentativas}): {e.orig}")
+            time.sleep(intervalo)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o esquema e aplica migrações antes de subir o app.")
+    parser.add_argument("--tentativas", type=int, default=30, help="Tentativas de conexão ao banco.")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre tentativas.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = shared_engine()
+    if not wait_for_db(engine, args.tentativas, args.intervalo):
+        print("[prestart] banco não respondeu; abortando.")
+        sys.exit(1)
+    t_db = time.perf_counter()
+    init_db(engine)
+    t_schema = time.perf_counter()
+    aplicadas = run_migrations(engine, verbose=True)
+    with engine.begin() as conn:
+        orfaos = fail_orphaned_jobs(conn)
+    t_fim = time.perf_counter()
+
+    print(f"[prestart] banco {t_db - t0:.2f} s | esquema {t_schema - t_db:.2f} s | "
+          f"migrações {t_fim - t_schema:.2f} s ({len(aplicadas)} aplicada(s)) | "
+          f"{orfaos} job(s) órfão(s) | total {t_fim - t0:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
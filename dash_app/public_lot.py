@@ -0,0 +1,130 @@
+"""
+Dados da página pública do lote (/public/lote/<id>), alvo do QR code.
+
+A página é aberta sem login e pode receber rajadas de acessos (ex.: QR code
+exposto numa feira). Por isso:
+  - as consultas usam um engine próprio ("public"), somente leitura, que
+    pode apontar para um usuário só com SELECT via PUBLIC_DATABASE_URL;
+  - nada de financeiro: apenas produção, mortalidade e tratamentos, com as
+    colunas que a página mostra;
+  - o resultado (tabelas já formatadas e figuras) fica num cache por lote
+    com TTL curto; acessos simultâneos ao mesmo lote disparam UMA consulta.
+
+    PUBLIC_DATABASE_URL   conexão da página pública (padrão: DATABASE_URL)
+    PUBLIC_CACHE_TTL      segundos de cache por lote, também usado no
+                          Cache-Control das respostas (padrão 60)
+"""
+import os
+
+import plotly.graph_objects as go
+import pandas as pd
+from sqlalchemy import event, text
+
+from date_ranges import last_days
+from engines import shared_engine
+from lot_kpis import fetch_lot_kpis
+from ttl_cache import TTLCache
+
+PUBLIC_CACHE_TTL = int(os.getenv("PUBLIC_CACHE_TTL", 60))
+PERIODO_DIAS = 180
+
+_cache = TTLCache(maxsize=256, ttl=PUBLIC_CACHE_TTL)
+
+# Só as colunas que a página mostra: nada financeiro (custos/receitas de
+# lote_resumo) chega ao cache nem passa pelo engine público.
+_PUBLIC_SNAPSHOT_SQL = text("""
+    SELECT l.id, l.identificador_lote, l.linhagem, l.data_alojamento,
+           COALESCE(r.ultima_semana, 0)                              AS ultima_semana,
+           COALESCE(l.aves_alojadas, 0) - COALESCE(r.mort_acumulada, 0) AS aves_atuais
+    FROM lotes l
+    LEFT JOIN lote_resumo r ON r.lote_id = l.id
+    WHERE l.id = :id
+""")
+
+
+def _set_read_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+    finally:
+        cursor.close()
+
+
+def public_engine():
+    """Engine somente leitura da página pública."""
+    engine = shared_engine("public", os.getenv("PUBLIC_DATABASE_URL"))
+    if engine.dialect.name in ("mysql", "mariadb") and not event.contains(engine, "connect", _set_read_only):
+        event.listen(engine, "connect", _set_read_only)
+    return engine
+
+
+def _fetch_view(lote_id):
+    periodo = last_days(PERIODO_DIAS)
+    params = {"id": lote_id, **periodo.params()}
+    with public_engine().connect() as conn:
+        row = conn.execute(_PUBLIC_SNAPSHOT_SQL, {"id": lote_id}).mappings().first()
+        snapshot = dict(row) if row else None
+        if snapshot is None:
+            return {}   # também vai para o cache: ids inválidos não chegam ao banco a cada acesso
+        producao = pd.read_sql(text(f"""
+            SELECT data_producao, total_ovos, ovos_quebrados
+            FROM producao_ovos
+            WHERE lote_id = :id AND {periodo.clause('data_producao')}
+            ORDER BY data_producao
+        """), conn, params=params)
+        semanal = fetch_lot_kpis(conn, lote_id)
+        tratamentos = pd.read_sql(text("""
+            SELECT data_inicio, data_termino, medicacao, forma_admin, periodo_carencia_dias
+            FROM tratamentos
+            WHERE lote_id = :id
+              AND (data_inicio >= :inicio OR data_termino >= :inicio)
+            ORDER BY data_inicio DESC
+        """), conn, params=params)
+    return _build_view(snapshot, producao, semanal, tratamentos)
+
+
+def _build_view(snapshot, producao, semanal, tratamentos):
+    producao["data_producao"] = pd.to_datetime(producao["data_producao"])
+    fig_prod = go.Figure([
+        go.Bar(x=producao["data_producao"], y=producao["total_ovos"], name="Total de Ovos"),
+        go.Scatter(x=producao["data_producao"], y=producao["ovos_quebrados"], name="Quebrados", mode="lines"),
+    ])
+    fig_prod.update_layout(title_text="Produção Diária de Ovos", template="plotly_white",
+                           legend_title_text="Legenda", margin=dict(l=40, r=20, t=50, b=40))
+
+    fig_mort = go.Figure([
+        go.Bar(x=semanal["semana_idade"], y=semanal["mort_total"], name="Mortalidade (semana)"),
+        go.Scatter(x=semanal["semana_idade"], y=semanal["mort_acum_pct"], name="Mortalidade Acumulada (%)",
+                   mode="lines+markers", yaxis="y2"),
+    ])
+    fig_mort.update_layout(title_text="Mortalidade Semanal", template="plotly_white", legend_title_text="Legenda",
+                           xaxis_title="Semana de Idade", yaxis2=dict(overlaying="y", side="right", title="%"),
+                           margin=dict(l=40, r=40, t=50, b=40))
+
+    tabela_prod = producao.sort_values("data_producao", ascending=False).head(30)
+    tabela_prod = pd.DataFrame({
+        "Data": tabela_prod["data_producao"].dt.strftime("%d/%m/%Y"),
+        "Total de Ovos": tabela_prod["total_ovos"],
+        "Ovos Quebrados": tabela_prod["ovos_quebrados"],
+    })
+    tabela_trat = pd.DataFrame({
+        "Início": pd.to_datetime(tratamentos["data_inicio"]).dt.strftime("%d/%m/%Y"),
+        "Término": pd.to_datetime(tratamentos["data_termino"]).dt.strftime("%d/%m/%Y").fillna("—"),
+        "Medicação": tratamentos["medicacao"],
+        "Administração": tratamentos["forma_admin"],
+        "Carência (dias)": tratamentos["periodo_carencia_dias"],
+    })
+    return {"snapshot": snapshot, "fig_producao": fig_prod, "fig_mortalidade": fig_mort,
+            "tabela_producao": tabela_prod, "tabela_tratamentos": tabela_trat}
+
+
+def get_public_view(lote_id):
+    """Dados prontos da página pública (dict) ou None se o lote não existe.
+
+    O dict vem do cache e é compartilhado entre requisições: não modificar.
+    """
+    return _cache.get_or_set(int(lote_id), lambda: _fetch_view(int(lote_id))) or None
+
+
+def public_cache_stats():
+    return _cache.stats()
@@ -0,0 +1,116 @@
+"""
+Versão estática (pré-renderizada) da página pública do lote.
+
+Quem escaneia o QR code no celular, muitas vezes com internet rural, não
+precisa do bundle JavaScript do Dash nem das idas e vindas de callbacks para
+ver uma página somente leitura. Esta versão responde `/public/lote/<id>` com
+um único HTML: CSS embutido, gráficos como SVG (plotly + kaleido) e tabelas
+já prontas, a partir dos mesmos dados em cache de public_lot.py. O HTML
+gerado também fica em cache por PUBLIC_CACHE_TTL segundos.
+
+A página Dash interativa continua em `/public/lote/<id>/interativo`.
+
+    PUBLIC_LOTE_RENDERER   "static" (padrão) ou "dash" para servir sempre a página Dash
+"""
+import os
+from datetime import datetime
+
+from jinja2 import Environment
+from markupsafe import Markup
+
+from public_lot import PUBLIC_CACHE_TTL, get_public_view
+from ttl_cache import TTLCache
+
+PUBLIC_LOTE_RENDERER = os.getenv("PUBLIC_LOTE_RENDERER", "static")
+
+_cache = TTLCache(maxsize=256, ttl=PUBLIC_CACHE_TTL)
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+
+PAGE_TEMPLATE = _env.from_string("""\
+<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>Lote {{ titulo }} — Visualização Pública</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0 auto; max-width: 960px; padding: 12px; color: #212529; }
+        h3 { margin: 8px 0; }
+        h4 { margin: 24px 0 8px 0; }
+        .muted { color: #6c757d; }
+        .header { display: flex; justify-content: space-between; align-items: flex-start; gap: 12px; }
+        .fig svg { width: 100%; height: auto; }
+        .scroll { overflow-x: auto; }
+        table { width: 100%; border-collapse: collapse; font-size: 14px; }
+        th, td { border: 1px solid #dee2e6; padding: 5px; text-align: center; }
+        th { background: lightgrey; }
+        .alert { background: #cff4fc; border: 1px solid #b6effb; padding: 10px; border-radius: 4px; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <div>
+            <h3>📌 Lote {{ titulo }} — Visualização Pública (Somente Leitura)</h3>
+            {% if lote %}
+            <p>Linhagem: {{ lote.linhagem or '—' }} | Alojamento: {{ alojamento }} |
+               Aves atuais: {{ lote.aves_atuais }} | Última semana registrada: {{ lote.ultima_semana }}</p>
+            {% endif %}
+            <p class="muted">Esta é uma página de acesso público. Edição desabilitada.
+               <a href="/public/lote/{{ lote_id }}/interativo">Versão interativa</a></p>
+        </div>
+        <img src="/qr/lote/{{ lote_id }}.png" alt="QR code do lote" width="120" height="120">
+    </div>
+    <hr>
+{% for titulo_secao, figura, tabela in secoes %}
+    <h4>{{ titulo_secao }}</h4>
+    {% if figura %}<div class="fig">{{ figura }}</div>{% endif %}
+    <div class="scroll">{{ tabela }}</div>
+{% endfor %}
+    <hr>
+    <p class="muted">© SGA - Visualização pública gerada automaticamente em {{ gerado_em }}.</p>
+</body>
+</html>
+""")
+
+NOT_FOUND_HTML = "<!DOCTYPE html><html><body><p>Lote não encontrado.</p></body></html>"
+
+
+def figure_svg(fig):
+    """Figura plotly como SVG inline (Markup) ou None se o kaleido não estiver disponível."""
+    try:
+        svg = fig.to_image(format="svg", width=900, height=400).decode("utf-8")
+    except Exception as e:
+        print(f"[Público] SVG indisponível: {e}")
+        return None
+    return Markup(svg[svg.find("<svg"):])
+
+
+def _table(df, vazio):
+    if df.empty:
+        return Markup(f'<div class="alert">{vazio}</div>')
+    return Markup(df.to_html(index=False, border=0, na_rep="—"))
+
+
+def _render(lote_id):
+    view = get_public_view(lote_id)
+    if view is None:
+        return ""   # em cache também: id inválido
+    lote = view["snapshot"]
+    secoes = [
+        ("📊 Produção (últimos 180 dias)", figure_svg(view["fig_producao"]),
+         _table(view["tabela_producao"], "Sem produção registrada nos últimos 180 dias.")),
+        ("📉 Mortalidade & Desempenho", figure_svg(view["fig_mortalidade"]), ""),
+        ("🩺 Tratamentos (últimos 180 dias)", None,
+         _table(view["tabela_tratamentos"], "Sem tratamentos nos últimos 180 dias.")),
+    ]
+    return PAGE_TEMPLATE.render(
+        lote_id=lote_id, lote=lote, titulo=lote["identificador_lote"],
+        alojamento=lote["data_alojamento"].strftime("%d/%m/%Y") if lote["data_alojamento"] else "—",
+        secoes=secoes, gerado_em=datetime.now().strftime("%d/%m/%Y %H:%M"),
+    )
+
+
+def render_public_page(lote_id):
+    """HTML completo da página pública estática, ou None se o lote não existe."""
+    return _cache.get_or_set(int(lote_id), lambda: _render(int(lote_id))) or None
@@ -0,0 +1,71 @@
+"""
+QR codes dos lotes, gerados uma única vez e reaproveitados.
+
+A URL pública de um lote (/public/lote/<id>) nunca muda, então o PNG do QR
+code também não. Cada imagem é gravada em disco com o nome derivado do hash
+da URL (QR_CACHE_DIR) e, dentro de cada processo, os bytes ficam em memória.
+O mesmo arquivo atende o PDF (como data URI), a rota `/qr/lote/<id>.png`
+(com cache HTTP longo) e a página pública.
+
+    PUBLIC_BASE_URL   endereço público do painel (padrão http://nancy.ifrn.edu.br/)
+    QR_CACHE_DIR      pasta das imagens (padrão /tmp/relatorios/qr)
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://nancy.ifrn.edu.br/")
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", "/tmp/relatorios/qr")
+
+
+def public_lote_url(lote_id):
+    return f"{PUBLIC_BASE_URL.rstrip('/')}/public/lote/{lote_id}"  # ✅ ROTA PÚBLICA
+
+
+def _render_png(url):
+    import qrcode  # importação só quando a imagem ainda não existe
+    from io import BytesIO
+
+    qr = qrcode.QRCode(version=1, box_size=6, border=2)
+    qr.add_data(url)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def qr_png_path(url):
+    """Caminho do PNG do QR code de `url`, gerando o arquivo se ainda não existir."""
+    path = os.path.join(QR_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".png")
+    if not os.path.exists(path):
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".png.tmp", dir=QR_CACHE_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_render_png(url))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return path
+
+
+@lru_cache(maxsize=512)
+def qr_png_bytes(url):
+    with open(qr_png_path(url), "rb") as f:
+        return f.read()
+
+
+def qr_data_uri(url):
+    """PNG do QR code de `url` como data URI ("" se a imagem não puder ser gerada)."""
+    try:
+        return "data:image/png;base64," + base64.b64encode(qr_png_bytes(url)).decode("ascii")
+    except Exception:
+        return ""  # fallback: o relatório mostra a URL em texto
+
+
+def lote_qr_path(lote_id):
+    return qr_png_path(public_lote_url(lote_id))
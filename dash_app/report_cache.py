@@ -0,0 +1,138 @@
+"""
+Cache em disco dos PDFs de relatório, endereçado pelo conteúdo.
+
+A chave é o id do lote + uma "impressão digital" dos dados que entram no
+relatório (quantidade e maior id das tabelas do lote, somas que mudam em
+upserts, dados cadastrais e o dia corrente, já que a janela de 180 dias
+anda todo dia). Se nada mudou, o PDF já gerado é servido direto do disco.
+
+Cada geração escreve em um arquivo temporário exclusivo e o move para o
+nome final com `os.replace` (atômico), então cliques simultâneos no mesmo
+lote não sobrescrevem o arquivo um do outro. `get_or_build` ainda serializa
+as gerações do mesmo lote com um lock de arquivo: o mesmo lote pedido por
+dois navegadores (em workers diferentes) é gerado uma vez só. O tamanho total é limitado
+por REPORT_CACHE_MAX_MB, descartando os arquivos usados há mais tempo.
+
+    REPORT_CACHE_DIR     pasta do cache (padrão /tmp/relatorios/cache)
+    REPORT_CACHE_MAX_MB  tamanho máximo do cache em MB (padrão 200)
+"""
+import fcntl
+import glob
+import hashlib
+import os
+import tempfile
+from datetime import date
+
+from sqlalchemy import text
+
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "/tmp/relatorios/cache")
+REPORT_CACHE_MAX_BYTES = int(float(os.getenv("REPORT_CACHE_MAX_MB", 200)) * 1024 * 1024)
+
+# Incrementar quando o layout do relatório mudar, para invalidar PDFs antigos.
+REPORT_LAYOUT_VERSION = 4
+
+_FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT CONCAT_WS(':', identificador_lote, linhagem, data_alojamento, aves_alojadas)
+           FROM lotes WHERE id = :id) AS lote,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0))
+           FROM producao_ovos WHERE lote_id = :id) AS producao_ovos,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0))
+           FROM producao_aves WHERE lote_id = :id) AS producao_aves,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0))
+           FROM tratamentos WHERE lote_id = :id) AS tratamentos,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(ph), 0), COALESCE(SUM(alcalinidade_ppm), 0))
+           FROM qualidade_agua WHERE lote_id = :id) AS qualidade_agua,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0))
+           FROM custos_lote WHERE lote_id = :id) AS custos_lote,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(id), 0))
+           FROM receitas_lote WHERE lote_id = :id) AS receitas_lote
+""")
+
+
+def data_fingerprint(conn, lote_id, today=None):
+    """Hash curto que muda sempre que algum dado do relatório do lote muda."""
+    row = conn.execute(_FINGERPRINT_SQL, {"id": lote_id}).mappings().first()
+    partes = [f"v{REPORT_LAYOUT_VERSION}", str(today or date.today()),
+              *(f"{k}={row[k]}" for k in sorted(row.keys()))]
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()[:24]
+
+
+def cached_path(lote_id, fingerprint):
+    return os.path.join(REPORT_CACHE_DIR, f"lote_{lote_id}_{fingerprint}.pdf")
+
+
+def lookup(lote_id, fingerprint):
+    """Caminho do PDF em cache (marcando-o como usado agora) ou None."""
+    path = cached_path(lote_id, fingerprint)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def store(lote_id, fingerprint, write):
+    """Gera o PDF com `write(tmp_path)` em arquivo temporário exclusivo e publica no cache.
+
+    Remove versões antigas do mesmo lote e aplica o limite de tamanho.
+    """
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    final = cached_path(lote_id, fingerprint)
+    fd, tmp = tempfile.mkstemp(prefix=f"lote_{lote_id}_", suffix=".pdf.tmp", dir=REPORT_CACHE_DIR)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, final)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    for antigo in glob.glob(os.path.join(REPORT_CACHE_DIR, f"lote_{lote_id}_*.pdf")):
+        if antigo != final:
+            _remove_quietly(antigo)
+    evict()
+    return final
+
+
+def get_or_build(lote_id, fingerprint, write):
+    """PDF do cache ou gerado por `write(tmp_path)`, uma única geração por lote de cada vez.
+
+    O lock (flock) é liberado pelo sistema se o processo morrer, ex.: job cancelado.
+    """
+    cached = lookup(lote_id, fingerprint)
+    if cached:
+        return cached
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(REPORT_CACHE_DIR, f"lote_{lote_id}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # quem esperou o lock encontra o PDF que o outro processo acabou de gerar
+            return lookup(lote_id, fingerprint) or store(lote_id, fingerprint, write)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def evict(max_bytes=None):
+    """Apaga os PDFs menos recentemente usados até o cache caber em `max_bytes`."""
+    max_bytes = REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    arquivos = []
+    for path in glob.glob(os.path.join(REPORT_CACHE_DIR, "*.pdf")):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        arquivos.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in arquivos)
+    for _, size, path in sorted(arquivos):
+        if total <= max_bytes:
+            break
+        _remove_quietly(path)
+        total -= size
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
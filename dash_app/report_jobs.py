@@ -0,0 +1,130 @@
+"""
+Fila local das exportações de relatórios de vários lotes.
+
+Exportar vários PDFs (batch_reports.py) leva de segundos a minutos. O
+callback apenas registra um job na tabela `report_jobs` (com `lote_id`
+nulo) e uma thread do worker acompanha o pool de processos da exportação,
+sem broker externo. A página acompanha o progresso com um `dcc.Interval` e
+baixa o arquivo quando o job termina; como o estado fica no banco,
+qualquer worker pode responder ao polling.
+
+O PDF de um único lote é gerado num callback em background do Dash
+(background.py), com o cache de relatórios (report_cache.py).
+
+Jobs órfãos: a thread morre junto com o worker. Um desligamento normal do
+worker (max_requests, deploy) marca os jobs dele como erro (hook
+`worker_exit` do gunicorn.conf.py); `prestart.py` marca os que sobraram de
+um container anterior; e um job sem atualização há mais de
+REPORT_JOB_TIMEOUT segundos é gravado como erro na próxima consulta. No
+worker gevent a exportação é recusada: threads e o pool de processos
+rodariam sobre as primitivas trocadas pelo monkey patching.
+
+    REPORT_JOB_TIMEOUT   segundos sem atualização até o job ser dado como perdido (padrão 600)
+"""
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from engines import shared_engine
+
+REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", 600))
+ABANDONED_MSG = "Interrompido: o worker que executava o job foi encerrado."
+
+_running = set()   # jobs com thread viva neste processo
+
+
+def _update_job(job_id, **fields):
+    sets = ", ".join(f"{k} = :{k}" for k in fields)
+    with shared_engine().begin() as conn:
+        conn.execute(text(f"UPDATE report_jobs SET {sets}, atualizado_em = :agora WHERE id = :id"),
+                     {**fields, "agora": datetime.now(), "id": job_id})
+
+
+def _insert_job(conn, job_id, lote_id, status, progresso, mensagem, arquivo=None):
+    agora = datetime.now()
+    conn.execute(text("""
+        INSERT INTO report_jobs (id, lote_id, status, progresso, mensagem, arquivo, criado_em, atualizado_em)
+        VALUES (:id, :lote_id, :status, :progresso, :mensagem, :arquivo, :agora, :agora)
+    """), {"id": job_id, "lote_id": lote_id, "status": status, "progresso": progresso,
+           "mensagem": mensagem, "arquivo": arquivo, "agora": agora})
+
+
+def run_batch_job(job_id, lote_ids, formato):
+    """Executa uma exportação de vários lotes (roda numa thread do worker web)."""
+    from batch_reports import export_batch
+
+    _running.add(job_id)
+    try:
+        _update_job(job_id, status="executando", progresso=5, mensagem="Consultando lotes")
+        progress = lambda pct, msg: _update_job(job_id, progresso=pct, mensagem=msg)
+        try:
+            path = export_batch(lote_ids, formato, progress=progress)
+        except Exception as e:
+            _update_job(job_id, status="erro", mensagem=str(e)[:255])
+            return None
+        _update_job(job_id, status="concluido", progresso=100, mensagem="Concluído", arquivo=path)
+        return path
+    finally:
+        _running.discard(job_id)
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def submit_batch(lote_ids=None, formato="zip"):
+    """Registra uma exportação de vários lotes (padrão: ativos) e retorna {id, status, arquivo}.
+
+    Levanta RuntimeError no worker gevent.
+    """
+    if _gevent_patched():
+        raise RuntimeError("Exportação em lote indisponível no worker gevent; use "
+                           "`python batch_reports.py` ou o worker gthread.")
+    job = {"id": uuid.uuid4().hex, "status": "pendente", "arquivo": None}
+    with shared_engine().begin() as conn:
+        _insert_job(conn, job["id"], None, "pendente", 0, "Na fila")
+    threading.Thread(target=run_batch_job, args=(job["id"], lote_ids, formato),
+                     name=f"batch-{job['id'][:8]}", daemon=True).start()
+    return job
+
+
+def get_job(job_id):
+    """Estado atual do job (dict) ou None.
+
+    Um job pendente/executando sem atualização há mais de REPORT_JOB_TIMEOUT
+    segundos (ex.: worker reiniciado) é reportado como erro.
+    """
+    with shared_engine().connect() as conn:
+        row = conn.execute(text("SELECT * FROM report_jobs WHERE id = :id"), {"id": job_id}).mappings().first()
+    if not row:
+        return None
+    job = dict(row)
+    if (job["status"] in ("pendente", "executando")
+            and datetime.now() - job["atualizado_em"] > timedelta(seconds=REPORT_JOB_TIMEOUT)):
+        job.update(status="erro", mensagem="Tempo esgotado: o job foi interrompido.")
+        _update_job(job_id, status="erro", mensagem=job["mensagem"])
+    return job
+
+
+def abandon_running_jobs():
+    """Marca como erro os jobs com thread viva neste processo (chamar quando o worker sai)."""
+    for job_id in list(_running):
+        try:
+            _update_job(job_id, status="erro", mensagem=ABANDONED_MSG)
+        except Exception as e:
+            print(f"[report_jobs] não foi possível marcar o job {job_id}: {e}")
+
+
+def fail_orphaned_jobs(conn):
+    """Marca como erro todos os jobs pendentes/executando (no prestart, sem workers vivos)."""
+    return conn.execute(text("""
+        UPDATE report_jobs SET status = 'erro', mensagem = :msg, atualizado_em = :agora
+        WHERE status IN ('pendente', 'executando')
+    """), {"msg": ABANDONED_MSG, "agora": datetime.now()}).rowcount
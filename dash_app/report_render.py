@@ -0,0 +1,182 @@
+"""
+Renderização HTML do relatório do lote (PDF e pré-visualização).
+
+Antes cada linha das tabelas era montada com `df.iterrows()` e concatenada
+com `+=`, o que fica lento em lotes com 180 dias de produção diária. Aqui:
+  - cada coluna é formatada de uma vez (datas, inteiros, moeda, texto);
+  - as linhas `<tr>` são montadas somando as colunas já formatadas (pandas)
+    e unidas com um único `"".join`;
+  - o esqueleto da página é um template Jinja2 compilado na importação.
+
+O mesmo `render_report` serve ao PDF (WeasyPrint) e à pré-visualização
+em HTML na aba de relatórios.
+"""
+from html import escape
+from typing import Callable, NamedTuple
+
+import pandas as pd
+from jinja2 import Environment
+from markupsafe import Markup
+
+
+# ---------------------------
+# Formatadores por coluna (recebem e devolvem uma Series)
+# ---------------------------
+def fmt_date(col):
+    dt = pd.to_datetime(col, errors="coerce")
+    return dt.dt.strftime("%d/%m/%Y").fillna("")
+
+
+def fmt_int(col):
+    return pd.to_numeric(col, errors="coerce").fillna(0).astype("int64").astype(str)
+
+
+def fmt_float(col, casas=2):
+    return pd.to_numeric(col, errors="coerce").fillna(0).round(casas).map(f"{{:.{casas}f}}".format)
+
+
+def fmt_brl(col):
+    return "R$ " + pd.to_numeric(col, errors="coerce").fillna(0).map("{:,.2f}".format)
+
+
+def fmt_text(col, maxlen=None):
+    s = col.fillna("").astype(str).str.strip()
+    if maxlen:
+        longo = s.str.len() > maxlen
+        s = s.where(~longo, s.str.slice(0, maxlen - 3) + "...")
+    return s.map(escape)
+
+
+def fmt_text_truncated(col):
+    return fmt_text(col, maxlen=120)
+
+
+# ---------------------------
+# Classes CSS por célula (recebem uma Series e devolvem os nomes das classes)
+# ---------------------------
+def css_sign(col):
+    """Classe por célula: valor-positivo (>= 0) ou valor-negativo."""
+    valores = pd.to_numeric(col, errors="coerce").fillna(0)
+    return pd.Series("valor-positivo", index=col.index).where(valores >= 0, "valor-negativo")
+
+
+def css_sign_bold(col):
+    return "destaque " + css_sign(col)
+
+
+class Column(NamedTuple):
+    header: str
+    key: str
+    fmt: Callable = fmt_text
+    align: str = "left"
+    css: object = ""   # classe(s) da coluna inteira (str) ou função Series -> classes por célula
+
+
+# ---------------------------
+# Tabelas
+# ---------------------------
+def table_html(df, columns, empty_msg="Sem registros"):
+    """Tabela HTML de `df` com as colunas declaradas, formatada coluna a coluna."""
+    head = "".join(f"<th>{escape(c.header)}</th>" for c in columns)
+    if df is None or df.empty:
+        body = f'<tr><td colspan="{len(columns)}" style="text-align:center">{escape(empty_msg)}</td></tr>'
+    else:
+        rows = pd.Series("<tr>", index=df.index)
+        for c in columns:
+            estilo = ' style="text-align:right"' if c.align == "right" else ""
+            if callable(c.css):
+                td = '<td class="' + c.css(df[c.key]) + '"' + estilo + ">"
+            elif c.css:
+                td = f'<td class="{c.css}"{estilo}>'
+            else:
+                td = f"<td{estilo}>"
+            rows = rows + td + c.fmt(df[c.key]) + "</td>"
+        body = "".join((rows + "</tr>").tolist())
+    return Markup(f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>")
+
+
+# ---------------------------
+# Página
+# ---------------------------
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+
+REPORT_TEMPLATE = _env.from_string("""\
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        @page {
+            size: A4;                 /* RETRATO */
+            margin: 12mm;
+            @bottom-right {
+                content: "Página " counter(page) " de " counter(pages) " — Gerado automaticamente pelo Sistema de Gestão Avícola - IFRN | {{ gerado_em }} | Últimos 180 dias";
+                font-size: 10px;
+                color: #666;
+            }
+        }
+        body { font-family: Arial, sans-serif; font-size: 12px; color: #111; }
+        h1 { text-align: center; margin: 0 0 6px 0; }
+        h2 { margin: 16px 0 6px 0; }
+        table { width: 100%; border-collapse: collapse; margin: 6px 0 12px 0; }
+        th, td { border: 1px solid #333; padding: 6px; text-align: left; }
+        thead th { background: #efefef; }
+        .header {
+            border-bottom: 2px solid #333; padding-bottom: 6px; margin-bottom: 10px;
+            display: flex; justify-content: space-between; align-items: flex-start;
+        }
+        .owner-box { border: 1px solid #555; padding: 8px; margin: 8px 0; background: #f8f8f8; }
+        .id-box {
+            border: 1px solid #333; padding: 8px; margin: 6px 0;
+            display: grid; grid-template-columns: 1fr 1fr; gap: 4px;
+        }
+        .qr { border: 1px solid #aaa; padding: 8px; display: inline-block; margin-top: 4px; }
+        .period-note { font-size: 11px; color: #666; margin-top: 4px; }
+        .valor-negativo { color: #b00020; }
+        .valor-positivo { color: #006400; }
+        .destaque { font-weight: bold; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <div>
+            <h1>Relatório do Lote {{ lote.identificador_lote }}</h1>
+            <div style="font-size:12px;color:#333;">Painel: {{ lote_url }}</div>
+            <div class="period-note">
+                Período incluído neste relatório: últimos 180 dias (a partir de {{ inicio_periodo }})
+            </div>
+        </div>
+        <div class="qr">
+        {% if qr_src %}
+            <img src="{{ qr_src }}" style="width:160px;height:160px" />
+        {% else %}
+            <div style="border:1px dashed #888; padding:10px; font-size:12px">
+                Acesse o painel do lote:<br><b>{{ lote_url }}</b>
+            </div>
+        {% endif %}
+        </div>
+    </div>
+
+    <div class="owner-box">
+        <b>Proprietária:</b> {{ proprietaria }} &nbsp; | &nbsp; <b>CPF:</b> {{ cpf }}<br>
+        <b>Responsável Técnico:</b> {{ responsavel_tecnico }}
+    </div>
+
+    <div class="id-box">
+        <div><b>Linhagem:</b> {{ lote.linhagem or '' }}</div>
+        <div><b>Data de Alojamento:</b> {{ lote.data_alojamento }}</div>
+        <div><b>Aves Alojadas:</b> {{ lote.aves_alojadas }}</div>
+        <div><b>ID Interno:</b> {{ lote_id }}</div>
+    </div>
+{% for titulo, tabela in secoes %}
+
+    <h2>{{ titulo }}</h2>
+    {{ tabela }}
+{% endfor %}
+</body>
+</html>
+""")
+
+
+def render_report(**context):
+    """HTML completo do relatório (ver REPORT_TEMPLATE para as chaves do contexto)."""
+    return REPORT_TEMPLATE.render(**context)
@@ -0,0 +1,249 @@
+"""
+Relatório completo do lote em PDF (produção, mortalidade, tratamentos,
+água, financeiro, QR code e rodapé).
+
+Fica fora dos callbacks para poder rodar em um processo separado do worker
+web (callback em background, background.py; exportação em lote,
+report_jobs.py). `progress(pct, mensagem)`, quando informado, é
+chamado a cada etapa. A montagem do HTML fica em report_render.py.
+"""
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from date_ranges import DateRange, current_month, last_days, month_start, month_label
+from egg_rollup import fetch_monthly_many
+from lot_kpis import fetch_lot_kpis
+from engines import shared_engine
+from qr_assets import public_lote_url, qr_data_uri
+from report_render import (Column, table_html, render_report, fmt_date, fmt_int,
+                           fmt_float, fmt_brl, fmt_text, fmt_text_truncated, css_sign_bold)
+
+PERIODO_DIAS = 180
+
+PROPRIETARIA = "Rosilene Duarte de Lima"
+CPF = "566.408.974-15"
+RESPONSAVEL_TECNICO = "Ernesto Guevara"
+
+
+def _report(progress, pct, mensagem):
+    if progress:
+        progress(pct, mensagem)
+
+
+# ---------------------------
+# (1) BUSCAS NO BANCO (180d)
+# ---------------------------
+# Tabelas do relatório: (chave, SQL). Todas filtram `lote_id IN :ids`, então
+# o mesmo conjunto de consultas atende um lote ou a granja inteira.
+def _report_queries(periodo):
+    return [
+        # Produção de ovos (últimos 180 dias)
+        ("prod_ovos", f"""
+            SELECT lote_id, data_producao, total_ovos, ovos_quebrados
+            FROM producao_ovos
+            WHERE lote_id IN :ids
+              AND {periodo.clause('data_producao')}
+            ORDER BY data_producao DESC
+        """),
+        # Tratamentos (qualquer início ou término no período)
+        ("tratamentos", """
+            SELECT lote_id, data_inicio, data_termino, medicacao, forma_admin,
+                   periodo_carencia_dias, motivacao, responsavel, custo_estimado
+            FROM tratamentos
+            WHERE lote_id IN :ids
+              AND (data_inicio >= :inicio OR data_termino >= :inicio)
+            ORDER BY data_inicio DESC
+        """),
+        # 💧 Qualidade da Água (últimos 180 dias)
+        ("agua", f"""
+            SELECT lote_id, data_medicao, ph, alcalinidade_ppm
+            FROM qualidade_agua
+            WHERE lote_id IN :ids
+              AND {periodo.clause('data_medicao')}
+            ORDER BY data_medicao DESC
+        """),
+        # Financeiro (custos e receitas no período; os totais saem destes mesmos dados)
+        ("custos", f"""
+            SELECT lote_id, data, tipo_custo AS tipo, descricao, valor
+            FROM custos_lote
+            WHERE lote_id IN :ids
+              AND {periodo.clause('data')}
+            ORDER BY data DESC
+        """),
+        ("receitas", f"""
+            SELECT lote_id, data, tipo_receita AS tipo, descricao, valor
+            FROM receitas_lote
+            WHERE lote_id IN :ids
+              AND {periodo.clause('data')}
+            ORDER BY data DESC
+        """),
+    ]
+
+
+def _split_by_lote(df, lote_ids):
+    grupos = {lote_id: grupo.drop(columns="lote_id") for lote_id, grupo in df.groupby("lote_id", sort=False)}
+    vazio = df.drop(columns="lote_id").iloc[0:0]
+    return {lote_id: grupos.get(lote_id, vazio) for lote_id in lote_ids}
+
+
+def fetch_reports_data(conn, lote_ids, periodo=None):
+    """Dados do relatório de vários lotes com uma consulta por tabela.
+
+    Retorna {lote_id: dados} no formato de `fetch_report_data`; lotes
+    inexistentes ficam de fora.
+    """
+    periodo = periodo or last_days(PERIODO_DIAS)
+    ids = {"ids": tuple(lote_ids)}
+
+    # Info dos lotes
+    lotes = {row["id"]: dict(row) for row in conn.execute(
+        text("""
+            SELECT id, identificador_lote, linhagem, data_alojamento, aves_alojadas
+            FROM lotes WHERE id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), ids
+    ).mappings()}
+    lote_ids = [lote_id for lote_id in lote_ids if lote_id in lotes]
+    if not lote_ids:
+        return {}
+    ids = {"ids": tuple(lote_ids)}
+
+    tabelas = {}
+    for chave, sql in _report_queries(periodo):
+        df = pd.read_sql(text(sql).bindparams(bindparam("ids", expanding=True)), conn,
+                         params={**ids, **periodo.params()})
+        tabelas[chave] = _split_by_lote(df, lote_ids)
+
+    # Desempenho semanal com os acumulados desde o alojamento (lot_kpis.py),
+    # mostrando as semanas pesadas no período
+    kpis = fetch_lot_kpis(conn, lote_ids)
+    pesagem = pd.to_datetime(kpis["data_pesagem"])
+    no_periodo = pesagem >= pd.Timestamp(periodo.inicio)
+    if periodo.fim is not None:
+        no_periodo &= pesagem < pd.Timestamp(periodo.fim)
+    tabelas["semanal"] = _split_by_lote(kpis[no_periodo], lote_ids)
+
+    # Resumo mensal (pré-agregado) dos meses cobertos pelo período
+    mensal = fetch_monthly_many(conn, lote_ids, DateRange(month_start(periodo.inicio), current_month().fim))
+    tabelas["prod_mensal"] = _split_by_lote(mensal, lote_ids)
+
+    return {
+        lote_id: {"lote_id": lote_id, "lote": lotes[lote_id], "periodo": periodo,
+                  **{chave: por_lote[lote_id] for chave, por_lote in tabelas.items()}}
+        for lote_id in lote_ids
+    }
+
+
+def fetch_report_data(conn, lote_id, periodo=None):
+    """Dados do relatório de um lote no período (padrão: últimos 180 dias)."""
+    dados = fetch_reports_data(conn, [lote_id], periodo).get(lote_id)
+    if dados is None:
+        raise ValueError(f"Lote {lote_id} não encontrado.")
+    return dados
+
+
+# ---------------------------
+# (2) TABELAS E HTML FINAL
+# ---------------------------
+COLS_PROD = [Column("Data", "data_producao", fmt_date), Column("Total de Ovos", "total_ovos", fmt_int, "right"),
+             Column("Ovos Quebrados", "ovos_quebrados", fmt_int, "right")]
+COLS_MENSAL = [Column("Mês", "mes_label"), Column("Total de Ovos", "total_ovos", fmt_int, "right"),
+               Column("Ovos Quebrados", "ovos_quebrados", fmt_int, "right"),
+               Column("Dias Registrados", "dias_registrados", fmt_int, "right")]
+COLS_SEMANAL = [Column("Semana", "semana_idade", fmt_int, "right"), Column("Aves", "aves_na_semana", fmt_int, "right"),
+                Column("Mort. (sem)", "mort_total", fmt_int, "right"),
+                Column("Mort. Acum. (%)", "mort_acum_pct", fmt_float, "right"),
+                Column("Data Pesagem", "data_pesagem", fmt_date),
+                Column("Peso Médio (g)", "peso_medio", fmt_float, "right"),
+                Column("Consumo (g/ave/dia)", "consumo_real_ave_dia", fmt_float, "right"),
+                Column("CA", "conv_alimentar", fmt_float, "right")]
+COLS_TRAT = [Column("Início (Quando)", "data_inicio", fmt_date), Column("Término (Quando)", "data_termino", fmt_date),
+             Column("O Quê (Medicação)", "medicacao"), Column("Por Quê (Motivação)", "motivacao"),
+             Column("Quem (Responsável)", "responsavel"), Column("Como (Admin.)", "forma_admin"),
+             Column("Quanto (Custo R$)", "custo_estimado", fmt_brl, "right")]
+COLS_AGUA = [Column("Data", "data_medicao", fmt_date), Column("pH", "ph", fmt_float, "right"),
+             Column("Alcalinidade (ppm)", "alcalinidade_ppm", fmt_int, "right")]
+COLS_FIN = [Column("Data", "data", fmt_date), Column("Tipo", "tipo", fmt_text),
+            Column("Descrição", "descricao", fmt_text_truncated), Column("Valor", "valor", fmt_brl, "right")]
+COLS_RESUMO_FIN = [Column("Total de Custos", "total_custos", fmt_brl, "right", "valor-negativo"),
+                   Column("Total de Receitas", "total_receitas", fmt_brl, "right", "valor-positivo"),
+                   Column("Saldo", "saldo", fmt_brl, "right", css_sign_bold)]
+
+
+def render_report_html(dados, qr_src=None):
+    """Monta o HTML do relatório a partir de `fetch_report_data`."""
+    lote_id = dados["lote_id"]
+    periodo = dados["periodo"]
+    lote_url = public_lote_url(lote_id)
+    if qr_src is None:
+        qr_src = qr_data_uri(lote_url)
+
+    mensal = dados["prod_mensal"].copy()
+    mensal["mes_label"] = [month_label(a, m) for a, m in zip(mensal["ano"], mensal["mes"])]
+
+    total_custos = float(dados["custos"]["valor"].sum())
+    total_receitas = float(dados["receitas"]["valor"].sum())
+    resumo_fin = pd.DataFrame([{"total_custos": total_custos, "total_receitas": total_receitas,
+                                "saldo": total_receitas - total_custos}])
+
+    secoes = [
+        ("Produção de Ovos — Resumo Mensal", table_html(mensal, COLS_MENSAL)),
+        ("Produção de Ovos (últimos 180 dias)",
+         table_html(dados["prod_ovos"].sort_values("data_producao"), COLS_PROD)),
+        ("Mortalidade & Desempenho Semanal", table_html(dados["semanal"], COLS_SEMANAL)),
+        ("🩺 Plano de Ação 5W2H (Tratamentos)",
+         table_html(dados["tratamentos"], COLS_TRAT, "Sem registros de tratamento")),
+        ("💧 Qualidade da Água (últimos 180 dias)",
+         table_html(dados["agua"], COLS_AGUA, "Sem registros de qualidade da água nos últimos 180 dias.")),
+        ("Financeiro — Custos", table_html(dados["custos"], COLS_FIN)),
+        ("Financeiro — Receitas", table_html(dados["receitas"], COLS_FIN)),
+        ("Resumo Financeiro", table_html(resumo_fin, COLS_RESUMO_FIN)),
+    ]
+
+    return render_report(
+        lote_id=lote_id, lote=dados["lote"], lote_url=lote_url, qr_src=qr_src,
+        inicio_periodo=periodo.inicio.strftime("%d/%m/%Y"),
+        gerado_em=datetime.now().strftime("%d/%m/%Y %H:%M"),
+        proprietaria=PROPRIETARIA, cpf=CPF, responsavel_tecnico=RESPONSAVEL_TECNICO,
+        secoes=secoes,
+    )
+
+
+def build_report_html(lote_id, progress=None):
+    """Consulta os dados dos últimos 180 dias e monta o HTML do relatório."""
+    with shared_engine().connect() as conn:
+        dados = fetch_report_data(conn, lote_id)
+    _report(progress, 30, "Dados carregados")
+    html_content = render_report_html(dados)
+    _report(progress, 50, "HTML montado")
+    return html_content
+
+
+def write_report_pdf(lote_id, pdf_path, progress=None, dados=None):
+    """Gera o PDF do relatório do lote em `pdf_path` e retorna o caminho.
+
+    `dados` (de `fetch_reports_data`) evita consultar o banco de novo na exportação em lote.
+    """
+    from weasyprint import HTML  # importação pesada: só quando for gerar
+
+    if dados is None:
+        html_content = build_report_html(lote_id, progress)
+    else:
+        html_content = render_report_html(dados)
+    _report(progress, 60, "Renderizando PDF")
+    HTML(string=html_content).write_pdf(pdf_path)
+    _report(progress, 100, "Concluído")
+    return pdf_path
+
+
+def cached_report_pdf(lote_id, progress=None):
+    """Caminho do PDF do lote no cache de relatórios, gerando-o se os dados mudaram."""
+    import report_cache
+
+    with shared_engine().connect() as conn:
+        fingerprint = report_cache.data_fingerprint(conn, lote_id)
+    _report(progress, 5, "Verificando cache")
+    return report_cache.get_or_build(
+        lote_id, fingerprint, lambda tmp_path: write_report_pdf(lote_id, tmp_path, progress=progress)
+    )
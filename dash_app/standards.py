@@ -0,0 +1,115 @@
+"""
+Padrões de linhagem (`metas_linhagem`) em memória.
+
+Os padrões mudam raramente, mas eram consultados a cada gráfico, a cada
+abertura da tabela de metas e a cada `SELECT DISTINCT linhagem`. Aqui a
+tabela inteira é carregada uma vez por processo e mantida como:
+
+  - `rows`: o DataFrame da tabela (com id, para a tabela editável de metas);
+  - `curves`: linhagem -> {coluna: array NumPy indexado pela semana},
+    com interpolação linear nas semanas sem registro (NaN fora do
+    intervalo cadastrado).
+
+A cópia é versionada pelo contador "metas" do armazenamento local
+(local_store.py), incrementado por `save_new_meta`/`delete_meta_row`:
+quando um worker altera os padrões, os outros recarregam na próxima
+leitura. STANDARDS_TTL limita a idade da cópia para alterações feitas fora
+do app.
+
+    STANDARDS_TTL   segundos até recarregar mesmo sem mudança de versão (padrão 600)
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from engines import shared_engine
+from local_store import get_store
+from typed_queries import read_typed, METAS_TODAS
+
+STANDARDS_TTL = int(os.getenv("STANDARDS_TTL", 600))
+METAS_VERSION_KEY = "metas"
+COLUMNS = ["peso_medio_g", "consumo_ave_dia_g", "consumo_acum_g", "mortalidade_acum_pct"]
+
+
+class Standards:
+    """Padrões de todas as linhagens, com consulta por semana em memória."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.curves = {}
+        for linhagem, grupo in rows.groupby("linhagem", observed=True, sort=True):
+            por_semana = grupo.groupby("semana_idade")[COLUMNS].mean()
+            semanas = por_semana.index.to_numpy()
+            grade = np.arange(int(semanas.max()) + 1)
+            curva = {}
+            for col in COLUMNS:
+                valores = por_semana[col].to_numpy(dtype="float64")
+                conhecidas = ~np.isnan(valores)
+                arr = np.full(len(grade), np.nan, dtype="float32")
+                if conhecidas.any():
+                    x, y = semanas[conhecidas], valores[conhecidas]
+                    dentro = (grade >= x.min()) & (grade <= x.max())
+                    arr[dentro] = np.interp(grade[dentro], x, y)
+                curva[col] = arr
+            self.curves[str(linhagem)] = curva
+
+    def linhagens(self):
+        return list(self.curves)
+
+    def lookup(self, linhagem, coluna, semanas):
+        """Valores do padrão de `linhagem` nas `semanas` (array; NaN onde não há padrão)."""
+        semanas = np.asarray(semanas, dtype="float64")
+        saida = np.full(semanas.shape, np.nan, dtype="float32")
+        arr = self.curves.get(linhagem, {}).get(coluna)
+        if arr is None:
+            return saida
+        validas = ~np.isnan(semanas) & (semanas >= 0) & (semanas < len(arr))
+        saida[validas] = arr[semanas[validas].astype(int)]
+        return saida
+
+    def curve(self, linhagem):
+        """Curva do padrão (semana_idade + colunas) das semanas com algum valor, para plotar."""
+        curva = self.curves.get(linhagem)
+        if not curva:
+            return pd.DataFrame(columns=["semana_idade", *COLUMNS])
+        df = pd.DataFrame(curva)
+        df.insert(0, "semana_idade", np.arange(len(df), dtype="int16"))
+        return df.dropna(subset=COLUMNS, how="all").reset_index(drop=True)
+
+
+_lock = threading.Lock()
+_current = None
+_loaded_version = None
+_loaded_at = 0.0
+
+
+def _store_version():
+    try:
+        return get_store().version(METAS_VERSION_KEY)
+    except Exception:
+        return None
+
+
+def get_standards():
+    """Padrões atuais deste processo, recarregados se a versão mudou ou o TTL venceu."""
+    global _current, _loaded_version, _loaded_at
+    versao = _store_version()
+    if (_current is not None and versao == _loaded_version
+            and time.monotonic() - _loaded_at < STANDARDS_TTL):
+        return _current
+    with _lock:
+        if (_current is None or versao != _loaded_version
+                or time.monotonic() - _loaded_at >= STANDARDS_TTL):
+            with shared_engine().connect() as conn:
+                rows = read_typed(conn, METAS_TODAS)
+            _current, _loaded_version, _loaded_at = Standards(rows), versao, time.monotonic()
+        return _current
+
+
+def invalidate():
+    """Descarta a cópia deste processo (os demais percebem pela versão em local_store)."""
+    global _current
+    _current = None
@@ -0,0 +1,89 @@
+"""
+Cache LRU em memória com tempo de vida (TTL) e contadores de acerto/erro.
+
+É local ao processo: cada worker do Gunicorn tem o seu. Por isso o TTL
+limita por quanto tempo um worker pode servir um valor desatualizado
+depois de uma escrita feita em outro worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Dicionário LRU limitado a `maxsize` itens, cada um válido por `ttl` segundos."""
+
+    def __init__(self, maxsize=256, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self._loading = {}           # chave -> lock do carregamento em andamento
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, loader):
+        """Retorna o valor em cache ou chama `loader()` e guarda o resultado (se não for None).
+
+        Threads pedindo a mesma chave ausente ao mesmo tempo esperam um único
+        `loader()` em vez de cada uma ir ao banco.
+        """
+        marker = object()
+        value = self.get(key, marker)
+        if value is not marker:
+            return value
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                item = self._data.get(key)
+                if item is not None and item[0] > time.monotonic():
+                    return item[1]
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is key_lock:
+                        del self._loading[key]
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,49 @@
+"""
+Consultas tipadas: cada uma declara as colunas que o gráfico usa e o tipo
+compacto de cada coluna no DataFrame.
+
+`SELECT *` em `producao_aves` trazia os sete `mort_d*`, datas e ids que os
+gráficos de indicadores não usam, tudo em int64/float64/object. Aqui a
+consulta lista só as colunas necessárias, resolve nulos no SQL (COALESCE)
+para que inteiros caibam em int16/int32, e `read_typed` aplica os tipos
+(int16/int32/float32, category para textos repetidos).
+
+Os KPIs semanais do lote (lot_kpis.py) também são uma TypedQuery.
+
+Benchmark de memória e tempo: python benchmarks.py indicadores --semanas 2000
+"""
+from typing import NamedTuple
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+
+class TypedQuery(NamedTuple):
+    sql: str
+    dtypes: dict
+
+
+def read_typed(conn, query, params=None):
+    """Executa `query` (TypedQuery) e retorna o DataFrame com os tipos declarados.
+
+    Parâmetros com tupla/lista viram listas expandidas (`coluna IN :param`).
+    """
+    params = params or {}
+    stmt = text(query.sql)
+    listas = [k for k, v in params.items() if isinstance(v, (tuple, list))]
+    if listas:
+        stmt = stmt.bindparams(*(bindparam(k, expanding=True) for k in listas))
+    df = pd.read_sql(stmt, conn, params=params)
+    return df.astype(query.dtypes)
+
+
+# Tabela de metas completa (tabela editável de metas e cache de padrões, standards.py)
+METAS_TODAS = TypedQuery(
+    sql="""
+        SELECT id, linhagem, semana_idade, peso_medio_g, consumo_ave_dia_g, consumo_acum_g, mortalidade_acum_pct
+        FROM metas_linhagem
+        ORDER BY linhagem, semana_idade
+    """,
+    dtypes={"id": "int32", "linhagem": "category", "semana_idade": "int16", "peso_medio_g": "float32",
+            "consumo_ave_dia_g": "float32", "consumo_acum_g": "float32", "mortalidade_acum_pct": "float32"},
+)
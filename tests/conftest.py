@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do app usam importações planas (rodam a partir de dash_app/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dash_app"))
@@ -0,0 +1,55 @@
+from datetime import date
+
+from date_ranges import (DateRange, add_months, current_month, last_days, month_label,
+                         month_range, previous_months)
+
+HOJE = date(2025, 3, 15)
+
+
+def test_clause_e_params():
+    rng = DateRange(date(2025, 1, 1), date(2025, 2, 1))
+    assert rng.clause("data_producao") == "data_producao >= :inicio AND data_producao < :fim"
+    assert rng.clause("d", prefix="m_") == "d >= :m_inicio AND d < :m_fim"
+    assert rng.params("m_") == {"m_inicio": date(2025, 1, 1), "m_fim": date(2025, 2, 1)}
+
+
+def test_intervalo_semiaberto():
+    rng = DateRange(date(2025, 1, 1), date(2025, 2, 1))
+    assert date(2025, 1, 1) in rng
+    assert date(2025, 1, 31) in rng
+    assert date(2025, 2, 1) not in rng
+    assert date(2024, 12, 31) not in rng
+
+
+def test_intervalo_sem_fim():
+    rng = DateRange(date(2025, 1, 1))
+    assert rng.clause("d") == "d >= :inicio"
+    assert rng.params() == {"inicio": date(2025, 1, 1)}
+    assert date(2030, 1, 1) in rng
+    assert date(2024, 12, 31) not in rng
+
+
+def test_add_months_vira_o_ano():
+    assert add_months(date(2025, 11, 20), 2) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 31), -1) == date(2024, 12, 1)
+    assert add_months(date(2025, 3, 1), -15) == date(2023, 12, 1)
+
+
+def test_meses():
+    assert month_range(date(2024, 2, 29)) == DateRange(date(2024, 2, 1), date(2024, 3, 1))
+    assert current_month(HOJE) == DateRange(date(2025, 3, 1), date(2025, 4, 1))
+    # os 3 meses anteriores, sem o mês atual
+    assert previous_months(3, HOJE) == DateRange(date(2024, 12, 1), date(2025, 3, 1))
+
+
+def test_last_days_sem_limite_superior():
+    rng = last_days(30, HOJE)
+    assert rng == DateRange(date(2025, 2, 13), None)
+    assert HOJE in rng
+    assert date(2025, 4, 1) in rng   # ex.: tratamento agendado
+    assert date(2025, 2, 12) not in rng
+
+
+def test_month_label():
+    assert month_label(2025, 1) == "Janeiro/2025"
+    assert month_label(2024.0, "12") == "Dezembro/2024"
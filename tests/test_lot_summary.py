@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+import lot_summary  # noqa: E402
+
+
+def _linha(lote_id, **valores):
+    base = {"lote_id": lote_id, "mort_acumulada": 10, "ultima_semana": 5, "consumo_acum_g": 700.0,
+            "ultima_pesagem": pd.Timestamp("2025-03-10"), "ultimo_peso_medio": 450.0,
+            "total_ovos": 1000, "ovos_quebrados": 12, "total_custos": 250.5, "total_receitas": 900.0}
+    return {**base, **valores}
+
+
+def _check(monkeypatch, fresh, stored):
+    tabelas = iter([pd.DataFrame(fresh), pd.DataFrame(stored)])
+    monkeypatch.setattr(lot_summary.pd, "read_sql", lambda *args, **kwargs: next(tabelas))
+    return lot_summary.check(conn=None)
+
+
+def test_sem_divergencias(monkeypatch):
+    drift = _check(monkeypatch, [_linha(1), _linha(2, ultima_pesagem=None, ultimo_peso_medio=None)],
+                   [_linha(1), _linha(2, ultima_pesagem=None, ultimo_peso_medio=None)])
+    assert drift.empty
+    assert list(drift.columns) == ["lote_id", "coluna", "resumo", "real"]
+
+
+def test_relata_colunas_divergentes(monkeypatch):
+    drift = _check(monkeypatch, [_linha(1), _linha(2)],
+                   [_linha(1, total_custos=250.0), _linha(2, ultimo_peso_medio=430.0)])
+    assert sorted(zip(drift["lote_id"], drift["coluna"])) == [(1, "total_custos"), (2, "ultimo_peso_medio")]
+    custo = drift[drift["coluna"] == "total_custos"].iloc[0]
+    assert (custo["resumo"], custo["real"]) == (250.0, 250.5)
+
+
+def test_tolera_arredondamento_de_float(monkeypatch):
+    drift = _check(monkeypatch, [_linha(1, consumo_acum_g=0.1 + 0.2)], [_linha(1, consumo_acum_g=0.3)])
+    assert drift.empty
+
+
+def test_lote_sem_resumo(monkeypatch):
+    # lote sem linha em lote_resumo: os totais contam como zero, a pesagem como ausente
+    vazio = dict.fromkeys(lot_summary.TOTAL_COLUMNS, 0)
+    drift = _check(monkeypatch, [_linha(1), _linha(2, **vazio)], [_linha(1), _linha(3)])
+    assert set(drift.loc[drift["lote_id"] == 2, "coluna"]) == {"ultima_pesagem", "ultimo_peso_medio"}
@@ -0,0 +1,87 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+import metas_import  # noqa: E402
+from metas_import import CurveFileError, read_curve_file, upsert_curves, validate_curve  # noqa: E402
+
+
+def test_read_curve_file_normaliza_cabecalhos():
+    csv = "Linhagem;Semana;Peso (g);Consumo dia;Mortalidade %\nHy-Line;1;70,5;14;0,1\n".encode("utf-8-sig")
+    df = read_curve_file(csv, "curva.CSV")
+    assert list(df.columns) == ["linhagem", "semana_idade", "peso_medio_g", "consumo_ave_dia_g", "mortalidade_acum_pct"]
+    assert df.loc[0, "linhagem"] == "Hy-Line"
+
+
+def test_read_curve_file_formato_invalido():
+    with pytest.raises(CurveFileError, match="Formato não suportado"):
+        read_curve_file(b"", "curva.pdf")
+
+
+def test_validate_curve_converte_virgula_e_completa_colunas():
+    df = pd.DataFrame({"semana_idade": ["1", "2"], "peso_medio_g": ["70,5", ""]})
+    curva = validate_curve(df, linhagem="Hy-Line")
+    assert list(curva.columns) == ["linhagem", "semana_idade", *metas_import.VALUE_COLUMNS]
+    assert curva["linhagem"].tolist() == ["Hy-Line", "Hy-Line"]
+    assert curva["semana_idade"].tolist() == [1, 2]
+    assert curva.loc[0, "peso_medio_g"] == 70.5
+    assert pd.isna(curva.loc[1, "peso_medio_g"])
+    assert curva["mortalidade_acum_pct"].isna().all()
+
+
+@pytest.mark.parametrize("dados, erro", [
+    ({"semana_idade": ["1"], "peso_medio_g": ["abc"]}, "Linha 2: valor inválido em 'peso_medio_g'"),
+    ({"semana_idade": ["0"], "peso_medio_g": ["1"]}, "Linha 2: semana deve ser um inteiro >= 1"),
+    ({"semana_idade": ["1,5"], "peso_medio_g": ["1"]}, "semana deve ser um inteiro"),
+    ({"semana_idade": ["1"], "peso_medio_g": ["-3"]}, "valores negativos"),
+    ({"semana_idade": ["1"], "mortalidade_acum_pct": ["101"]}, "acima de 100%"),
+    ({"semana_idade": ["1", "1"], "peso_medio_g": ["1", "2"]}, "Linha 3: semana repetida"),
+])
+def test_validate_curve_erros_por_linha(dados, erro):
+    with pytest.raises(CurveFileError) as exc:
+        validate_curve(pd.DataFrame(dados), linhagem="Hy-Line")
+    assert any(erro in e for e in exc.value.erros)
+
+
+def test_validate_curve_colunas_obrigatorias():
+    with pytest.raises(CurveFileError, match="Informe a linhagem"):
+        validate_curve(pd.DataFrame({"semana_idade": ["1"], "peso_medio_g": ["1"]}))
+    with pytest.raises(CurveFileError, match="Coluna de semana"):
+        validate_curve(pd.DataFrame({"peso_medio_g": ["1"]}), linhagem="X")
+    with pytest.raises(CurveFileError, match="Nenhuma coluna de valores"):
+        validate_curve(pd.DataFrame({"semana_idade": ["1"]}), linhagem="X")
+
+
+class FakeConn:
+    """metas_linhagem em memória; rowcount como o MySQL com CLIENT_FOUND_ROWS."""
+
+    def __init__(self, existentes):
+        self.tabela = dict(existentes)   # (linhagem, semana) -> (peso, cdia, cacum, mort)
+
+    def execute(self, stmt, params):
+        if "SELECT COUNT(*)" in str(stmt):
+            n = sum((params["lin"], s) in self.tabela for s in params["semanas"])
+            return type("R", (), {"scalar": lambda self: n})()
+        afetadas, i = 0, 0
+        while f"lin{i}" in params:
+            chave = (params[f"lin{i}"], params[f"sem{i}"])
+            valores = tuple(params[f"{c}{i}"] for c in ("peso", "cdia", "cacum", "mort"))
+            if chave not in self.tabela:
+                afetadas += 1
+            else:
+                afetadas += 2 if self.tabela[chave] != valores else 1
+            self.tabela[chave] = valores
+            i += 1
+        return type("R", (), {"rowcount": afetadas})()
+
+
+def test_upsert_curves_contagens(monkeypatch):
+    monkeypatch.setattr(metas_import, "CHUNK_SIZE", 2)   # força mais de um bloco
+    conn = FakeConn({("A", 1): (10.0, None, None, None), ("A", 2): (20.0, None, None, None)})
+    df = validate_curve(pd.DataFrame({"semana_idade": ["1", "2", "3", "4", "5"],
+                                      "peso_medio_g": ["10", "25", "30", "40", "50"]}), linhagem="A")
+    assert upsert_curves(conn, df) == {"inseridos": 3, "atualizados": 1, "inalterados": 1}
+    assert conn.tabela[("A", 2)] == (25.0, None, None, None)
+    # reimportar o mesmo arquivo não altera nada
+    assert upsert_curves(conn, df) == {"inseridos": 0, "atualizados": 0, "inalterados": 5}
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+pytest.importorskip("dash")
+pytest.importorskip("flask_login")
+pytest.importorskip("qrcode")
+
+os.environ.setdefault("SCHEMA_CHECK_ON_START", "0")
+
+import app as app_module  # noqa: E402
+import qr_assets  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_assets, "QR_CACHE_DIR", str(tmp_path))
+    return app_module.server.test_client()
+
+
+def test_lote_inexistente_404_sem_arquivo(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "get_public_view", lambda lote_id: None)
+    response = client.get("/qr/lote/999999.png")
+    assert response.status_code == 404
+    assert "immutable" not in response.headers.get("Cache-Control", "")
+    assert os.listdir(tmp_path) == []
+
+
+def test_lote_existente_gera_o_png(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "get_public_view", lambda lote_id: {"lote": {"id": lote_id}})
+    response = client.get("/qr/lote/7.png")
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert response.data.startswith(b"\x89PNG")
+    assert "immutable" in response.headers["Cache-Control"]
+    assert os.listdir(tmp_path) == [os.path.basename(qr_assets.lote_qr_path(7))]
+    response.close()
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+import report_cache  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _pdf(pasta, nome, tamanho, mtime):
+    path = pasta / nome
+    path.write_bytes(b"x" * tamanho)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_remove_os_menos_recentes_ate_caber(cache_dir):
+    antigo = _pdf(cache_dir, "lote_1_a.pdf", 100, 1000)
+    medio = _pdf(cache_dir, "lote_2_b.pdf", 100, 2000)
+    novo = _pdf(cache_dir, "lote_3_c.pdf", 100, 3000)
+    report_cache.evict(max_bytes=150)
+    assert not antigo.exists()
+    assert not medio.exists()
+    assert novo.exists()
+
+
+def test_nao_remove_se_cabe(cache_dir):
+    arquivos = [_pdf(cache_dir, f"lote_{i}_x.pdf", 100, 1000 + i) for i in range(3)]
+    report_cache.evict(max_bytes=300)
+    assert all(p.exists() for p in arquivos)
+
+
+def test_ignora_arquivos_que_nao_sao_pdf(cache_dir):
+    tmp = _pdf(cache_dir, "lote_1_x.pdf.tmp", 500, 1)
+    pdf = _pdf(cache_dir, "lote_2_y.pdf", 100, 2)
+    report_cache.evict(max_bytes=100)
+    assert tmp.exists()
+    assert pdf.exists()
+
+
+def test_usa_o_limite_configurado(cache_dir, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_MAX_BYTES", 0)
+    pdf = _pdf(cache_dir, "lote_1_x.pdf", 10, 1)
+    report_cache.evict()
+    assert not pdf.exists()
+
+
+def test_pasta_inexistente(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_DIR", str(tmp_path / "nao_existe"))
+    report_cache.evict(max_bytes=0)
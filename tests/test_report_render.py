@@ -0,0 +1,62 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("jinja2")
+
+from report_render import (Column, css_sign, css_sign_bold, fmt_brl, fmt_date, fmt_float,  # noqa: E402
+                           fmt_int, fmt_text, fmt_text_truncated, render_report, table_html)
+
+
+def test_fmt_date():
+    col = pd.Series(["2025-03-05", None, "invalida"])
+    assert fmt_date(col).tolist() == ["05/03/2025", "", ""]
+
+
+def test_fmt_numeros():
+    col = pd.Series([1234.567, None, "7"])
+    assert fmt_int(col).tolist() == ["1234", "0", "7"]
+    assert fmt_float(col).tolist() == ["1234.57", "0.00", "7.00"]
+    assert fmt_float(col, casas=1).tolist() == ["1234.6", "0.0", "7.0"]
+    assert fmt_brl(col).tolist() == ["R$ 1,234.57", "R$ 0.00", "R$ 7.00"]
+
+
+def test_fmt_text_escapa_e_trunca():
+    col = pd.Series(["  <b>Vacina</b> & cia ", None])
+    assert fmt_text(col).tolist() == ["&lt;b&gt;Vacina&lt;/b&gt; &amp; cia", ""]
+    longo = pd.Series(["x" * 130])
+    assert fmt_text_truncated(longo).iloc[0] == "x" * 117 + "..."
+    assert fmt_text(pd.Series(["abc"]), maxlen=3).iloc[0] == "abc"
+
+
+def test_css_sign():
+    col = pd.Series([-1.0, 0, 5, None])
+    assert css_sign(col).tolist() == ["valor-negativo", "valor-positivo", "valor-positivo", "valor-positivo"]
+    assert css_sign_bold(col).iloc[0] == "destaque valor-negativo"
+
+
+def test_table_html():
+    df = pd.DataFrame({"tipo": ["Ração", "<x>"], "valor": [10.0, -2.5]})
+    html = str(table_html(df, [Column("Tipo", "tipo", css="valor-negativo"),
+                               Column("Saldo", "valor", fmt_brl, "right", css_sign_bold)]))
+    assert "<thead><tr><th>Tipo</th><th>Saldo</th></tr></thead>" in html
+    assert '<tr><td class="valor-negativo">Ração</td>' in html
+    assert '<td class="destaque valor-positivo" style="text-align:right">R$ 10.00</td></tr>' in html
+    assert '<td class="valor-negativo">&lt;x&gt;</td>' in html
+    assert '<td class="destaque valor-negativo" style="text-align:right">R$ -2.50</td>' in html
+
+
+def test_table_html_vazia():
+    colunas = [Column("A", "a"), Column("B", "b")]
+    for df in (None, pd.DataFrame({"a": [], "b": []})):
+        html = str(table_html(df, colunas, empty_msg="Nada <aqui>"))
+        assert '<td colspan="2" style="text-align:center">Nada &lt;aqui&gt;</td>' in html
+
+
+def test_render_report_nao_escapa_as_tabelas():
+    tabela = table_html(pd.DataFrame({"a": [1]}), [Column("A", "a", fmt_int)])
+    html = render_report(lote={"identificador_lote": "L<1>", "linhagem": "Hy-Line", "data_alojamento": "",
+                               "aves_alojadas": 100},
+                         lote_id=1, lote_url="", qr_src=None, gerado_em="", inicio_periodo="",
+                         proprietaria="", cpf="", responsavel_tecnico="", secoes=[("Produção", tabela)])
+    assert "Relatório do Lote L&lt;1&gt;" in html
+    assert "<td>1</td>" in html
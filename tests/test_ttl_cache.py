@@ -0,0 +1,85 @@
+import threading
+import time
+
+from ttl_cache import TTLCache
+
+
+def test_get_set_e_contadores():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_expira_pelo_ttl(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: agora[0])
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    agora[0] += 9.9
+    assert cache.get("a") == 1
+    agora[0] += 0.1
+    assert cache.get("a", "ausente") == "ausente"
+    assert cache.stats()["size"] == 0
+
+
+def test_descarta_o_menos_usado():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_get_or_set_nao_guarda_none():
+    cache = TTLCache()
+    chamadas = []
+
+    def loader():
+        chamadas.append(1)
+
+    assert cache.get_or_set("a", loader) is None
+    assert cache.get_or_set("a", loader) is None
+    assert len(chamadas) == 2
+
+
+def test_get_or_set_single_flight():
+    cache = TTLCache()
+    chamadas = []
+    liberar = threading.Event()
+
+    def loader():
+        chamadas.append(1)
+        liberar.wait(5)
+        return "valor"
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache.get_or_set("k", loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)   # todas chegam enquanto o primeiro loader ainda roda
+    liberar.set()
+    for t in threads:
+        t.join(5)
+    assert resultados == ["valor"] * 8
+    assert len(chamadas) == 1
+    assert cache._loading == {}
+
+
+def test_get_or_set_libera_a_chave_se_o_loader_falha():
+    cache = TTLCache()
+
+    def falha():
+        raise RuntimeError("banco fora")
+
+    try:
+        cache.get_or_set("k", falha)
+    except RuntimeError:
+        pass
+    assert cache._loading == {}
+    assert cache.get_or_set("k", lambda: 42) == 42